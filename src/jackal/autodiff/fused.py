@@ -0,0 +1,49 @@
+"""Energy, forces and stress from a single forward/backward pass."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+
+@dataclass(frozen=True)
+class EnergyForcesStress:
+    energy: float
+    forces: np.ndarray  # -dE/dτ
+    stress: np.ndarray  # (1/Ω) dE/dε
+
+
+def strain_value_and_grad(energy_fn, positions, cell, numbers, *args):
+    """``(E, dE/dτ, dE/dε)`` of ``energy_fn(positions, cell, numbers, *args)`` in one pass.
+
+    Traceable, so it can be wrapped in ``core.compilation.jit_kernel`` with a
+    module-level ``energy_fn``; ``args`` carry the remaining (array) inputs.
+    """
+    pos = jnp.asarray(positions)
+    cell0 = jnp.asarray(cell)
+
+    def strained(p, eps):
+        f = jnp.eye(3) + eps
+        return energy_fn(p @ f.T, cell0 @ f.T, numbers, *args)
+
+    energy, (grad_pos, grad_eps) = jax.value_and_grad(strained, argnums=(0, 1))(pos, jnp.zeros((3, 3), dtype=pos.dtype))
+    return energy, grad_pos, grad_eps
+
+
+def energy_forces_stress(energy_fn, positions, cell, numbers) -> EnergyForcesStress:
+    """Evaluate ``energy_fn(positions, cell, numbers)`` once with ``jax.value_and_grad``
+    over positions and a homogeneous strain ``ε`` simultaneously.
+
+    Both the cell rows and the positions are deformed as ``x -> (I + ε) x``, so the
+    strain gradient is the stress at fixed fractional coordinates.
+    """
+    energy, grad_pos, grad_eps = strain_value_and_grad(energy_fn, positions, cell, jnp.asarray(numbers))
+    vol = abs(np.linalg.det(np.asarray(cell)))
+    return EnergyForcesStress(
+        energy=float(energy),
+        forces=-np.asarray(grad_pos),
+        stress=np.asarray(grad_eps) / max(vol, 1e-12),
+    )
@@ -4,7 +4,12 @@ from __future__ import annotations
 
 from collections.abc import Callable
 
+import jax
+import jax.numpy as jnp
 import numpy as np
+from jax.scipy.sparse.linalg import gmres
+
+from jackal.solvers.scf import run_scf, scf_options
 
 
 def scf_residual(rho: np.ndarray, fixed_point_map: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
@@ -13,6 +18,8 @@ def scf_residual(rho: np.ndarray, fixed_point_map: Callable[[np.ndarray], np.nda
 
 
 def fixed_point_jacobian_fd(rho: np.ndarray, fixed_point_map: Callable[[np.ndarray], np.ndarray], eps: float = 1e-6) -> np.ndarray:
+    """Dense finite-difference ``J - I`` (one map call per grid point); for small tests only,
+    use ``scf_fixed_point`` for gradients."""
     rho_arr = np.asarray(rho, dtype=float)
     base = np.asarray(fixed_point_map(rho_arr), dtype=float)
     jac = np.zeros((rho_arr.size, rho_arr.size), dtype=float)
@@ -22,3 +29,111 @@ def fixed_point_jacobian_fd(rho: np.ndarray, fixed_point_map: Callable[[np.ndarr
         col = (np.asarray(fixed_point_map(pert), dtype=float) - base) / eps
         jac[:, i] = col.ravel()
     return jac - np.eye(rho_arr.size)
+
+
+def _adjoint_anderson(matvec_t, g, tol: float, max_iter: int, ndim: int = 6):
+    """Solve ``λ = g + Jᵀλ`` by Anderson-accelerated fixed-point iteration."""
+    g = np.asarray(g, dtype=float).ravel()
+    lam = g.copy()
+    xs, fs = [], []
+    gnorm = max(np.linalg.norm(g), 1e-300)
+    for _ in range(max_iter):
+        f = g + np.asarray(matvec_t(lam), dtype=float).ravel() - lam
+        if np.linalg.norm(f) <= tol * gnorm:
+            break
+        xs.append(lam.copy())
+        fs.append(f)
+        xs, fs = xs[-ndim:], fs[-ndim:]
+        if len(fs) > 1:
+            df = np.diff(np.array(fs), axis=0).T
+            dx = np.diff(np.array(xs), axis=0).T
+            gamma = np.linalg.lstsq(df, f, rcond=None)[0]
+            lam = lam + f - (dx + df) @ gamma
+        else:
+            lam = lam + f
+    return lam
+
+
+def scf_fixed_point(
+    fixed_point_map: Callable,
+    rho0,
+    scf_diff: str = "implicit",
+    adjoint_solver: str = "gmres",
+    adjoint_tol: float = 1e-10,
+    adjoint_max_iter: int = 100,
+    unrolled_beta: float = 0.4,
+    scf_section=None,
+    **scf_kwargs,
+) -> Callable:
+    """Differentiable ``ρ*(θ)`` with ``ρ* = F(ρ*, θ)``, for ``F = fixed_point_map(ρ, θ)``.
+
+    The forward solve is ``solvers.scf.run_scf`` (NumPy, any mixer); ``F`` must be a
+    JAX-traceable function of the density and the parameter pytree ``θ``.
+    ``scf_diff`` selects how gradients flow back through the converged density:
+
+    - ``"implicit"``: a ``jax.custom_vjp`` solving the adjoint system
+      ``(I - Jᵀ) λ = ḡ`` with ``J = ∂F/∂ρ`` at ``ρ*``, matrix-free via VJPs of one map
+      application (``adjoint_solver`` ``"gmres"`` or ``"anderson"``), then returning
+      ``(∂F/∂θ)ᵀ λ``. Cost: a few map VJPs instead of a dense Jacobian.
+    - ``"unrolled"``: ``max_iter`` linearly mixed iterations traced by JAX.
+    - ``"stop_gradient"``: the converged density is treated as a constant.
+
+    The implicit forward pass runs eagerly, so the returned function is meant to be
+    differentiated with ``jax.grad``/``jax.vjp`` outside ``jax.jit``.
+
+    ``scf_section`` (an ``io.yaml_input.SCFSection``) sets the forward solve through
+    ``solvers.scf.scf_options``; explicit ``scf_kwargs`` take precedence.
+    """
+    rho_init = np.asarray(rho0, dtype=float)
+    if scf_section is not None:
+        scf_kwargs = {**scf_options(scf_section), **scf_kwargs}
+
+    def forward(theta):
+        theta_np = jax.tree_util.tree_map(np.asarray, theta)
+        result = run_scf(rho_init, lambda rho: np.asarray(fixed_point_map(jnp.asarray(rho), theta_np)), lambda rho: 0.0, **scf_kwargs)
+        return jnp.asarray(result.state.rho_r)
+
+    if scf_diff == "stop_gradient":
+        return lambda theta: jax.lax.stop_gradient(forward(jax.lax.stop_gradient(theta)))
+
+    if scf_diff == "unrolled":
+        n_iter = int(scf_kwargs.get("max_iter", 50))
+
+        def unrolled(theta):
+            rho = jnp.asarray(rho_init)
+            for _ in range(n_iter):
+                rho = (1.0 - unrolled_beta) * rho + unrolled_beta * fixed_point_map(rho, theta)
+            return rho
+
+        return unrolled
+
+    if scf_diff != "implicit":
+        raise ValueError(f"Unknown scf_diff mode: {scf_diff}")
+    if adjoint_solver not in ("gmres", "anderson"):
+        raise ValueError(f"Unknown adjoint_solver: {adjoint_solver}")
+
+    @jax.custom_vjp
+    def solve(theta):
+        return forward(theta)
+
+    def solve_fwd(theta):
+        rho_star = forward(theta)
+        return rho_star, (rho_star, theta)
+
+    def solve_bwd(res, g):
+        rho_star, theta = res
+        _, vjp_rho = jax.vjp(lambda r: fixed_point_map(r, theta), rho_star)
+        vjp_rho = jax.jit(vjp_rho)
+
+        def jt(v):
+            return vjp_rho(jnp.reshape(v, rho_star.shape))[0]
+
+        if adjoint_solver == "gmres":
+            lam, _ = gmres(lambda v: v - jt(v), g, tol=adjoint_tol, atol=0.0, maxiter=adjoint_max_iter)
+        else:
+            lam = jnp.reshape(jnp.asarray(_adjoint_anderson(jt, g, adjoint_tol, adjoint_max_iter)), rho_star.shape)
+        _, vjp_theta = jax.vjp(lambda t: fixed_point_map(rho_star, t), theta)
+        return vjp_theta(lam)
+
+    solve.defvjp(solve_fwd, solve_bwd)
+    return solve
@@ -8,11 +8,15 @@ import numpy as np
 
 
 def compute_stress(energy_vs_cell_fn, cell):
+    """``(1/Ω) dE/dη`` for the Cartesian strain ``a_i -> (I + η) a_i`` of the cell rows.
+
+    This is ``lattice.cell.strain_cell``'s convention.
+    """
     cell0 = jnp.asarray(cell)
 
     def e_eta(eta_flat):
         eta = eta_flat.reshape(3, 3)
-        cell_eta = (jnp.eye(3) + eta) @ cell0
+        cell_eta = cell0 @ (jnp.eye(3) + eta).T
         return energy_vs_cell_fn(cell_eta)
 
     grad = jax.grad(e_eta)(jnp.zeros(9))
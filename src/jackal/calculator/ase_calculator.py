@@ -1,49 +1,83 @@
 from __future__ import annotations
 
+import hashlib
+from pathlib import Path
+
 import numpy as np
 from ase.calculators.calculator import Calculator, all_changes
 
 from jackal.calculator.results_cache import ResultsCache
+from jackal.core.config import configure_runtime
+from jackal.core.units import BOHR_TO_ANG
+from jackal.density.extrapolation import DensityExtrapolator
 from jackal.io.ase_io import atoms_to_system
 from jackal.io.yaml_input import InputParams, load_input
-from jackal.workflows.single_point import run_single_point
+from jackal.workflows.single_point import atomic_density_for, run_single_point
 
 
 class JaxPWCalculator(Calculator):
     implemented_properties = ["energy", "free_energy", "forces", "stress"]
 
-    def __init__(self, input_yaml: str | None = None, params: InputParams | None = None, **kwargs):
+    def __init__(
+        self,
+        input_yaml: str | None = None,
+        params: InputParams | None = None,
+        cache_size: int = 32,
+        cache_tol: float = 1e-8,
+        cache_dir: str | Path | None = None,
+        extrapolation_order: int = 2,
+        atomic_density=None,
+        **kwargs,
+    ):
         super().__init__(**kwargs)
         if (input_yaml is None) == (params is None):
             raise ValueError("Provide exactly one of input_yaml or params")
         self._params = load_input(input_yaml) if input_yaml is not None else params
-        self._cache = ResultsCache()
-
-    def _make_cache_key(self, atoms) -> tuple:
-        return (
-            tuple(atoms.numbers.tolist()),
-            tuple(np.asarray(atoms.cell.array).ravel().round(12).tolist()),
-            tuple(np.asarray(atoms.positions).ravel().round(12).tolist()),
-            self._params.xc.functional,
-            self._params.basis.ecutwfc,
-            self._params.basis.ecutrho,
-        )
+        configure_runtime(self._params.runtime)
+        self._cache = ResultsCache(capacity=cache_size, tol=cache_tol, directory=cache_dir, namespace=self.params_hash)
+        # Warm start across ionic steps; ``atomic_density(positions_bohr)`` drives the
+        # atomic-superposition split (see ``density.extrapolation``). By default it is
+        # the Gaussian superposition ``run_single_point`` starts from, rebuilt per cell.
+        self._atomic_density = atomic_density
+        self._extrapolator = DensityExtrapolator(order=extrapolation_order, atomic_density=atomic_density)
+        self._warm_key: tuple | None = None
+
+    @property
+    def params_hash(self) -> str:
+        """Hash of the full input parameters; namespaces on-disk cache entries."""
+        return hashlib.sha256(self._params.model_dump_json().encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def cache_stats(self) -> dict[str, int]:
+        return self._cache.stats.as_dict()
+
+    def _geometry(self, atoms) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return np.asarray(atoms.numbers), np.asarray(atoms.cell.array), np.asarray(atoms.positions)
 
     def calculate(self, atoms=None, properties=("energy",), system_changes=all_changes):
         super().calculate(atoms, properties, system_changes)
-        key = self._make_cache_key(atoms)
-        cached = self._cache.get(key)
+        geometry = self._geometry(atoms)
+        cached = self._cache.get(*geometry, properties=properties)
         if cached is not None:
             self.results.update(cached)
             return
 
-        system = atoms_to_system(atoms, charge=self._params.system.charge)
-        out = run_single_point(system=system, params=self._params)
-        results = {
-            "energy": out.energy_ev,
-            "free_energy": out.free_energy_ev,
-            "forces": out.forces_ev_per_ang,
-            "stress": out.stress_voigt_ev_per_ang3,
-        }
-        self._cache.set(key, results)
+        section = self._params.system
+        system = atoms_to_system(atoms, charge=section.charge, spin_polarized=section.spin_polarized, starting_magnetization=section.starting_magnetization)
+        warm_key = (tuple(system.numbers.tolist()), tuple(system.cell.ravel().round(10).tolist()))
+        if warm_key != self._warm_key:
+            self._extrapolator.reset()
+            self._extrapolator.atomic_density = self._atomic_density or atomic_density_for(system, self._params)
+            self._warm_key = warm_key
+        pos_bohr = system.positions / BOHR_TO_ANG
+        initial_state = self._extrapolator.predict(pos_bohr)
+        out = run_single_point(system=system, params=self._params, properties=properties, initial_state=initial_state)
+        if out.scf_state is not None:
+            self._extrapolator.push(pos_bohr, out.scf_state)
+        results = {"energy": out.energy_ev, "free_energy": out.free_energy_ev}
+        if out.forces_ev_per_ang is not None:
+            results["forces"] = out.forces_ev_per_ang
+        if out.stress_voigt_ev_per_ang3 is not None:
+            results["stress"] = out.stress_voigt_ev_per_ang3
+        self._cache.set(*geometry, results)
         self.results.update(results)
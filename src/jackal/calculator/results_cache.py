@@ -1,23 +1,142 @@
+"""Bounded LRU cache of single-point results keyed by geometry.
+
+Lookups hash the species and the cell/positions quantized to ``tol``; a hit is
+always confirmed by an explicit ``max|Δ| <= tol`` comparison, and geometries that
+straddle a quantization boundary are found by a scan over the (bounded) entries.
+With ``directory`` set, entries are also written to ``<directory>/<namespace>/``
+as ``.npz`` files, where ``namespace`` is typically a hash of the input parameters.
+"""
+
 from __future__ import annotations
 
+import hashlib
+import os
+from collections import OrderedDict
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
+import numpy as np
+
 
 @dataclass
 class CacheEntry:
-    key: tuple[Any, ...]
+    key: str
+    numbers: np.ndarray
+    cell: np.ndarray
+    positions: np.ndarray
     results: dict[str, Any]
 
+    def matches(self, numbers: np.ndarray, cell: np.ndarray, positions: np.ndarray, tol: float) -> bool:
+        return (
+            self.numbers.shape == numbers.shape
+            and np.array_equal(self.numbers, numbers)
+            and np.max(np.abs(self.cell - cell)) <= tol
+            and np.max(np.abs(self.positions - positions), initial=0.0) <= tol
+        )
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    disk_hits: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits, "evictions": self.evictions}
+
 
 class ResultsCache:
-    def __init__(self) -> None:
-        self._entry: CacheEntry | None = None
+    def __init__(self, capacity: int = 32, tol: float = 1e-8, directory: str | Path | None = None, namespace: str = "default") -> None:
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        self.capacity = int(capacity)
+        self.tol = float(tol)
+        self.directory = Path(directory) / namespace if directory is not None else None
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
 
-    def get(self, key: tuple[Any, ...]) -> dict[str, Any] | None:
-        if self._entry is None or self._entry.key != key:
+    def _key(self, numbers: np.ndarray, cell: np.ndarray, positions: np.ndarray) -> str:
+        h = hashlib.sha256()
+        h.update(np.ascontiguousarray(numbers, dtype=np.int64).tobytes())
+        for arr in (cell, positions):
+            h.update(np.ascontiguousarray(np.round(arr / self.tol), dtype=np.int64).tobytes())
+        return h.hexdigest()[:32]
+
+    @staticmethod
+    def _arrays(numbers, cell, positions):
+        return (
+            np.asarray(numbers, dtype=int).ravel(),
+            np.asarray(cell, dtype=float).reshape(3, 3),
+            np.asarray(positions, dtype=float).reshape(-1, 3),
+        )
+
+    def _find(self, numbers, cell, positions) -> CacheEntry | None:
+        """Matching entry from memory, else from disk (then kept in memory)."""
+        key = self._key(numbers, cell, positions)
+        entry = self._entries.get(key)
+        if entry is None or not entry.matches(numbers, cell, positions, self.tol):
+            entry = next((e for e in reversed(self._entries.values()) if e.matches(numbers, cell, positions, self.tol)), None)
+        if entry is None:
+            entry = self._load(key)
+            if entry is None or not entry.matches(numbers, cell, positions, self.tol):
+                return None
+            self.stats.disk_hits += 1
+            self._insert(entry)
+        return entry
+
+    def get(self, numbers, cell, positions, properties=()) -> dict[str, Any] | None:
+        """Results for a matching geometry that contain every name in ``properties``."""
+        numbers, cell, positions = self._arrays(numbers, cell, positions)
+        entry = self._find(numbers, cell, positions)
+        if entry is None or not all(p in entry.results for p in properties):
+            self.stats.misses += 1
             return None
-        return self._entry.results
+        self._entries.move_to_end(entry.key)
+        self.stats.hits += 1
+        return entry.results
+
+    def set(self, numbers, cell, positions, results: dict[str, Any]) -> None:
+        """Store ``results``, merged into any entry already matching this geometry."""
+        numbers, cell, positions = self._arrays(numbers, cell, positions)
+        entry = self._find(numbers, cell, positions)
+        if entry is None:
+            entry = CacheEntry(key=self._key(numbers, cell, positions), numbers=numbers, cell=cell, positions=positions, results=dict(results))
+        else:
+            entry.results = {**entry.results, **results}
+        self._insert(entry)
+        self._save(entry)
+
+    def clear(self) -> None:
+        self._entries.clear()
 
-    def set(self, key: tuple[Any, ...], results: dict[str, Any]) -> None:
-        self._entry = CacheEntry(key=key, results=results)
+    def _insert(self, entry: CacheEntry) -> None:
+        self._entries[entry.key] = entry
+        self._entries.move_to_end(entry.key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _save(self, entry: CacheEntry) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        payload = {f"result_{k}": np.asarray(v) for k, v in entry.results.items()}
+        # Per-process name so concurrent writers of one key never share a tmp file.
+        tmp = self.directory / f"{entry.key}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, numbers=entry.numbers, cell=entry.cell, positions=entry.positions, **payload)
+        tmp.replace(self.directory / f"{entry.key}.npz")
+
+    def _load(self, key: str) -> CacheEntry | None:
+        if self.directory is None:
+            return None
+        path = self.directory / f"{key}.npz"
+        if not path.is_file():
+            return None
+        with np.load(path) as data:
+            results = {name[len("result_") :]: (data[name].item() if data[name].ndim == 0 else data[name]) for name in data.files if name.startswith("result_")}
+            return CacheEntry(key=key, numbers=data["numbers"], cell=data["cell"], positions=data["positions"], results=results)
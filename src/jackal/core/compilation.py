@@ -0,0 +1,147 @@
+"""JIT compilation management: shape buckets, timed kernels and a compile report.
+
+High-throughput runs see many structures whose atom and plane-wave counts differ
+only slightly. Padding those dimensions up to a coarse ``bucket_size`` lets one
+compiled executable serve all of them; together with JAX's persistent compilation
+cache (``core.config.configure_jax``) the compile cost is paid once per bucket
+rather than once per structure and process.
+
+``jit_kernel`` wraps a function in ``jax.jit`` and, for concrete inputs, compiles
+ahead of time per input signature so compile and execute time can be reported
+separately (``compilation_report``). Traced calls (inside ``jax.grad``, ``vmap``,
+an outer ``jit``) go straight to the jitted function.
+"""
+
+from __future__ import annotations
+
+import inspect
+import time
+from dataclasses import dataclass, field
+
+import jax
+import numpy as np
+
+
+def bucket_size(n: int, base: int = 8, growth: float = 1.25) -> int:
+    """Smallest bucket ``>= n``: multiples of ``base`` up to ``8 * base``, then geometric."""
+    n = max(int(n), 1)
+    b = base
+    while b < n:
+        b = b + base if b < 8 * base else int(np.ceil(b * growth / base)) * base
+    return b
+
+
+def pad_axis(x, size: int, axis: int = 0, fill=0):
+    """Pad ``x`` along ``axis`` to ``size`` with ``fill`` (NumPy or JAX arrays)."""
+    xp = jax.numpy if isinstance(x, jax.Array) else np
+    extra = int(size) - x.shape[axis]
+    if extra < 0:
+        raise ValueError(f"cannot pad axis {axis} of length {x.shape[axis]} down to {size}")
+    if extra == 0:
+        return x
+    widths = [(0, 0)] * x.ndim
+    widths[axis] = (0, extra)
+    return xp.pad(x, widths, constant_values=fill)
+
+
+@dataclass
+class KernelStats:
+    n_compiles: int = 0
+    compile_time: float = 0.0
+    n_calls: int = 0
+    execute_time: float = 0.0
+    n_traced_calls: int = 0
+    signatures: list = field(default_factory=list)
+
+
+_REGISTRY: dict[str, KernelStats] = {}
+
+
+def _signature(args) -> tuple:
+    leaves, treedef = jax.tree_util.tree_flatten(args)
+    return (treedef, tuple((np.shape(x), str(getattr(x, "dtype", type(x).__name__))) for x in leaves))
+
+
+def _static_positions(fn, jit_kwargs: dict) -> frozenset[int]:
+    nums = jit_kwargs.get("static_argnums") or ()
+    names = jit_kwargs.get("static_argnames") or ()
+    nums = (nums,) if isinstance(nums, int) else tuple(nums)
+    names = (names,) if isinstance(names, str) else tuple(names)
+    params = list(inspect.signature(fn).parameters)
+    nums += tuple(params.index(n) for n in names if n in params)
+    return frozenset(n % len(params) if n < 0 else n for n in nums)
+
+
+class JitKernel:
+    """``jax.jit(fn)`` with per-signature ahead-of-time compilation and timing.
+
+    The signature is the shapes and dtypes of the traced arguments, the values of
+    the static ones (``static_argnums``/``static_argnames``, passed positionally) and
+    the ``jax_enable_x64`` setting, which decides how Python scalars are typed.
+    """
+
+    def __init__(self, fn, name: str | None = None, **jit_kwargs):
+        self.name = name or getattr(fn, "__qualname__", repr(fn))
+        self.jitted = jax.jit(fn, **jit_kwargs)
+        self._static = _static_positions(fn, jit_kwargs)
+        self._compiled: dict[tuple, object] = {}
+        self.stats = _REGISTRY.setdefault(self.name, KernelStats())
+
+    def __call__(self, *args):
+        dynamic = tuple(a for i, a in enumerate(args) if i not in self._static)
+        if any(isinstance(x, jax.core.Tracer) for x in jax.tree_util.tree_leaves(dynamic)):
+            self.stats.n_traced_calls += 1
+            return self.jitted(*args)
+        if not jax.config.jax_disable_jit:
+            static = tuple((i, a) for i, a in enumerate(args) if i in self._static)
+            sig = (static, bool(jax.config.jax_enable_x64), *_signature(dynamic))
+            compiled = self._compiled.get(sig)
+            if compiled is None:
+                t0 = time.perf_counter()
+                compiled = self.jitted.lower(*args).compile()
+                self.stats.compile_time += time.perf_counter() - t0
+                self.stats.n_compiles += 1
+                self.stats.signatures.append(sig[3])
+                self._compiled[sig] = compiled
+            out = self._timed(compiled, dynamic)
+        else:
+            out = self._timed(self.jitted, args)
+        self.stats.n_calls += 1
+        return out
+
+    def _timed(self, call, args):
+        t0 = time.perf_counter()
+        out = jax.block_until_ready(call(*args))
+        self.stats.execute_time += time.perf_counter() - t0
+        return out
+
+
+def jit_kernel(name: str | None = None, **jit_kwargs):
+    """Decorator form of ``JitKernel``."""
+
+    def wrap(fn):
+        return JitKernel(fn, name=name, **jit_kwargs)
+
+    return wrap
+
+
+def compilation_report() -> dict[str, dict[str, float]]:
+    """Per-kernel compile count/time and call count/execute time (seconds)."""
+    return {
+        name: {
+            "n_compiles": s.n_compiles,
+            "compile_time": s.compile_time,
+            "n_calls": s.n_calls,
+            "execute_time": s.execute_time,
+            "n_traced_calls": s.n_traced_calls,
+        }
+        for name, s in _REGISTRY.items()
+    }
+
+
+def reset_compilation_report() -> None:
+    for name in _REGISTRY:
+        stats = _REGISTRY[name]
+        stats.n_compiles = stats.n_calls = stats.n_traced_calls = 0
+        stats.compile_time = stats.execute_time = 0.0
+        stats.signatures.clear()
@@ -2,10 +2,63 @@
 
 from __future__ import annotations
 
+import os
+from pathlib import Path
 
-def configure_jax(enable_x64: bool = True) -> None:
+
+def default_compilation_cache_dir() -> Path:
+    base = os.environ.get("JACKAL_CACHE_DIR")
+    root = Path(base) if base else Path.home() / ".cache" / "jackal"
+    return root / "xla"
+
+
+def _update(name: str, value) -> None:
+    import jax
+
+    if getattr(jax.config, name) != value:
+        jax.config.update(name, value)
+
+
+def configure_jax(
+    enable_x64: bool | None = True,
+    jit: bool | None = None,
+    compilation_cache_dir: str | Path | None = None,
+    min_compile_time_secs: float | None = None,
+) -> None:
+    """Set JAX precision and, optionally, JIT on/off and the persistent compilation cache.
+
+    Options left as ``None`` are not touched, so repeated calls do not undo each other,
+    and settings that already have the requested value are not rewritten.
+    """
     try:
-        import jax
-        jax.config.update("jax_enable_x64", enable_x64)
+        if enable_x64 is not None:
+            _update("jax_enable_x64", enable_x64)
+        if jit is not None:
+            _update("jax_disable_jit", not jit)
+        if compilation_cache_dir is not None:
+            path = Path(compilation_cache_dir).expanduser()
+            path.mkdir(parents=True, exist_ok=True)
+            _update("jax_compilation_cache_dir", str(path))
+        if min_compile_time_secs is not None:
+            _update("jax_persistent_cache_min_compile_time_secs", float(min_compile_time_secs))
     except Exception as exc:  # pragma: no cover
         raise RuntimeError("Failed to configure JAX") from exc
+
+
+def configure_runtime(runtime) -> None:
+    """Apply a ``RuntimeSection``'s process-wide settings: ``jit`` and the compilation cache.
+
+    Call this once per entry point (the ASE calculator does so at construction), not
+    per calculation. ``precision`` is not global: kernels such as
+    ``xc.xc_api.xc_energy_potential_stress`` take it as an argument, so a float32 run
+    never switches off ``jax_enable_x64`` for the rest of the process.
+    """
+    cache_dir = getattr(runtime, "compilation_cache_dir", None)
+    if cache_dir == "default":
+        cache_dir = default_compilation_cache_dir()
+    configure_jax(
+        enable_x64=True if getattr(runtime, "precision", "float64") == "float64" else None,
+        jit=getattr(runtime, "jit", True),
+        compilation_cache_dir=cache_dir,
+        min_compile_time_secs=getattr(runtime, "min_compile_time_secs", None) if cache_dir else None,
+    )
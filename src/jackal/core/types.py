@@ -13,6 +13,8 @@ class System:
     pbc: tuple[bool, bool, bool]
     charge: float = 0.0
     spin_polarized: bool = False
+    starting_magnetization: float = 0.0  # initial total moment (Bohr magnetons) when spin_polarized
+    magnetic_moments: np.ndarray | None = None  # initial per-atom collinear moments; lower the symmetry
 
 
 @dataclass(frozen=True)
@@ -44,10 +46,12 @@ class SCFState:
     v_eff_r: np.ndarray | None = None
     eigvals: np.ndarray | None = None
     occs: np.ndarray | None = None
+    wavefunctions: list[np.ndarray] | None = None  # per-k G-space coefficients (npw_k, nbands)
     fermi_level: float | None = None
     converged: bool = False
     iteration: int = 0
     mixer_history: list[Any] = field(default_factory=list)
+    positions_bohr: np.ndarray | None = None  # geometry rho_r belongs to
 
 
 @dataclass(frozen=True)
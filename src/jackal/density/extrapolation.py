@@ -0,0 +1,104 @@
+"""Density and wavefunction extrapolation between successive ionic steps.
+
+Following the usual MD/relaxation warm start, the density is split into a
+superposition of atomic densities, which is rebuilt exactly at the new positions,
+and a remainder ``Δρ = ρ - ρ_atomic`` that varies smoothly along the trajectory
+and is extrapolated from previous steps:
+
+- order 0: ``Δρ_new = Δρ_t``
+- order 1: ``Δρ_new = 2 Δρ_t - Δρ_{t-1}``
+- order 2: ``Δρ_new = Δρ_t + α (Δρ_t - Δρ_{t-1}) + β (Δρ_{t-1} - Δρ_{t-2})`` with
+  ``α, β`` fitted so the same combination of past positions best predicts the new
+  ones (Alfè, Comput. Phys. Commun. 118, 31); falls back to first order when the
+  fit is ill-conditioned.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+from dataclasses import replace
+
+import numpy as np
+
+from jackal.core.types import SCFState
+from jackal.lattice.fft_grid import fft_grid_gvectors
+
+
+def gaussian_atomic_density(fft_shape: tuple[int, int, int], cell_bohr: np.ndarray, positions_bohr: np.ndarray, charges: np.ndarray, width: float = 1.0) -> np.ndarray:
+    """Superposition of normalized Gaussians ``Z_a g(r - τ_a)`` on the FFT grid (electrons/bohr^3)."""
+    cell = np.asarray(cell_bohr, dtype=float)
+    g = fft_grid_gvectors(cell, fft_shape).reshape(-1, 3)
+    g2 = np.einsum("ij,ij->i", g, g)
+    sf = np.exp(-1j * (g @ np.asarray(positions_bohr, dtype=float).T)) @ np.asarray(charges, dtype=float)
+    rho_g = np.exp(-0.5 * width**2 * g2) * sf / abs(np.linalg.det(cell))
+    n = int(np.prod(fft_shape))
+    return np.fft.ifftn(rho_g.reshape(fft_shape) * n).real
+
+
+def _alpha_beta(history: list[np.ndarray], new: np.ndarray) -> tuple[float, float]:
+    r0, r1, r2 = history[-1], history[-2], history[-3]
+    a1, a2, b = (r0 - r1).ravel(), (r1 - r2).ravel(), (new - r0).ravel()
+    m = np.array([[a1 @ a1, a1 @ a2], [a1 @ a2, a2 @ a2]])
+    det = np.linalg.det(m)
+    if abs(det) <= 1e-10 * max(m[0, 0] * m[1, 1], 1e-300):
+        return 1.0, 0.0
+    alpha, beta = np.linalg.solve(m, np.array([a1 @ b, a2 @ b]))
+    return float(alpha), float(beta)
+
+
+class DensityExtrapolator:
+    """Keeps the last few converged ``SCFState`` objects and predicts the next one.
+
+    ``atomic_density(positions_bohr)`` returns the atomic superposition on the same
+    grid as ``SCFState.rho_r``; without it the full density is extrapolated.
+    Wavefunctions and mixer history of the latest step are carried over unchanged.
+    """
+
+    def __init__(self, order: int = 2, atomic_density: Callable[[np.ndarray], np.ndarray] | None = None):
+        if order not in (0, 1, 2):
+            raise ValueError(f"order must be 0, 1 or 2, got {order}")
+        self.order = order
+        self.atomic_density = atomic_density
+        self._positions: deque[np.ndarray] = deque(maxlen=3)
+        self._drho: deque[np.ndarray] = deque(maxlen=3)
+        self._last: SCFState | None = None
+
+    def __len__(self) -> int:
+        return len(self._drho)
+
+    def reset(self) -> None:
+        self._positions.clear()
+        self._drho.clear()
+        self._last = None
+
+    def _atomic(self, positions: np.ndarray, like: np.ndarray) -> np.ndarray:
+        return np.zeros_like(like) if self.atomic_density is None else np.asarray(self.atomic_density(positions), dtype=float)
+
+    def push(self, positions_bohr: np.ndarray, state: SCFState) -> None:
+        if state.rho_r is None:
+            return
+        pos = np.array(positions_bohr, dtype=float)
+        rho = np.asarray(state.rho_r, dtype=float)
+        if self._drho and self._drho[-1].shape != rho.shape:
+            self.reset()
+        self._positions.append(pos)
+        self._drho.append(rho - self._atomic(pos, rho))
+        self._last = state
+
+    def predict(self, positions_bohr: np.ndarray) -> SCFState | None:
+        """Initial guess at ``positions_bohr``, or ``None`` before the first ``push``."""
+        if not self._drho:
+            return None
+        pos = np.asarray(positions_bohr, dtype=float)
+        d = list(self._drho)
+        order = min(self.order, len(d) - 1)
+        if order == 0:
+            drho = d[-1]
+        elif order == 1:
+            drho = 2.0 * d[-1] - d[-2]
+        else:
+            alpha, beta = _alpha_beta(list(self._positions), pos)
+            drho = d[-1] + alpha * (d[-1] - d[-2]) + beta * (d[-2] - d[-3])
+        rho = drho + self._atomic(pos, drho)
+        return replace(self._last, rho_r=rho, positions_bohr=pos.copy(), converged=False, iteration=0)
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 import numpy as np
 
+from jackal.density.spin import from_total_magnetization, to_total_magnetization
+from jackal.lattice.fft_grid import fft_grid_gvectors
+
 
 class LinearMixer:
     def __init__(self, beta: float = 0.4):
@@ -11,46 +16,336 @@ class LinearMixer:
         return (1.0 - self.beta) * rho_in + self.beta * rho_out
 
 
+@lru_cache(maxsize=8)
+def _fft_g2_cached(shape: tuple[int, ...], cell_key: tuple[float, ...] | None) -> np.ndarray:
+    if cell_key is None:
+        # No cell: index-space frequencies (cycles per sample), the historical behaviour.
+        q = [np.fft.fftfreq(n) for n in shape]
+        qx, qy, qz = np.meshgrid(*q, indexing="ij")
+        g2 = qx * qx + qy * qy + qz * qz
+    else:
+        g = fft_grid_gvectors(np.asarray(cell_key).reshape(3, 3), shape)
+        g2 = np.einsum("...i,...i->...", g, g)
+    g2.flags.writeable = False
+    return g2
+
+
+def fft_grid_g2(shape: tuple[int, int, int], cell_bohr: np.ndarray | None = None) -> np.ndarray:
+    """Cached ``|G|^2`` on an FFT box (read-only)."""
+    cell_key = None if cell_bohr is None else tuple(np.asarray(cell_bohr, dtype=float).ravel().round(12).tolist())
+    return _fft_g2_cached(tuple(int(n) for n in shape), cell_key)
+
+
+def kerker_filter(g2: np.ndarray, q0: float) -> np.ndarray:
+    """Kerker preconditioner ``|G|^2 / (|G|^2 + q0^2)``; removes the ``G=0`` residual."""
+    return g2 / (g2 + q0 * q0)
+
+
 class DIISMixer:
-    """Pulay/DIIS mixer with lightweight Kerker-like preconditioning."""
+    """Pulay/DIIS mixer with Kerker preconditioning.
+
+    History lives in preallocated ``(ndim, nvec)`` ring buffers, and the residual
+    Gram matrix is updated one row/column per step, so each ``mix`` costs
+    ``O(ndim * nvec)``. The Kerker filter uses real ``|G|^2`` when ``cell_bohr`` is
+    given and is cached per grid shape and cell.
+
+    With ``sphere_indices`` (flat FFT-box indices of the dense G-sphere, see
+    ``lattice.fft_grid.fft_box_indices``) mixing happens in G-space on the sphere
+    only; components outside the sphere are carried over from ``rho_in``. This is
+    opt-in: without it the mixer works on the full real-space grid.
 
-    def __init__(self, beta: float = 0.4, ndim: int = 8, kerker_q0: float = 1.0):
+    Packed collinear densities ``(2, *grid)`` (see ``density.spin``) are mixed as
+    total density and magnetization with one shared history, so both channels get
+    the same DIIS coefficients; only the total density is Kerker-filtered.
+    """
+
+    def __init__(
+        self,
+        beta: float = 0.4,
+        ndim: int = 8,
+        kerker_q0: float = 1.0,
+        cell_bohr: np.ndarray | None = None,
+        sphere_indices: np.ndarray | None = None,
+    ):
         self.beta = beta
         self.ndim = ndim
         self.kerker_q0 = kerker_q0
-        self.history: list[tuple[np.ndarray, np.ndarray]] = []
-        self._fallback = LinearMixer(beta=beta)
+        self.cell_bohr = None if cell_bohr is None else np.asarray(cell_bohr, dtype=float)
+        self.sphere_indices = None if sphere_indices is None else np.asarray(sphere_indices)
+        self._x: np.ndarray | None = None
+        self._e: np.ndarray | None = None
+        self._gram = np.zeros((ndim, ndim))
+        self._count = 0
+        self._filter: np.ndarray | None = None
+
+    @property
+    def history(self) -> list[tuple[np.ndarray, np.ndarray]]:
+        """``(input, preconditioned residual)`` vectors, oldest first (views into the ring)."""
+        if self._x is None:
+            return []
+        n = min(self._count, self.ndim)
+        slots = [(self._count - n + i) % self.ndim for i in range(n)]
+        return [(self._x[s], self._e[s]) for s in slots]
+
+    def reset(self) -> None:
+        self._count = 0
+        self._gram[:] = 0.0
+
+    def _gspace(self) -> bool:
+        return self.sphere_indices is not None
+
+    def _prepare(self, rho: np.ndarray) -> None:
+        """``rho`` carries a leading channel axis (1 unpolarized, 2 for ``(ρ, m)``)."""
+        nchan, grid = rho.shape[0], rho.shape[1:]
+        if self._gspace():
+            nvec, dtype = nchan * self.sphere_indices.size, complex
+        else:
+            nvec, dtype = rho.size, float
+        if self._x is None or self._x.shape[1] != nvec:
+            self._x = np.empty((self.ndim, nvec), dtype=dtype)
+            self._e = np.empty((self.ndim, nvec), dtype=dtype)
+            self.reset()
+            self._filter = None
+        if self._filter is None and len(grid) == 3:
+            filt = kerker_filter(fft_grid_g2(grid, self.cell_bohr), self.kerker_q0)
+            filt = filt.reshape(-1)[self.sphere_indices] if self._gspace() else filt
+            # The magnetization has no long-range Coulomb response to screen.
+            self._filter = np.stack([filt] + [np.ones_like(filt)] * (nchan - 1))
 
     def _kerker_precondition(self, resid: np.ndarray) -> np.ndarray:
-        if resid.ndim != 3:
+        if resid.ndim != 4:
             return resid
-        qx = np.fft.fftfreq(resid.shape[0])[:, None, None]
-        qy = np.fft.fftfreq(resid.shape[1])[None, :, None]
-        qz = np.fft.fftfreq(resid.shape[2])[None, None, :]
-        q2 = qx * qx + qy * qy + qz * qz
-        filt = q2 / (q2 + self.kerker_q0 * self.kerker_q0)
-        r_g = np.fft.fftn(resid)
-        return np.fft.ifftn(r_g * filt).real
+        return np.fft.ifftn(np.fft.fftn(resid, axes=(1, 2, 3)) * self._filter, axes=(1, 2, 3)).real
+
+    def mix(self, rho_in: np.ndarray, rho_out: np.ndarray) -> np.ndarray:
+        rho_in = np.asarray(rho_in, dtype=float)
+        rho_out = np.asarray(rho_out, dtype=float)
+        spin = rho_in.ndim == 4 and rho_in.shape[0] == 2
+        if spin:
+            rho_in, rho_out = to_total_magnetization(rho_in), to_total_magnetization(rho_out)
+        else:
+            rho_in, rho_out = rho_in[None], rho_out[None]
+        self._prepare(rho_in)
+        nchan = rho_in.shape[0]
+
+        slot = self._count % self.ndim
+        rho_in_g = None
+        if self._gspace():
+            rho_in_g = np.fft.fftn(rho_in, axes=(1, 2, 3)).reshape(nchan, -1)
+            x = rho_in_g[:, self.sphere_indices]
+            self._x[slot] = x.reshape(-1)
+            rho_out_g = np.fft.fftn(rho_out, axes=(1, 2, 3)).reshape(nchan, -1)
+            self._e[slot] = ((rho_out_g[:, self.sphere_indices] - x) * self._filter).reshape(-1)
+        else:
+            self._x[slot] = rho_in.reshape(-1)
+            self._e[slot] = self._kerker_precondition(rho_out - rho_in).reshape(-1)
+        self._count += 1
+        n = min(self._count, self.ndim)
+
+        row = np.real(self._e[:n].conj() @ self._e[slot])
+        self._gram[slot, :n] = row
+        self._gram[:n, slot] = row
+
+        mixed = self._x[slot] + self._e[slot]
+        if n >= 2:
+            b = np.zeros((n + 1, n + 1))
+            b[:-1, :-1] = self._gram[:n, :n]
+            b[:-1, -1] = -1.0
+            b[-1, :-1] = -1.0
+            rhs = np.zeros(n + 1)
+            rhs[-1] = -1.0
+            try:
+                coeff = np.linalg.solve(b + 1e-12 * np.eye(n + 1), rhs)[:-1]
+                mixed = coeff @ self._x[:n] + coeff @ self._e[:n]
+            except np.linalg.LinAlgError:
+                pass
+        out = self._finish(rho_in, mixed, rho_in_g)
+        return from_total_magnetization(out) if spin else out[0]
+
+    def _finish(self, rho_in: np.ndarray, mixed: np.ndarray, rho_in_g: np.ndarray | None) -> np.ndarray:
+        """Return ``(1 - β) rho_in + β mixed`` in real space with ``rho_in``'s shape."""
+        if rho_in_g is None:
+            return (1.0 - self.beta) * rho_in + self.beta * mixed.reshape(rho_in.shape)
+        out_g = rho_in_g.copy()
+        out_g[:, self.sphere_indices] = (1.0 - self.beta) * out_g[:, self.sphere_indices] + self.beta * mixed.reshape(rho_in.shape[0], -1)
+        return np.fft.ifftn(out_g.reshape(rho_in.shape), axes=(1, 2, 3)).real
+
+
+def hartree_metric(g2: np.ndarray) -> np.ndarray:
+    """Hartree-like metric weights ``4π / |G|^2`` for residual inner products.
+
+    ``G = 0`` gets the weight of the smallest non-zero ``|G|`` so charge drift still counts.
+    """
+    g2 = np.asarray(g2, dtype=float)
+    g2_min = g2[g2 > 0.0].min() if np.any(g2 > 0.0) else 1.0
+    return 4.0 * np.pi / np.where(g2 > 0.0, g2, g2_min)
+
+
+class _QuasiNewtonMixer:
+    """Shared machinery for Anderson and modified-Broyden mixing in G-space.
+
+    Densities on a 3D grid are mixed as FFT coefficients with the Hartree metric and
+    Kerker preconditioner ``G1 = beta * |G|^2 / (|G|^2 + q0^2)``. Differences of
+    inputs and residuals are kept in ring buffers together with their metric Gram
+    matrix (one row/column updated per step). If the residual norm grows by more
+    than ``reset_factor`` in one step the history is cleared.
+    """
+
+    def __init__(self, beta: float = 0.4, ndim: int = 8, kerker_q0: float = 1.0, cell_bohr: np.ndarray | None = None, reset_factor: float = 5.0):
+        self.beta = beta
+        self.ndim = ndim
+        self.kerker_q0 = kerker_q0
+        self.cell_bohr = None if cell_bohr is None else np.asarray(cell_bohr, dtype=float)
+        self.reset_factor = reset_factor
+        self._dx: np.ndarray | None = None
+        self._df: np.ndarray | None = None
+        self._gram = np.zeros((ndim, ndim))
+        self._count = 0
+        self._prev: tuple[np.ndarray, np.ndarray] | None = None
+        self._prev_norm = np.inf
+        self._seed: list[tuple[np.ndarray, np.ndarray]] | None = None
+        self.n_resets = 0
+
+    @property
+    def history(self) -> list[tuple[np.ndarray, np.ndarray]]:
+        """``(Δinput, Δresidual)`` pairs, oldest first (views into the ring)."""
+        if self._dx is None:
+            return []
+        n = min(self._count, self.ndim)
+        slots = [(self._count - n + i) % self.ndim for i in range(n)]
+        return [(self._dx[s], self._df[s]) for s in slots]
+
+    def reset(self) -> None:
+        self._count = 0
+        self._gram[:] = 0.0
+        self._prev = None
+        self._prev_norm = np.inf
+
+    def seed_history(self, pairs) -> None:
+        """Start from ``(Δinput, Δresidual)`` pairs of a similar SCF (e.g. the previous MD step).
+
+        The pairs approximate the inverse dielectric response, which changes little
+        between nearby geometries; they are pushed before the first ``mix``.
+        """
+        self._seed = [(np.array(dx), np.array(df)) for dx, df in pairs][-self.ndim :]
+
+    def _setup(self, rho: np.ndarray) -> None:
+        if rho.ndim == 4:
+            raise ValueError(f"{type(self).__name__} does not mix packed spin densities; use the DIIS mixer")
+        if self._dx is not None and self._dx.shape[1] == rho.size:
+            return
+        if rho.ndim == 3:
+            g2 = fft_grid_g2(rho.shape, self.cell_bohr).reshape(-1)
+            self._metric = hartree_metric(g2)
+            # G=0 gets the smallest non-zero |G| step so non-conserving residuals still move.
+            g2_min = g2[g2 > 0.0].min() if np.any(g2 > 0.0) else 1.0
+            self._precond = self.beta * kerker_filter(np.where(g2 > 0.0, g2, g2_min), self.kerker_q0)
+        else:
+            self._metric = np.ones(rho.size)
+            self._precond = np.full(rho.size, self.beta)
+        dtype = complex if rho.ndim == 3 else float
+        self._dx = np.empty((self.ndim, rho.size), dtype=dtype)
+        self._df = np.empty((self.ndim, rho.size), dtype=dtype)
+        self.reset()
+
+    def _dot(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return np.real((a.conj() * self._metric) @ b)
+
+    def _push(self, dx: np.ndarray, df: np.ndarray) -> int:
+        slot = self._count % self.ndim
+        self._dx[slot] = dx
+        self._df[slot] = df
+        self._count += 1
+        n = min(self._count, self.ndim)
+        row = self._dot(self._df[:n], self._df[slot])
+        self._gram[slot, :n] = row
+        self._gram[:n, slot] = row
+        return n
+
+    def _update(self, x: np.ndarray, f: np.ndarray, n: int) -> np.ndarray:
+        raise NotImplementedError
 
     def mix(self, rho_in: np.ndarray, rho_out: np.ndarray) -> np.ndarray:
-        resid = self._kerker_precondition(rho_out - rho_in)
-        self.history.append((rho_in.copy(), resid.copy()))
-        self.history = self.history[-self.ndim :]
-
-        if len(self.history) < 2:
-            return self._fallback.mix(rho_in, rho_in + resid)
-
-        r = np.array([h[1].ravel() for h in self.history])
-        b = np.zeros((len(self.history) + 1, len(self.history) + 1))
-        b[:-1, :-1] = r @ r.T
-        b[:-1, -1] = -1.0
-        b[-1, :-1] = -1.0
-        rhs = np.zeros(len(self.history) + 1)
-        rhs[-1] = -1.0
-
-        try:
-            coeff = np.linalg.solve(b + 1e-12 * np.eye(b.shape[0]), rhs)[:-1]
-            mixed = np.sum([c * (x + e) for c, (x, e) in zip(coeff, self.history)], axis=0)
-            return (1.0 - self.beta) * rho_in + self.beta * mixed
-        except np.linalg.LinAlgError:
-            return self._fallback.mix(rho_in, rho_in + resid)
+        rho_in = np.asarray(rho_in, dtype=float)
+        rho_out = np.asarray(rho_out, dtype=float)
+        self._setup(rho_in)
+        if self._seed is not None:
+            for dx, df in self._seed:
+                if dx.shape == (rho_in.size,) and dx.dtype == self._dx.dtype:
+                    self._push(dx, df)
+            self._seed = None
+        to_g = (lambda a: np.fft.fftn(a).reshape(-1)) if rho_in.ndim == 3 else (lambda a: a.reshape(-1))
+        x = to_g(rho_in)
+        f = to_g(rho_out) - x
+
+        norm = float(np.sqrt(self._dot(f, f)))
+        if norm > self.reset_factor * self._prev_norm:
+            self.reset()
+            self.n_resets += 1
+        if self._prev is not None:
+            n = self._push(x - self._prev[0], f - self._prev[1])
+        else:
+            n = min(self._count, self.ndim)
+        self._prev = (x.copy(), f.copy())
+        self._prev_norm = norm
+
+        x_new = self._update(x, f, n) if n else x + self._precond * f
+        if rho_in.ndim == 3:
+            return np.fft.ifftn(x_new.reshape(rho_in.shape)).real
+        return x_new.reshape(rho_in.shape)
+
+
+class AndersonMixer(_QuasiNewtonMixer):
+    """Anderson mixing: minimize ``|F + Σ γ_j ΔF_j|`` in the Hartree metric, then a Kerker step."""
+
+    def _update(self, x: np.ndarray, f: np.ndarray, n: int) -> np.ndarray:
+        a = self._gram[:n, :n]
+        rhs = -self._dot(self._df[:n], f)
+        gamma = np.linalg.solve(a + 1e-12 * np.trace(a) / n * np.eye(n), rhs)
+        x_bar = x + gamma @ self._dx[:n]
+        f_bar = f + gamma @ self._df[:n]
+        return x_bar + self._precond * f_bar
+
+
+class BroydenMixer(_QuasiNewtonMixer):
+    """Modified Broyden mixing (Johnson, PRB 38, 12807) with weights ``w_n = 1`` and ``w_0``.
+
+    Differences are normalized by ``|ΔF_n|`` and ``u_n = G1 ΔF_n + Δρ_n``; the update is
+    ``ρ + G1 F - Σ_n γ_n u_n`` with ``γ = c (w_0² I + a)^{-1}``.
+    """
+
+    def __init__(self, *args, w0: float = 0.01, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.w0 = w0
+
+    def _update(self, x: np.ndarray, f: np.ndarray, n: int) -> np.ndarray:
+        scale = 1.0 / np.sqrt(np.clip(np.diag(self._gram)[:n], 1e-300, None))
+        a = self._gram[:n, :n] * scale[:, None] * scale[None, :]
+        c = self._dot(self._df[:n], f) * scale
+        gamma = np.linalg.solve(self.w0**2 * np.eye(n) + a, c)
+        u = (self._precond[None, :] * self._df[:n] + self._dx[:n]) * scale[:, None]
+        return x + self._precond * f - gamma @ u
+
+
+def make_mixer(
+    kind: str = "diis",
+    beta: float = 0.4,
+    ndim: int = 8,
+    kerker_q0: float = 1.0,
+    cell_bohr: np.ndarray | None = None,
+    reset_factor: float = 5.0,
+    sphere_indices: np.ndarray | None = None,
+):
+    """Mixer selected by ``SCFSection.mixer``; all expose ``mix(rho_in, rho_out)``.
+
+    ``sphere_indices`` is opt-in and only used by the DIIS mixer (G-sphere mixing).
+    """
+    if kind == "linear":
+        return LinearMixer(beta=beta)
+    if kind == "diis":
+        return DIISMixer(beta=beta, ndim=ndim, kerker_q0=kerker_q0, cell_bohr=cell_bohr, sphere_indices=sphere_indices)
+    if kind == "anderson":
+        return AndersonMixer(beta=beta, ndim=ndim, kerker_q0=kerker_q0, cell_bohr=cell_bohr, reset_factor=reset_factor)
+    if kind == "broyden":
+        return BroydenMixer(beta=beta, ndim=ndim, kerker_q0=kerker_q0, cell_bohr=cell_bohr, reset_factor=reset_factor)
+    raise ValueError(f"Unknown mixer: {kind}")
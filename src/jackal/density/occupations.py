@@ -1,6 +1,35 @@
+"""Occupations, Fermi level and smearing entropy.
+
+Occupations are ``g θ((μ - ε)/σ)`` per orbital with ``g = 2`` (``g = 1`` for packed
+spin eigenvalues of shape ``(2, nk, nbands)``). The Fermi level is found over the
+whole ``(..., nk, nbands)`` eigenvalue array with a bracketed Newton iteration that
+falls back to bisection whenever a step leaves the bracket or ``dN/dμ <= 0``
+(Methfessel-Paxton and cold smearing are not monotonic), until the electron count
+is exact to machine precision.
+
+Everything is ``jax.numpy`` and jittable. ``fermi_level`` has a custom JVP from the
+implicit function theorem on ``N(μ, ε, σ) = N_e``, so occupations can be
+differentiated inside an SCF without unrolling the root search.
+
+Entropy follows Quantum ESPRESSO's ``w1gauss``: the returned ``entropy`` is ``TS``
+(Hartree), which enters ``EnergyBreakdown.e_entropy`` and ``free_energy = E - TS``.
+"""
+
 from __future__ import annotations
 
+from dataclasses import dataclass
+from functools import partial
+
+import jax
+import jax.numpy as jnp
 import numpy as np
+from jax.scipy.special import erfc
+
+from jackal.core.units import RY_TO_HARTREE
+
+SMEARINGS = ("gaussian", "fermi-dirac", "methfessel-paxton", "marzari-vanderbilt")
+_SQRT_PI = float(np.sqrt(np.pi))
+_SQRT_2 = float(np.sqrt(2.0))
 
 
 def fermi_dirac_occupations(eps: np.ndarray, mu: float, kT: float) -> np.ndarray:
@@ -9,3 +38,207 @@ def fermi_dirac_occupations(eps: np.ndarray, mu: float, kT: float) -> np.ndarray
     x = (eps - mu) / kT
     x = np.clip(x, -50.0, 50.0)
     return 1.0 / (np.exp(x) + 1.0)
+
+
+def count_electrons(z_valence, charge: float = 0.0) -> float:
+    """Valence electrons of the system: ``Σ_a Z_a - charge``."""
+    return float(np.sum(z_valence)) - float(charge)
+
+
+def _hermite(n: int, x):
+    """Physicists' Hermite polynomials ``H_0 .. H_n`` at ``x`` (list)."""
+    h = [jnp.ones_like(x), 2.0 * x]
+    for k in range(1, n):
+        h.append(2.0 * x * h[k] - 2.0 * k * h[k - 1])
+    return h[: n + 1]
+
+
+def _mp_coeff(n: int) -> float:
+    return (-1.0) ** n / (float(np.prod(np.arange(1, n + 1))) * 4.0**n * _SQRT_PI)
+
+
+def occupation_function(x, smearing: str = "gaussian", order: int = 1):
+    """``θ(x)`` in ``[0, 1]`` (approximately, for MP) with ``x = (μ - ε)/σ``."""
+    if smearing == "gaussian":
+        return 0.5 * erfc(-x)
+    if smearing == "fermi-dirac":
+        return jax.nn.sigmoid(x)
+    if smearing == "methfessel-paxton":
+        h = _hermite(2 * order, x)
+        gauss = jnp.exp(-x * x)
+        return 0.5 * erfc(-x) - sum(_mp_coeff(n) * h[2 * n - 1] * gauss for n in range(1, order + 1))
+    if smearing == "marzari-vanderbilt":
+        y = x - 1.0 / _SQRT_2
+        return 0.5 * erfc(-y) + jnp.exp(-y * y) / (_SQRT_2 * _SQRT_PI)
+    raise ValueError(f"Unknown smearing: {smearing}")
+
+
+def delta_function(x, smearing: str = "gaussian", order: int = 1):
+    """``dθ/dx``."""
+    if smearing == "gaussian":
+        return jnp.exp(-x * x) / _SQRT_PI
+    if smearing == "fermi-dirac":
+        s = jax.nn.sigmoid(x)
+        return s * (1.0 - s)
+    if smearing == "methfessel-paxton":
+        h = _hermite(2 * order, x)
+        return jnp.exp(-x * x) * sum(_mp_coeff(n) * h[2 * n] for n in range(order + 1))
+    if smearing == "marzari-vanderbilt":
+        y = x - 1.0 / _SQRT_2
+        return jnp.exp(-y * y) * (2.0 - _SQRT_2 * x) / _SQRT_PI
+    raise ValueError(f"Unknown smearing: {smearing}")
+
+
+def entropy_function(x, smearing: str = "gaussian", order: int = 1):
+    """Per-orbital ``TS / σ`` (minus QE's ``w1gauss``)."""
+    if smearing == "gaussian":
+        return jnp.exp(-x * x) / (2.0 * _SQRT_PI)
+    if smearing == "fermi-dirac":
+        # -[f ln f + (1 - f) ln(1 - f)] written with softplus to stay finite for large |x|.
+        f = jax.nn.sigmoid(x)
+        return f * jax.nn.softplus(-x) + (1.0 - f) * jax.nn.softplus(x)
+    if smearing == "methfessel-paxton":
+        return 0.5 * _mp_coeff(order) * _hermite(2 * order, x)[2 * order] * jnp.exp(-x * x)
+    if smearing == "marzari-vanderbilt":
+        y = x - 1.0 / _SQRT_2
+        return -y * jnp.exp(-y * y) / (_SQRT_2 * _SQRT_PI)
+    raise ValueError(f"Unknown smearing: {smearing}")
+
+
+def _band_weights(eigvals, weights, degeneracy):
+    return degeneracy * jnp.broadcast_to(jnp.asarray(weights)[:, None], eigvals.shape[-2:])
+
+
+def electron_count(mu, eigvals, weights, sigma, smearing: str = "gaussian", order: int = 1, degeneracy: float = 2.0):
+    """``N(μ) = g Σ_k w_k Σ_n θ((μ - ε_nk)/σ)``."""
+    x = (mu - eigvals) / sigma
+    return jnp.sum(_band_weights(eigvals, weights, degeneracy) * occupation_function(x, smearing, order))
+
+
+def _solve_mu(eigvals, weights, nelec, sigma, smearing, order, degeneracy, max_iter):
+    wb = _band_weights(eigvals, weights, degeneracy)
+    # θ and its Hermite corrections vanish to double precision beyond |x| ~ 27.
+    lo = jnp.min(eigvals) - 30.0 * sigma
+    hi = jnp.max(eigvals) + 30.0 * sigma
+    tol = 4.0 * jnp.finfo(eigvals.dtype).eps * jnp.maximum(nelec, 1.0)
+
+    def count(mu):
+        x = (mu - eigvals) / sigma
+        return jnp.sum(wb * occupation_function(x, smearing, order)) - nelec, jnp.sum(wb * delta_function(x, smearing, order)) / sigma
+
+    def cond(state):
+        mu, lo, hi, f, it = state
+        return (jnp.abs(f) > tol) & (hi - lo > 4.0 * jnp.finfo(eigvals.dtype).eps * jnp.maximum(jnp.abs(mu), 1.0)) & (it < max_iter)
+
+    def body(state):
+        mu, lo, hi, f, it = state
+        _, dn = count(mu)
+        newton = mu - f / jnp.where(dn > 0.0, dn, 1.0)
+        ok = (dn > 0.0) & (newton > lo) & (newton < hi)
+        mu = jnp.where(ok, newton, 0.5 * (lo + hi))
+        f, _ = count(mu)
+        lo = jnp.where(f < 0.0, mu, lo)
+        hi = jnp.where(f < 0.0, hi, mu)
+        return mu, lo, hi, f, it + 1
+
+    mu0 = 0.5 * (lo + hi)
+    f0, _ = count(mu0)
+    lo = jnp.where(f0 < 0.0, mu0, lo)
+    hi = jnp.where(f0 < 0.0, hi, mu0)
+    mu, *_ = jax.lax.while_loop(cond, body, (mu0, lo, hi, f0, jnp.asarray(0)))
+    return mu
+
+
+@partial(jax.custom_jvp, nondiff_argnums=(4, 5, 6, 7))
+def fermi_level(eigvals, weights, nelec, sigma, smearing: str = "gaussian", order: int = 1, degeneracy: float = 2.0, max_iter: int = 200):
+    """Chemical potential ``μ`` with ``N(μ) = nelec`` (same units as ``eigvals`` and ``sigma``).
+
+    ``eigvals`` has shape ``(..., nk, nbands)`` and ``weights`` shape ``(nk,)`` summing to one.
+    """
+    return _solve_mu(eigvals, weights, nelec, sigma, smearing, order, degeneracy, max_iter)
+
+
+@fermi_level.defjvp
+def _fermi_level_jvp(smearing, order, degeneracy, max_iter, primals, tangents):
+    eigvals, weights, nelec, sigma = primals
+    mu = _solve_mu(eigvals, weights, nelec, sigma, smearing, order, degeneracy, max_iter)
+    d_eig, d_w, d_nelec, d_sigma = tangents
+
+    def count(mu, e, w, s):
+        return electron_count(mu, e, w, s, smearing, order, degeneracy)
+
+    _, dn_dmu = jax.jvp(lambda m: count(m, eigvals, weights, sigma), (mu,), (jnp.ones_like(mu),))
+    _, dn_other = jax.jvp(lambda e, w, s: count(mu, e, w, s), (eigvals, weights, sigma), (d_eig, d_w, d_sigma))
+    safe = jnp.where(jnp.abs(dn_dmu) > 1e-300, dn_dmu, 1.0)
+    d_mu = jnp.where(jnp.abs(dn_dmu) > 1e-300, (d_nelec - dn_other) / safe, 0.0)
+    return mu, d_mu
+
+
+@dataclass
+class OccupationResult:
+    occupations: np.ndarray  # same shape as eigvals, in [0, g]
+    fermi_level: float
+    entropy: float  # TS, enters EnergyBreakdown.e_entropy
+
+
+@partial(jax.jit, static_argnames=("smearing", "order", "degeneracy"))
+def smeared_occupations(eigvals, weights, nelec, sigma, smearing: str = "gaussian", order: int = 1, degeneracy: float = 2.0):
+    """``(occupations, μ, TS)`` for smeared occupations; jittable and differentiable."""
+    mu = fermi_level(eigvals, weights, nelec, sigma, smearing, order, degeneracy)
+    x = (mu - eigvals) / sigma
+    occ = degeneracy * occupation_function(x, smearing, order)
+    ts = sigma * jnp.sum(_band_weights(eigvals, weights, degeneracy) * entropy_function(x, smearing, order))
+    return occ, mu, ts
+
+
+def fixed_occupations(eigvals, nelec, degeneracy: float = 2.0):
+    """Insulator occupations: the lowest ``nelec / g`` bands full at every k; ``μ`` mid-gap."""
+    eigvals = np.asarray(eigvals, dtype=float)
+    nocc = float(nelec) / degeneracy
+    if eigvals.ndim == 3:
+        # Packed spin without smearing: both channels get the same number of electrons.
+        nocc = nocc / 2.0
+    n_full = int(round(nocc))
+    if abs(nocc - n_full) > 1e-8:
+        raise ValueError(f"fixed occupations need an integer number of filled bands, got {nocc}")
+    if n_full > eigvals.shape[-1]:
+        raise ValueError(f"{n_full} filled bands requested but only {eigvals.shape[-1]} computed")
+    occ = np.zeros_like(eigvals)
+    occ[..., :n_full] = degeneracy
+    homo = eigvals[..., :n_full].max() if n_full else eigvals.min()
+    lumo = eigvals[..., n_full:].min() if n_full < eigvals.shape[-1] else homo
+    return occ, 0.5 * (homo + lumo)
+
+
+def compute_occupations(eigvals, weights, nelec: float, smearing: str = "gaussian", degauss_ry: float | None = None, spin_polarized: bool = False, order: int = 1) -> OccupationResult:
+    """Occupations for ``OccupationsSection``-style settings; ``degauss_ry`` in Ry.
+
+    With ``spin_polarized`` the eigenvalues are packed ``(2, nk, nbands)`` and share one Fermi level.
+    """
+    eigvals = np.asarray(eigvals, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    degeneracy = 1.0 if spin_polarized else 2.0
+    if spin_polarized and (eigvals.ndim != 3 or eigvals.shape[0] != 2):
+        raise ValueError(f"spin-polarized eigenvalues must have shape (2, nk, nbands), got {eigvals.shape}")
+    if weights.shape != eigvals.shape[-2:-1]:
+        raise ValueError(f"weights shape {weights.shape} does not match {eigvals.shape[-2]} k-points")
+    capacity = degeneracy * eigvals.shape[-1] * (2 if spin_polarized else 1) * float(np.sum(weights))
+    if nelec > capacity + 1e-8:
+        raise ValueError(f"{nelec} electrons do not fit into {eigvals.shape[-1]} bands")
+    if smearing == "fixed":
+        occ, mu = fixed_occupations(eigvals, nelec, degeneracy)
+        return OccupationResult(occupations=occ, fermi_level=float(mu), entropy=0.0)
+    if smearing not in SMEARINGS:
+        raise ValueError(f"Unknown smearing: {smearing}")
+    if degauss_ry is None or degauss_ry <= 0.0:
+        raise ValueError(f"degauss required for smearing={smearing!r}, got {degauss_ry}")
+    sigma = float(degauss_ry) * RY_TO_HARTREE
+    occ, mu, ts = smeared_occupations(jnp.asarray(eigvals), jnp.asarray(weights), float(nelec), sigma, smearing=smearing, order=order, degeneracy=degeneracy)
+    return OccupationResult(occupations=np.asarray(occ), fermi_level=float(mu), entropy=float(ts))
+
+
+def occupations_from_section(section, eigvals, weights, nelec: float, spin_polarized: bool = False) -> OccupationResult:
+    """``compute_occupations`` with smearing, ``degauss`` and ``mp_order`` from an ``OccupationsSection``."""
+    return compute_occupations(
+        eigvals, weights, nelec, smearing=section.smearing, degauss_ry=section.degauss, spin_polarized=spin_polarized, order=section.mp_order
+    )
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import numpy as np
+import scipy.fft
 
 
 def density_from_orbitals(psi_r: np.ndarray, occupations: np.ndarray, k_weights: np.ndarray) -> np.ndarray:
@@ -18,5 +19,85 @@ def density_from_orbitals(psi_r: np.ndarray, occupations: np.ndarray, k_weights:
     if wk.shape[0] != psi.shape[0]:
         raise ValueError("k_weights length must match nk")
 
-    band_density = np.abs(psi) ** 2
-    return np.einsum("k,kn,kng->g", wk, occ, band_density, optimize=True).real
+    rho = np.zeros(psi.shape[2], dtype=float)
+    for ik in range(psi.shape[0]):
+        for ib in range(psi.shape[1]):
+            weight = wk[ik] * occ[ik, ib]
+            if weight != 0.0:
+                rho += weight * (psi[ik, ib].real ** 2 + psi[ik, ib].imag ** 2)
+    return rho
+
+
+class DensityAccumulator:
+    """Streaming ``rho(r) = Σ_k w_k Σ_n f_nk |ψ_nk(r)|²`` from G-space coefficients.
+
+    Bands are consumed one k-point at a time and transformed ``block_size`` at a time
+    into a reused ``(block_size, nx, ny, nz)`` buffer, so peak memory scales with the
+    block size rather than ``nk * nbands * ngrid``. Bands whose weighted occupation
+    ``w_k f_nk`` is below ``occ_threshold`` are skipped without an FFT.
+
+    Coefficients follow ``ψ(r) = Ω^{-1/2} Σ_G c_G e^{i(G+k)·r}``; the k phase drops out
+    of ``|ψ|²``.
+    """
+
+    def __init__(self, fft_shape: tuple[int, int, int], volume_bohr3: float, block_size: int = 16, occ_threshold: float = 1e-12, workers: int | None = None):
+        self.fft_shape = tuple(int(n) for n in fft_shape)
+        self.volume = float(volume_bohr3)
+        self.block_size = max(1, int(block_size))
+        self.occ_threshold = float(occ_threshold)
+        self.workers = workers
+        self.rho = np.zeros(self.fft_shape, dtype=float)
+        self.n_fft_bands = 0
+        self._buffer = np.empty((self.block_size, *self.fft_shape), dtype=complex)
+        self._tmp = np.empty(self.rho.size, dtype=float)
+
+    def add_kpoint(self, psi_g: np.ndarray, occupations: np.ndarray, k_weight: float, indices: np.ndarray) -> None:
+        """Accumulate one k-point; ``indices`` maps its basis into the FFT box (``fft_box_indices``)."""
+        psi = np.asarray(psi_g)
+        psi = psi[:, None] if psi.ndim == 1 else psi
+        weights = float(k_weight) * np.asarray(occupations, dtype=float).reshape(-1)
+        if weights.shape[0] != psi.shape[1]:
+            raise ValueError("occupations length must match the number of bands")
+
+        bands = np.flatnonzero(np.abs(weights) > self.occ_threshold)
+        flat_rho = self.rho.reshape(-1)
+        for start in range(0, bands.size, self.block_size):
+            sel = bands[start : start + self.block_size]
+            buf = self._buffer[: sel.size]
+            flat = buf.reshape(sel.size, -1)
+            flat.fill(0.0)
+            flat[:, indices] = psi[:, sel].T
+            box = scipy.fft.ifftn(buf, axes=(1, 2, 3), norm="forward", overwrite_x=True, workers=self.workers)
+            # |ψ|² goes through the preallocated ``_tmp``, so the band loop does not allocate.
+            for w, row in zip(weights[sel], box.reshape(sel.size, -1)):
+                np.abs(row, out=self._tmp)
+                self._tmp *= self._tmp
+                self._tmp *= w / self.volume
+                flat_rho += self._tmp
+            self.n_fft_bands += sel.size
+
+    def result(self) -> np.ndarray:
+        return self.rho
+
+
+def density_from_coefficients(
+    psi_g_per_k,
+    occupations: np.ndarray,
+    k_weights: np.ndarray,
+    indices_per_k,
+    fft_shape: tuple[int, int, int],
+    volume_bohr3: float,
+    block_size: int = 16,
+    occ_threshold: float = 1e-12,
+) -> np.ndarray:
+    """Real-space density on ``fft_shape`` from per-k G-space coefficient blocks.
+
+    ``psi_g_per_k`` may be any iterable (e.g. a generator reading k-points from disk),
+    so only one k-point's coefficients need to be resident at a time.
+    """
+    acc = DensityAccumulator(fft_shape, volume_bohr3, block_size=block_size, occ_threshold=occ_threshold)
+    occ = np.asarray(occupations, dtype=float)
+    wk = np.asarray(k_weights, dtype=float)
+    for ik, (psi_g, indices) in enumerate(zip(psi_g_per_k, indices_per_k)):
+        acc.add_kpoint(psi_g, occ[ik], wk[ik], indices)
+    return acc.result()
@@ -0,0 +1,78 @@
+"""Collinear spin densities.
+
+Spin-resolved quantities are packed along a leading axis of length ``nspin``:
+``(2, *grid)`` for ``(ρ↑, ρ↓)`` and ``(2, nk, nbands)`` for occupations. The same
+arrays can be viewed as total density and magnetization ``(ρ, m) = (ρ↑ + ρ↓, ρ↑ - ρ↓)``,
+which is the representation the mixer works in.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from jackal.density.rho import density_from_coefficients
+
+
+def nspin_of(system) -> int:
+    return 2 if getattr(system, "spin_polarized", False) else 1
+
+
+def pack_spin(rho_up: np.ndarray, rho_down: np.ndarray) -> np.ndarray:
+    up = np.asarray(rho_up, dtype=float)
+    down = np.asarray(rho_down, dtype=float)
+    if up.shape != down.shape:
+        raise ValueError(f"spin channels must have the same shape, got {up.shape} and {down.shape}")
+    return np.stack([up, down])
+
+
+def to_total_magnetization(rho_spin: np.ndarray) -> np.ndarray:
+    """``(ρ↑, ρ↓) -> (ρ, m)`` along the leading axis."""
+    up, down = rho_spin[0], rho_spin[1]
+    return np.stack([up + down, up - down])
+
+
+def from_total_magnetization(rho_tm: np.ndarray) -> np.ndarray:
+    """``(ρ, m) -> (ρ↑, ρ↓)`` along the leading axis."""
+    total, mag = rho_tm[0], rho_tm[1]
+    return np.stack([0.5 * (total + mag), 0.5 * (total - mag)])
+
+
+def initial_spin_density(rho: np.ndarray, magnetization: float, volume_bohr3: float | None = None) -> np.ndarray:
+    """Split a total density into ``(ρ↑, ρ↓)`` with uniform polarization ``m / N``.
+
+    ``N`` is ``Σ ρ`` times the grid volume element when ``volume_bohr3`` is given
+    (``rho`` in electrons/bohr^3), and the plain grid sum otherwise.
+    """
+    rho = np.asarray(rho, dtype=float)
+    dv = 1.0 if volume_bohr3 is None else float(volume_bohr3) / rho.size
+    total = float(np.sum(rho)) * dv
+    zeta = float(magnetization) / total if total != 0.0 else 0.0
+    if abs(zeta) > 1.0:
+        raise ValueError(f"magnetization {magnetization} exceeds the number of electrons {total}")
+    return np.stack([0.5 * (1.0 + zeta) * rho, 0.5 * (1.0 - zeta) * rho])
+
+
+def spin_density_from_coefficients(
+    psi_g_per_spin,
+    occupations: np.ndarray,
+    k_weights: np.ndarray,
+    indices_per_k,
+    fft_shape: tuple[int, int, int],
+    volume_bohr3: float,
+    block_size: int = 16,
+    occ_threshold: float = 1e-12,
+) -> np.ndarray:
+    """Packed ``(2, *fft_shape)`` density from per-spin, per-k coefficient blocks.
+
+    ``occupations`` has shape ``(2, nk, nbands)`` and already includes the spin
+    degeneracy (at most 1 per orbital).
+    """
+    occ = np.asarray(occupations, dtype=float)
+    if occ.ndim != 3 or occ.shape[0] != 2:
+        raise ValueError(f"spin occupations must have shape (2, nk, nbands), got {occ.shape}")
+    return np.stack(
+        [
+            density_from_coefficients(psi_g_per_k, occ[s], k_weights, indices_per_k, fft_shape, volume_bohr3, block_size, occ_threshold)
+            for s, psi_g_per_k in enumerate(psi_g_per_spin)
+        ]
+    )
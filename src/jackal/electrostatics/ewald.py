@@ -1,29 +1,289 @@
-"""Ion-ion electrostatics helpers."""
+"""Ion-ion electrostatics via Ewald summation.
+
+All quantities are in Hartree atomic units. With splitting parameter ``η``:
+
+- real space: ``½ Σ'_{ijL} q_i q_j erfc(η r)/r`` over a KD-tree neighbour list,
+- reciprocal space: ``2π/Ω Σ_{G≠0} e^{-G²/4η²}/G² |S(G)|²`` over the G-sphere,
+- self and neutralizing-background terms ``-η/√π Σ q² - π Q²/(2Ωη²)``.
+
+``ewald`` returns energy, forces and stress together in one NumPy pass;
+``ewald_energy_jax`` evaluates the same energy from a fixed ``EwaldSetup`` so it
+can be differentiated with respect to positions and cell without Python loops.
+``ewald_energy_dense_jax`` is the shape-stable variant for repeated use: a masked
+all-pairs sum over the 27 nearest cell images, jitted once per atom count. It
+needs ``O(n²)`` memory and, in thin or skewed cells, a large ``η`` (hence many
+G-vectors); ``prefers_dense_ewald`` says when it is the better choice.
+"""
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+from functools import lru_cache
+
+import jax
+import jax.numpy as jnp
 import numpy as np
+from jax.scipy.special import erfc as jerfc
+from scipy.spatial import cKDTree
+from scipy.special import erfc
 
+from jackal.core.compilation import bucket_size, jit_kernel, pad_axis
 from jackal.core.units import BOHR_TO_ANG
+from jackal.lattice.cell import cell_volume, reciprocal_cell
+from jackal.lattice.gvectors import gsphere
+
+
+@dataclass(frozen=True)
+class EwaldResult:
+    energy: float  # Hartree
+    forces: np.ndarray  # (natoms, 3) Hartree/bohr
+    stress: np.ndarray  # (3, 3) Hartree/bohr^3, (1/Ω) dE/dε
+
+
+@dataclass(frozen=True)
+class EwaldSetup:
+    """Splitting parameter, ordered real-space pairs ``(i, j, L)`` and reciprocal G-vectors."""
+
+    alpha: float
+    r_cut: float
+    g_cut: float
+    pair_i: np.ndarray  # (npairs,)
+    pair_j: np.ndarray  # (npairs,)
+    pair_shift: np.ndarray  # (npairs, 3) integer lattice translations L of atom j
+    gvecs_int: np.ndarray  # (nG, 3), G = 0 excluded
+
+
+def optimal_alpha(natoms: int, volume_bohr3: float) -> float:
+    """``η`` balancing real- and reciprocal-space work: ``√π (N/Ω²)^{1/6}``."""
+    return float(np.sqrt(np.pi) * (max(natoms, 1) / volume_bohr3**2) ** (1.0 / 6.0))
+
+
+def _neighbour_pairs(cell: np.ndarray, pos: np.ndarray, r_cut: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """All ordered ``(i, j, L)`` with ``0 < |τ_j + L·h - τ_i| <= r_cut``."""
+    frac = pos @ np.linalg.inv(cell)
+    wrap = np.floor(frac).astype(int)
+    inside = (frac - wrap) @ cell
+
+    vol = cell_volume(cell)
+    heights = vol / np.linalg.norm(np.cross(cell[[1, 2, 0]], cell[[2, 0, 1]]), axis=1)
+    nmax = np.ceil(r_cut / heights).astype(int) + 1
+    ranges = [np.arange(-n, n + 1) for n in nmax]
+    shifts = np.stack(np.meshgrid(*ranges, indexing="ij"), axis=-1).reshape(-1, 3)
+
+    images = (inside[None, :, :] + (shifts @ cell)[:, None, :]).reshape(-1, 3)
+    tree = cKDTree(images)
+    lists = tree.query_ball_point(inside, r_cut)
+    n = len(pos)
+    pair_i = np.repeat(np.arange(n), [len(lst) for lst in lists])
+    img = np.fromiter((k for lst in lists for k in lst), dtype=int, count=pair_i.size)
+    pair_j = img % n
+    shift = shifts[img // n] - wrap[pair_j] + wrap[pair_i]
+    keep = ~((pair_i == pair_j) & np.all(shift == 0, axis=1))
+    return pair_i[keep], pair_j[keep], shift[keep]
+
+
+def ewald_setup(cell_bohr: np.ndarray, positions_bohr: np.ndarray, alpha: float | None = None, tol: float = 1e-10, skin: float = 0.0) -> EwaldSetup:
+    """Neighbour list and G-vectors for relative accuracy ``tol``.
+
+    ``skin`` enlarges the real-space list so a JAX evaluation stays valid for small
+    displacements away from ``positions_bohr``.
+    """
+    cell = np.asarray(cell_bohr, dtype=float)
+    pos = np.asarray(positions_bohr, dtype=float)
+    if alpha is None:
+        alpha = optimal_alpha(len(pos), cell_volume(cell))
+    x = np.sqrt(-np.log(tol))
+    r_cut = x / alpha
+    g_cut = 2.0 * alpha * x
+    pair_i, pair_j, shift = _neighbour_pairs(cell, pos, r_cut + skin)
+    gint = gsphere(cell, g_cut**2).gvecs_int[1:]  # sorted by |G|: row 0 is G = 0
+    return EwaldSetup(alpha=float(alpha), r_cut=r_cut, g_cut=g_cut, pair_i=pair_i, pair_j=pair_j, pair_shift=shift, gvecs_int=gint)
+
+
+def ewald(cell_bohr: np.ndarray, positions_bohr: np.ndarray, charges: np.ndarray, setup: EwaldSetup | None = None) -> EwaldResult:
+    """Ewald energy, forces and stress of point charges in a periodic cell."""
+    cell = np.asarray(cell_bohr, dtype=float)
+    pos = np.asarray(positions_bohr, dtype=float)
+    q = np.asarray(charges, dtype=float)
+    if setup is None:
+        setup = ewald_setup(cell, pos)
+    eta = setup.alpha
+    vol = cell_volume(cell)
+    forces = np.zeros_like(pos)
+
+    # Real space.
+    d = pos[setup.pair_j] + setup.pair_shift @ cell - pos[setup.pair_i]
+    r = np.linalg.norm(d, axis=1)
+    qq = q[setup.pair_i] * q[setup.pair_j]
+    e_real = 0.5 * np.sum(qq * erfc(eta * r) / r)
+    # dφ/dr for φ = erfc(ηr)/r
+    dphi = -erfc(eta * r) / r**2 - 2.0 * eta / np.sqrt(np.pi) * np.exp(-(eta * r) ** 2) / r
+    fpair = (0.5 * qq * dphi / r)[:, None] * d  # dE/dτ_j of one ordered pair
+    np.add.at(forces, setup.pair_i, fpair)
+    np.add.at(forces, setup.pair_j, -fpair)
+    stress = 0.5 * np.einsum("p,pa,pb->ab", qq * dphi / r, d, d)
+
+    # Reciprocal space.
+    g = setup.gvecs_int @ reciprocal_cell(cell)
+    g2 = np.einsum("ij,ij->i", g, g)
+    phase = np.exp(1j * (g @ pos.T))  # (nG, natoms)
+    s = phase @ q
+    f = np.exp(-g2 / (4.0 * eta**2)) / g2
+    e_g = (2.0 * np.pi / vol) * f * np.abs(s) ** 2
+    e_recip = float(np.sum(e_g))
+    im = np.imag(phase * np.conj(s)[:, None])  # Im[e^{iGτ_i} S*(G)]
+    forces += (4.0 * np.pi / vol) * q[:, None] * np.einsum("g,gi,ga->ia", f, im, g)
+    stress += np.einsum("g,gab->ab", e_g, -np.eye(3)[None] + 2.0 * (g[:, :, None] * g[:, None, :]) * ((1.0 / g2 + 1.0 / (4.0 * eta**2))[:, None, None]))
+
+    # Self and neutralizing background.
+    e_self = -eta / np.sqrt(np.pi) * np.sum(q * q)
+    e_bg = -np.pi * np.sum(q) ** 2 / (2.0 * vol * eta**2)
+    stress += -e_bg * np.eye(3)
+
+    energy = float(e_real + e_recip + e_self + e_bg)
+    return EwaldResult(energy=energy, forces=forces, stress=stress / vol)
+
+
+def ewald_energy_jax(positions_bohr, cell_bohr, charges, setup: EwaldSetup):
+    """Traceable Ewald energy for a fixed neighbour list and G-vector set."""
+    eta = setup.alpha
+    vol = jnp.abs(jnp.linalg.det(cell_bohr))
+    q = jnp.asarray(charges, dtype=float)
+
+    d = positions_bohr[setup.pair_j] + jnp.asarray(setup.pair_shift, dtype=float) @ cell_bohr - positions_bohr[setup.pair_i]
+    r = jnp.sqrt(jnp.sum(d * d, axis=1))
+    e_real = 0.5 * jnp.sum(q[setup.pair_i] * q[setup.pair_j] * jerfc(eta * r) / r)
+
+    g = jnp.asarray(setup.gvecs_int, dtype=float) @ (2.0 * jnp.pi * jnp.linalg.inv(cell_bohr).T)
+    g2 = jnp.sum(g * g, axis=1)
+    arg = g @ positions_bohr.T
+    s_re = jnp.cos(arg) @ q
+    s_im = jnp.sin(arg) @ q
+    e_recip = (2.0 * jnp.pi / vol) * jnp.sum(jnp.exp(-g2 / (4.0 * eta**2)) / g2 * (s_re**2 + s_im**2))
+
+    e_self = -eta / jnp.sqrt(jnp.pi) * jnp.sum(q * q)
+    e_bg = -jnp.pi * jnp.sum(q) ** 2 / (2.0 * vol * eta**2)
+    return e_real + e_recip + e_self + e_bg
+
+
+@dataclass(frozen=True)
+class DenseEwaldSetup:
+    """Splitting parameter and G-vectors for ``ewald_energy_dense_jax``."""
+
+    alpha: float
+    gvecs_int: np.ndarray  # (nG, 3), G = 0 excluded
+
+
+@lru_cache(maxsize=32)
+def _dense_setup_cached(cell_key: tuple, natoms: int, tol: float) -> DenseEwaldSetup:
+    cell = np.asarray(cell_key, dtype=float).reshape(3, 3)
+    vol = cell_volume(cell)
+    heights = vol / np.linalg.norm(np.cross(cell[[1, 2, 0]], cell[[2, 0, 1]]), axis=1)
+    x = np.sqrt(-np.log(tol))
+    # Real-space terms must vanish beyond half the smallest cell height so that the
+    # minimum image plus its 26 neighbours covers the cutoff sphere.
+    alpha = max(optimal_alpha(natoms, vol), x / (0.5 * heights.min()))
+    gint = gsphere(cell, (2.0 * alpha * x) ** 2).gvecs_int[1:]
+    return DenseEwaldSetup(alpha=float(alpha), gvecs_int=gint)
+
+
+def dense_ewald_setup(cell_bohr: np.ndarray, natoms: int, tol: float = 1e-10) -> DenseEwaldSetup:
+    """Cached setup for a cell and atom count; independent of the atomic positions."""
+    cell_key = tuple(np.asarray(cell_bohr, dtype=float).ravel().round(12))
+    return _dense_setup_cached(cell_key, int(natoms), float(tol))
+
+
+DENSE_EWALD_MAX_ATOMS = 32
+
+
+def prefers_dense_ewald(cell_bohr: np.ndarray, natoms: int, max_atoms: int = DENSE_EWALD_MAX_ATOMS, min_aspect: float = 0.5) -> bool:
+    """Whether to use ``ewald_dense_kernel`` rather than the neighbour-list ``ewald_energy_jax``.
+
+    The dense path trades extra work for shape-stable, compile-once kernels, which
+    pays off only for small cells: its real-space sum is ``O(n²)`` per image, and
+    its ``η`` grows as ``1/h_min``, so the G-sum blows up in cells whose smallest
+    height is below ``min_aspect * Ω^{1/3}``.
+    """
+    if natoms > max_atoms:
+        return False
+    cell = np.asarray(cell_bohr, dtype=float)
+    vol = cell_volume(cell)
+    heights = vol / np.linalg.norm(np.cross(cell[[1, 2, 0]], cell[[2, 0, 1]]), axis=1)
+    return bool(heights.min() >= min_aspect * vol ** (1.0 / 3.0))
+
+
+_NEIGHBOUR_SHIFTS = np.stack(np.meshgrid(*(np.arange(-1, 2),) * 3, indexing="ij"), axis=-1).reshape(-1, 3).astype(float)
+
+
+@jit_kernel(name="ewald_dense")
+def ewald_dense_kernel(positions_bohr, cell_bohr, charges, alpha, gvecs_int, gweights):
+    """Ewald energy on already padded inputs from ``dense_ewald_inputs``."""
+    n = positions_bohr.shape[0]
+    vol = jnp.abs(jnp.linalg.det(cell_bohr))
+    recip = 2.0 * jnp.pi * jnp.linalg.inv(cell_bohr).T
+
+    # (n, n, 3) minimum-image displacements; the 27 neighbouring images are scanned
+    # one at a time so memory stays O(n²).
+    dfrac = (positions_bohr[None, :, :] - positions_bohr[:, None, :]) @ jnp.linalg.inv(cell_bohr)
+    dfrac = dfrac - jnp.round(dfrac)
+    qq = charges[:, None] * charges[None, :]
+    eye = jnp.eye(n, dtype=bool)
+
+    def image(acc, shift):
+        d = (dfrac + shift) @ cell_bohr
+        r2 = jnp.sum(d * d, axis=-1)
+        # Self terms, plus coincident zero-charge padding atoms.
+        skip = (jnp.all(shift == 0) & eye) | (r2 == 0.0)
+        r = jnp.sqrt(jnp.where(skip, 1.0, r2))
+        return acc + jnp.sum(jnp.where(skip, 0.0, qq * jerfc(alpha * r) / r)), None
+
+    e_real, _ = jax.lax.scan(image, jnp.zeros((), dtype=positions_bohr.dtype), jnp.asarray(_NEIGHBOUR_SHIFTS))
+    e_real = 0.5 * e_real
+
+    g = gvecs_int @ recip
+    g2 = jnp.sum(g * g, axis=1)
+    arg = g @ positions_bohr.T
+    s_re = jnp.cos(arg) @ charges
+    s_im = jnp.sin(arg) @ charges
+    e_recip = (2.0 * jnp.pi / vol) * jnp.sum(gweights * jnp.exp(-g2 / (4.0 * alpha**2)) / g2 * (s_re**2 + s_im**2))
+
+    e_self = -alpha / jnp.sqrt(jnp.pi) * jnp.sum(charges * charges)
+    e_bg = -jnp.pi * jnp.sum(charges) ** 2 / (2.0 * vol * alpha**2)
+    return e_real + e_recip + e_self + e_bg
+
+
+def dense_ewald_inputs(positions_bohr, charges, setup: DenseEwaldSetup, bucket: bool = True) -> tuple:
+    """``(positions, charges, alpha, gvecs, gweights)`` for ``ewald_dense_kernel``.
+
+    With ``bucket`` the atom and G-vector counts are padded up to ``bucket_size``
+    (zero-charge atoms, zero-weight G-vectors), so nearby system sizes share one
+    executable.
+    """
+    pos = positions_bohr if isinstance(positions_bohr, jax.Array) else jnp.asarray(positions_bohr, dtype=float)
+    q = jnp.asarray(charges, dtype=float)
+    gint = setup.gvecs_int.astype(float)
+    gw = np.ones(len(gint))
+    if bucket:
+        nat, ng = bucket_size(pos.shape[0]), bucket_size(len(gint), base=64)
+        pos, q = pad_axis(pos, nat), pad_axis(q, nat)
+        gint = np.concatenate([gint, np.repeat(gint[:1], ng - len(gint), axis=0)])
+        gw = pad_axis(gw, ng)
+    return pos, q, jnp.asarray(setup.alpha), jnp.asarray(gint), jnp.asarray(gw)
+
 
+def ewald_energy_dense_jax(positions_bohr, cell_bohr, charges, setup: DenseEwaldSetup, bucket: bool = True):
+    """Jitted Ewald energy with static shapes; recompiles only when the atom or G count changes.
 
-def _minimum_image(displacement_bohr: np.ndarray, cell_bohr: np.ndarray) -> np.ndarray:
-    frac = np.linalg.solve(cell_bohr.T, displacement_bohr)
-    frac -= np.round(frac)
-    return frac @ cell_bohr
+    See ``dense_ewald_inputs`` for ``bucket``. Differentiable in positions and cell;
+    the G-vector set is that of the cell the setup was built for, so derivatives
+    are exact at that cell.
+    """
+    pos, q, alpha, gint, gw = dense_ewald_inputs(positions_bohr, charges, setup, bucket)
+    return ewald_dense_kernel(pos, jnp.asarray(cell_bohr, dtype=float), q, alpha, gint, gw)
 
 
 def ion_ion_energy(system_cell_ang: np.ndarray, positions_ang: np.ndarray, numbers: np.ndarray) -> float:
-    """Compute pairwise ion-ion Coulomb energy in Hartree with minimum-image PBC."""
+    """Ewald ion-ion energy in Hartree for charges ``numbers`` (cell/positions in Å)."""
     cell_b = np.asarray(system_cell_ang, dtype=float) / BOHR_TO_ANG
     pos_b = np.asarray(positions_ang, dtype=float) / BOHR_TO_ANG
-    z = np.asarray(numbers, dtype=float)
-
-    energy = 0.0
-    n = len(z)
-    for i in range(n):
-        for j in range(i + 1, n):
-            dr = _minimum_image(pos_b[i] - pos_b[j], cell_b)
-            rij = max(np.linalg.norm(dr), 1e-12)
-            energy += z[i] * z[j] / rij
-    return float(energy)
+    return ewald(cell_b, pos_b, np.asarray(numbers, dtype=float)).energy
@@ -1,18 +1,111 @@
-"""Matrix-free Hamiltonian/overlap application helpers."""
+"""Matrix-free Hamiltonian/overlap application helpers.
+
+Coefficient arrays are either a single band ``(npw,)`` or a block of bands
+``(npw, nbands)``; diagonal terms broadcast along the band axis.
+"""
 
 from __future__ import annotations
 
+import threading
+from collections.abc import Callable
+
+import jax.numpy as jnp
 import numpy as np
+import scipy.fft
+
+from jackal.lattice.fft_grid import fft_box_indices
+
+
+class LocalPotentialOperator:
+    """Apply a real-space local potential to plane-wave coefficients via FFTs.
+
+    The G-sphere -> FFT box index map is computed once at construction. Each call
+    scatters a whole block of bands into a reused ``(nbands, nx, ny, nz)`` buffer,
+    transforms to real space, multiplies by ``v(r)``, transforms back and gathers
+    the sphere, i.e. ``O(N log N)`` per band with no per-call index work. The
+    transforms run in place in that buffer for contiguous complex128 blocks
+    (``overwrite_x``); scipy may still allocate otherwise.
+
+    The buffer is per thread, so one operator can be shared by the workers of
+    ``solvers.kpoint_batch.solve_kpoints_pool(executor="thread")``.
+    """
+
+    def __init__(self, gvecs_int: np.ndarray, fft_shape: tuple[int, int, int], v_local_r=None, workers: int | None = None):
+        self.fft_shape = tuple(int(n) for n in fft_shape)
+        self.indices = fft_box_indices(gvecs_int, self.fft_shape)
+        self.workers = workers
+        self._local = threading.local()
+        self.v_r: np.ndarray | None = None
+        if v_local_r is not None:
+            self.set_potential(v_local_r)
+
+    @property
+    def npw(self) -> int:
+        return int(self.indices.size)
+
+    def set_potential(self, v_local_r) -> None:
+        """Replace ``v(r)`` (e.g. every SCF step) without rebuilding the index maps."""
+        v = np.asarray(v_local_r, dtype=float)
+        if v.size != int(np.prod(self.fft_shape)):
+            raise ValueError(f"v_local_r has {v.size} points, expected FFT shape {self.fft_shape}")
+        self.v_r = v.reshape(self.fft_shape)
+
+    def _block_buffer(self, nbands: int) -> np.ndarray:
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.shape[0] < nbands:
+            buffer = self._local.buffer = np.empty((nbands, *self.fft_shape), dtype=complex)
+        return buffer[:nbands]
+
+    def __call__(self, psi) -> np.ndarray:
+        if self.v_r is None:
+            raise ValueError("LocalPotentialOperator has no potential; call set_potential first")
+        psi_arr = np.asarray(psi)
+        block = psi_arr[:, None] if psi_arr.ndim == 1 else psi_arr
+        nb = block.shape[1]
+
+        buf = self._block_buffer(nb)
+        flat = buf.reshape(nb, -1)
+        flat.fill(0.0)
+        flat[:, self.indices] = block.T
+        axes = (1, 2, 3)
+        box = scipy.fft.ifftn(buf, axes=axes, overwrite_x=True, workers=self.workers)
+        box *= self.v_r[None]
+        box = scipy.fft.fftn(box, axes=axes, overwrite_x=True, workers=self.workers)
+        out = box.reshape(nb, -1)[:, self.indices].T
+        return out[:, 0] if psi_arr.ndim == 1 else out
+
+
+def apply_local_potential_jax(psi, indices, fft_shape: tuple[int, int, int], v_local_r):
+    """Traceable counterpart of ``LocalPotentialOperator`` for ``(npw, nbands)`` blocks."""
+    nb = psi.shape[1]
+    n = int(np.prod(fft_shape))
+    box = jnp.zeros((nb, n), dtype=jnp.result_type(psi.dtype, jnp.complex64))
+    box = box.at[:, indices].set(psi.T).reshape(nb, *fft_shape)
+    box = jnp.fft.ifftn(box, axes=(1, 2, 3)) * jnp.reshape(v_local_r, fft_shape)[None]
+    box = jnp.fft.fftn(box, axes=(1, 2, 3)).reshape(nb, n)
+    return box[:, indices].T
+
+
+def _apply_diagonal(diag, psi_arr: np.ndarray) -> np.ndarray:
+    d = np.asarray(diag)
+    return d[:, None] * psi_arr if psi_arr.ndim == 2 and d.ndim == 1 else d * psi_arr
+
 
+def apply_h(psi, kinetic=None, v_local: Callable | None = None, nonlocal_op=None):
+    """Return ``H psi`` with ``kinetic`` the diagonal ``|G+k|^2/2`` and ``v_local`` an operator.
 
-def apply_h(psi, kinetic=None, v_local=None, nonlocal_op=None):
+    ``v_local`` acts on coefficients (typically a ``LocalPotentialOperator``); a bare
+    real-space array is rejected since it is not diagonal in the plane-wave basis.
+    """
     psi_arr = np.asarray(psi)
     out = np.zeros_like(psi_arr, dtype=np.result_type(psi_arr, complex))
 
     if kinetic is not None:
-        out = out + np.asarray(kinetic) * psi_arr
+        out = out + _apply_diagonal(kinetic, psi_arr)
     if v_local is not None:
-        out = out + np.asarray(v_local) * psi_arr
+        if not callable(v_local):
+            raise TypeError("v_local must be an operator on coefficients, e.g. LocalPotentialOperator")
+        out = out + np.asarray(v_local(psi_arr))
     if nonlocal_op is not None:
         out = out + np.asarray(nonlocal_op(psi_arr))
     return out
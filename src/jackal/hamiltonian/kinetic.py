@@ -17,3 +17,15 @@ def kinetic_energy(psi_g: np.ndarray, g2: np.ndarray) -> float:
     psi = np.asarray(psi_g)
     tpsi = apply_kinetic(psi, g2)
     return float(np.real(np.vdot(psi, tpsi)))
+
+
+def teter_preconditioner(t_diag, ekin):
+    """Teter-Payne-Allan preconditioner ``K(x)`` with ``x = T_G / E_kin``.
+
+    ``K`` tends to 1 for plane waves well below the band kinetic energy and decays
+    as ``1/x`` above it. Only arithmetic is used, so NumPy and JAX arrays both work;
+    arguments broadcast, and ``ekin`` must be strictly positive.
+    """
+    x = t_diag / ekin
+    num = 27.0 + x * (18.0 + x * (12.0 + 8.0 * x))
+    return num / (num + 16.0 * x**4)
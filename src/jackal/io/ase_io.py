@@ -6,11 +6,17 @@ from ase import Atoms
 from jackal.core.types import System
 
 
-def atoms_to_system(atoms: Atoms, charge: float = 0.0) -> System:
+def atoms_to_system(atoms: Atoms, charge: float = 0.0, spin_polarized: bool = False, starting_magnetization: float = 0.0) -> System:
+    magmoms = np.array(atoms.get_initial_magnetic_moments(), dtype=float) if spin_polarized else None
+    if magmoms is not None and magmoms.ndim != 1:
+        raise ValueError(f"only collinear magnetic moments are supported, got shape {magmoms.shape}")
     return System(
         cell=np.array(atoms.cell.array, dtype=float),
         positions=np.array(atoms.positions, dtype=float),
         numbers=np.array(atoms.numbers, dtype=int),
         pbc=tuple(bool(x) for x in atoms.pbc),
         charge=charge,
+        spin_polarized=spin_polarized,
+        starting_magnetization=starting_magnetization,
+        magnetic_moments=magmoms,
     )
@@ -4,21 +4,53 @@ The parser extracts a practical subset of data needed by the current codebase:
 - header metadata (`symbol`, `z_valence`, `pp_type`)
 - radial mesh and local potential tables
 - non-local projector tables (`beta` projectors and `D_ij` matrix)
-- augmentation matrices (`Q_ij`) when available (USPP/PAW)
+- augmentation matrices (`Q_ij`) and radial `Q_ij^L(r)` functions (USPP/PAW)
+- core-correction charge, atomic density, atomic pseudo-wavefunctions
+- PAW one-center data (AE/PS partial waves, AE core charge and local potential)
+
+Radial functions of one kind are stacked into zero-padded ``(n, mesh)`` arrays
+with per-row integer metadata arrays, and all indices are zero-based.
 
 All parsed structured payload is exposed via `PseudopotentialData.raw`.
+
+Files are streamed with lxml ``iterparse``: every element is reduced to its
+attributes and (for numeric blocks) a float array, then cleared, so large PAW
+meshes never sit in memory as an XML tree. Those parsed blocks are cached per
+process (keyed by path, mtime and size) and on disk as ``.npz`` (keyed by a hash
+of the file contents) under ``$JACKAL_CACHE_DIR/upf`` or ``~/.cache/jackal/upf``.
 """
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
-from xml.etree import ElementTree as ET
 
 import numpy as np
+from lxml import etree
 
 from jackal.core.types import PseudopotentialData
 
+# Free-text sections that are never numeric; their subtrees are skipped.
+_TEXT_SECTIONS = {"PP_INFO", "PP_INPUTFILE"}
+
+
+@dataclass(frozen=True)
+class UPFBlocks:
+    """Flat view of a UPF file: ``"PARENT/CHILD"`` paths to attributes and float arrays."""
+
+    attrs: dict[str, dict[str, str]]
+    arrays: dict[str, np.ndarray]
+    root_tag: str
+
+    def children(self, parent: str) -> list[str]:
+        """Direct child paths of ``parent`` in document order."""
+        prefix = parent + "/"
+        return [p for p in self.attrs if p.startswith(prefix) and "/" not in p[len(prefix) :]]
+
 
 def _parse_bool_flag(value: str | None) -> bool:
     if value is None:
@@ -27,93 +59,318 @@ def _parse_bool_flag(value: str | None) -> bool:
 
 
 def _parse_float_block(text: str | None) -> np.ndarray:
-    if text is None:
+    """Whitespace-separated floats; Fortran ``1.0D-3`` exponents are accepted."""
+    if not text:
         return np.array([], dtype=float)
-    values = np.fromstring(text, sep=" ", dtype=float)
-    return values if values.size else np.array([], dtype=float)
+    tokens = text.split()
+    try:
+        return np.array(tokens, dtype=float)
+    except ValueError:
+        return np.array([t.replace("D", "E").replace("d", "e") for t in tokens], dtype=float)
 
 
-def _find_child_text(elem: ET.Element, name: str) -> str | None:
-    child = elem.find(name)
-    if child is None:
-        return None
-    return child.text
+def read_upf_blocks(path: str | Path) -> UPFBlocks:
+    """Stream ``path`` with ``iterparse`` into a ``UPFBlocks``.
 
+    Malformed or truncated XML raises ``ValueError`` instead of being repaired, so a
+    damaged file is never written to the block cache.
+    """
+    attrs: dict[str, dict[str, str]] = {}
+    arrays: dict[str, np.ndarray] = {}
+    stack: list[str] = []
+    skip_depth = 0
+    root_tag = ""
+    events = etree.iterparse(str(path), events=("start", "end"), huge_tree=True, remove_comments=True)
+    try:
+        for event, elem in events:
+            tag = elem.tag if isinstance(elem.tag, str) else ""
+            if event == "start":
+                stack.append(tag)
+                if len(stack) == 1:
+                    root_tag = tag
+                elif skip_depth or tag in _TEXT_SECTIONS:
+                    skip_depth += 1
+                continue
+            path_key = "/".join(stack[1:])
+            if skip_depth:
+                skip_depth -= 1
+            elif path_key:
+                attrs[path_key] = dict(elem.attrib)
+                text = elem.text
+                if text and text.strip() and len(elem) == 0:
+                    try:
+                        arrays[path_key] = _parse_float_block(text)
+                    except ValueError:
+                        pass
+            stack.pop()
+            if len(stack) > 0:
+                elem.clear(keep_tail=False)
+    except etree.XMLSyntaxError as exc:
+        raise ValueError(f"Malformed UPF file {path}: {exc}") from exc
+    if not root_tag:
+        raise ValueError(f"Empty UPF file: {path}")
+    return UPFBlocks(attrs=attrs, arrays=arrays, root_tag=root_tag)
 
-def _parse_header(root: ET.Element, path: Path) -> tuple[str, float, str, dict[str, Any]]:
-    header = root.find("PP_HEADER")
+
+def _parse_header(blocks: UPFBlocks, path: Path) -> tuple[str, float, str, dict[str, Any]]:
+    header = blocks.attrs.get("PP_HEADER")
     if header is None:
         raise ValueError(f"No PP_HEADER in UPF file: {path}")
 
-    symbol = header.attrib.get("element", path.stem)
-    z_val = float(header.attrib.get("z_valence", "0.0"))
-    is_ultrasoft = _parse_bool_flag(header.attrib.get("is_ultrasoft"))
-    is_paw = _parse_bool_flag(header.attrib.get("is_paw"))
+    symbol = header.get("element", path.stem).strip()
+    z_val = float(header.get("z_valence", "0.0"))
+    is_ultrasoft = _parse_bool_flag(header.get("is_ultrasoft"))
+    is_paw = _parse_bool_flag(header.get("is_paw"))
     pp_type = "PAW" if is_paw else ("USPP" if is_ultrasoft else "NC")
 
     meta: dict[str, Any] = {
-        "mesh_size": int(header.attrib["mesh_size"]) if "mesh_size" in header.attrib else None,
-        "number_of_proj": int(header.attrib["number_of_proj"]) if "number_of_proj" in header.attrib else None,
-        "functional": header.attrib.get("functional"),
+        "mesh_size": int(header["mesh_size"]) if "mesh_size" in header else None,
+        "number_of_proj": int(header["number_of_proj"]) if "number_of_proj" in header else None,
+        "functional": header.get("functional"),
     }
     return symbol, z_val, pp_type, meta
 
 
-def _parse_mesh(root: ET.Element) -> dict[str, Any]:
-    mesh = root.find("PP_MESH")
-    if mesh is None:
+def _array(blocks: UPFBlocks, key: str) -> np.ndarray:
+    return blocks.arrays.get(key, np.array([], dtype=float))
+
+
+def _parse_mesh(blocks: UPFBlocks) -> dict[str, Any]:
+    if "PP_MESH" not in blocks.attrs:
         return {}
+    return {"r": _array(blocks, "PP_MESH/PP_R"), "rab": _array(blocks, "PP_MESH/PP_RAB")}
+
+
+def _stack(rows: list[np.ndarray], width: int | None = None) -> np.ndarray:
+    """Zero-padded ``(len(rows), width)`` array; ``width`` defaults to the longest row."""
+    width = max((r.size for r in rows), default=0) if width is None else width
+    out = np.zeros((len(rows), width))
+    for i, r in enumerate(rows):
+        n = min(r.size, width)
+        out[i, :n] = r[:n]
+    return out
+
+
+def _tag(path: str) -> str:
+    return path.rsplit("/", 1)[-1]
 
-    r = _parse_float_block(_find_child_text(mesh, "PP_R"))
-    rab = _parse_float_block(_find_child_text(mesh, "PP_RAB"))
-    return {"r": r, "rab": rab}
 
+def _int_attr(attrs: dict[str, str], name: str, default: int = 0) -> int:
+    value = attrs.get(name)
+    return int(value) if value is not None and value.strip() else default
 
-def _parse_nonlocal(root: ET.Element) -> dict[str, Any]:
-    nonlocal_node = root.find("PP_NONLOCAL")
-    if nonlocal_node is None:
+
+def _mesh_size(blocks: UPFBlocks) -> int | None:
+    r = blocks.arrays.get("PP_MESH/PP_R")
+    return r.size if r is not None else None
+
+
+def _parse_nonlocal(blocks: UPFBlocks) -> dict[str, Any]:
+    if "PP_NONLOCAL" not in blocks.attrs:
         return {}
 
-    beta_projectors: list[np.ndarray] = []
-    beta_l: list[int | None] = []
-    for child in nonlocal_node:
-        if not child.tag.startswith("PP_BETA"):
-            continue
-        beta_projectors.append(_parse_float_block(child.text))
-        l_attr = child.attrib.get("angular_momentum")
-        beta_l.append(int(l_attr) if l_attr is not None else None)
+    betas = [c for c in blocks.children("PP_NONLOCAL") if _tag(c).startswith("PP_BETA")]
+    beta_projectors = _stack([_array(blocks, c) for c in betas], _mesh_size(blocks))
+    beta_l = np.array([_int_attr(blocks.attrs[c], "angular_momentum") for c in betas], dtype=int)
+    cutoff_index = np.array([_int_attr(blocks.attrs[c], "cutoff_radius_index", beta_projectors.shape[1]) for c in betas], dtype=int)
 
-    dij_raw = _parse_float_block(_find_child_text(nonlocal_node, "PP_DIJ"))
-    nproj = len(beta_projectors)
+    nproj = len(betas)
+    dij_raw = _array(blocks, "PP_NONLOCAL/PP_DIJ")
     dij = dij_raw.reshape((nproj, nproj)) if nproj and dij_raw.size == nproj * nproj else dij_raw
 
-    qij_raw = _parse_float_block(_find_child_text(nonlocal_node, "PP_QIJ"))
+    # Legacy PP_QIJ directly under PP_NONLOCAL, otherwise the integrals PP_AUGMENTATION/PP_Q.
+    qij_raw = _array(blocks, "PP_NONLOCAL/PP_QIJ")
+    if not qij_raw.size:
+        qij_raw = _array(blocks, "PP_NONLOCAL/PP_AUGMENTATION/PP_Q")
     qij = qij_raw.reshape((nproj, nproj)) if nproj and qij_raw.size == nproj * nproj else qij_raw
 
     return {
         "beta_projectors": beta_projectors,
         "beta_angular_momentum": beta_l,
+        "cutoff_radius_index": cutoff_index,
         "dij": dij,
         "qij": qij,
     }
 
 
-def parse_upf(path: str | Path) -> PseudopotentialData:
-    path = Path(path)
-    tree = ET.parse(path)
-    root = tree.getroot()
+def _parse_augmentation(blocks: UPFBlocks, beta_l: np.ndarray) -> dict[str, Any]:
+    """``PP_AUGMENTATION`` as ``qfuncl`` ``(n, mesh)`` with ``qfuncl_index`` rows ``(i, j, L)``.
+
+    Without ``q_with_l`` each ``PP_QIJ.i.j`` is repeated for every ``L`` allowed by
+    ``|l_i - l_j| <= L <= l_i + l_j`` with ``L + l_i + l_j`` even.
+    """
+    node = "PP_NONLOCAL/PP_AUGMENTATION"
+    if node not in blocks.attrs:
+        return {}
+    attrs = blocks.attrs[node]
+    q_with_l = _parse_bool_flag(attrs.get("q_with_l"))
+    nproj = beta_l.size
+
+    rows: list[np.ndarray] = []
+    index: list[tuple[int, int, int]] = []
+    for child in blocks.children(node):
+        tag = _tag(child)
+        if not tag.startswith("PP_QIJ"):
+            continue
+        a = blocks.attrs[child]
+        parts = tag.split(".")[1:]
+        i = _int_attr(a, "first_index", int(parts[0]) if parts else 1) - 1
+        j = _int_attr(a, "second_index", int(parts[1]) if len(parts) > 1 else 1) - 1
+        f = _array(blocks, child)
+        if tag.startswith("PP_QIJL"):
+            ls = [_int_attr(a, "angular_momentum", int(parts[2]) if len(parts) > 2 else 0)]
+        elif q_with_l:
+            continue
+        else:
+            li, lj = int(beta_l[i]), int(beta_l[j])
+            ls = list(range(abs(li - lj), li + lj + 1, 2))
+        for big_l in ls:
+            rows.append(f)
+            index.append((min(i, j), max(i, j), big_l))
+
+    q = _array(blocks, f"{node}/PP_Q")
+    multipoles = _array(blocks, f"{node}/PP_MULTIPOLES")
+    if nproj and multipoles.size and multipoles.size % (nproj * nproj) == 0:
+        # Fortran order (i, j, L) on disk.
+        multipoles = multipoles.reshape(-1, nproj, nproj).transpose(2, 1, 0)
+    return {
+        "q_with_l": q_with_l,
+        "nqf": _int_attr(attrs, "nqf"),
+        "nqlc": _int_attr(attrs, "nqlc"),
+        "shape": attrs.get("shape"),
+        "q": q.reshape(nproj, nproj) if nproj and q.size == nproj * nproj else q,
+        "multipoles": multipoles,
+        "rinner": _array(blocks, f"{node}/PP_RINNER"),
+        "qfcoef": _array(blocks, f"{node}/PP_QFCOEF"),
+        "qfuncl": _stack(rows, _mesh_size(blocks)),
+        "qfuncl_index": np.array(index, dtype=int).reshape(-1, 3),
+    }
+
+
+def _parse_pswfc(blocks: UPFBlocks) -> dict[str, Any]:
+    if "PP_PSWFC" not in blocks.attrs:
+        return {}
+    chis = [c for c in blocks.children("PP_PSWFC") if _tag(c).startswith("PP_CHI")]
+    return {
+        "chi": _stack([_array(blocks, c) for c in chis], _mesh_size(blocks)),
+        "l": np.array([_int_attr(blocks.attrs[c], "l") for c in chis], dtype=int),
+        "occupation": np.array([float(blocks.attrs[c].get("occupation", 0.0)) for c in chis]),
+        "label": [blocks.attrs[c].get("label", "").strip() for c in chis],
+    }
+
 
-    symbol, z_val, pp_type, header_meta = _parse_header(root, path)
-    mesh = _parse_mesh(root)
-    nonlocal_data = _parse_nonlocal(root)
-    local_v = _parse_float_block(_find_child_text(root, "PP_LOCAL"))
+def _parse_paw(blocks: UPFBlocks) -> dict[str, Any]:
+    if "PP_PAW" not in blocks.attrs:
+        return {}
+    attrs = blocks.attrs["PP_PAW"]
+    width = _mesh_size(blocks)
+
+    def waves(prefix: str) -> np.ndarray:
+        return _stack([_array(blocks, c) for c in blocks.children("PP_FULL_WFC") if _tag(c).split(".")[0] == prefix], width)
 
+    return {
+        "core_energy": float(attrs.get("core_energy", 0.0)),
+        "data_format": _int_attr(attrs, "paw_data_format"),
+        "occupations": _array(blocks, "PP_PAW/PP_OCCUPATIONS"),
+        "ae_nlcc": _array(blocks, "PP_PAW/PP_AE_NLCC"),
+        "ae_vloc": _array(blocks, "PP_PAW/PP_AE_VLOC"),
+        "ae_wfc": waves("PP_AEWFC"),
+        "ps_wfc": waves("PP_PSWFC"),
+    }
+
+
+def build_pseudopotential(blocks: UPFBlocks, path: str | Path) -> PseudopotentialData:
+    """Assemble ``PseudopotentialData`` from parsed blocks."""
+    path = Path(path)
+    symbol, z_val, pp_type, header_meta = _parse_header(blocks, path)
+
+    nonlocal_data = _parse_nonlocal(blocks)
+    beta_l = nonlocal_data.get("beta_angular_momentum", np.zeros(0, dtype=int))
     raw: dict[str, Any] = {
         "path": str(path),
         "header": header_meta,
-        "mesh": mesh,
-        "local_potential": local_v,
+        "mesh": _parse_mesh(blocks),
+        "local_potential": _array(blocks, "PP_LOCAL"),
         "nonlocal": nonlocal_data,
+        "augmentation": _parse_augmentation(blocks, beta_l),
+        "nlcc": _array(blocks, "PP_NLCC"),
+        "rho_atom": _array(blocks, "PP_RHOATOM"),
+        "pswfc": _parse_pswfc(blocks),
+        "paw": _parse_paw(blocks),
     }
 
     return PseudopotentialData(symbol=symbol, pp_type=pp_type, z_valence=z_val, raw=raw)
+
+
+def upf_cache_dir() -> Path:
+    base = os.environ.get("JACKAL_CACHE_DIR")
+    root = Path(base) if base else Path.home() / ".cache" / "jackal"
+    return root / "upf"
+
+
+_CACHE_VERSION = 1
+_PROCESS_CACHE: dict[tuple, UPFBlocks] = {}
+
+
+def _save_blocks(blocks: UPFBlocks, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    meta = json.dumps({"version": _CACHE_VERSION, "root": blocks.root_tag, "attrs": list(blocks.attrs.items()), "arrays": list(blocks.arrays)})
+    payload = {f"a{i}": arr for i, arr in enumerate(blocks.arrays.values())}
+    tmp = target.with_name(target.stem + f".{os.getpid()}.tmp.npz")
+    np.savez(tmp, meta=np.array(meta), **payload)
+    tmp.replace(target)
+
+
+def _load_blocks(source: Path) -> UPFBlocks | None:
+    try:
+        with np.load(source, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != _CACHE_VERSION:
+                return None
+            arrays = {name: data[f"a{i}"] for i, name in enumerate(meta["arrays"])}
+    except (OSError, ValueError, KeyError):
+        return None
+    return UPFBlocks(attrs=dict((k, v) for k, v in meta["attrs"]), arrays=arrays, root_tag=meta["root"])
+
+
+def _cached_blocks(path: Path, disk_cache: bool) -> UPFBlocks:
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    blocks = _PROCESS_CACHE.get(key)
+    if blocks is not None:
+        return blocks
+
+    target = None
+    if disk_cache:
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()[:32]
+        target = upf_cache_dir() / f"{digest}.npz"
+        if target.is_file():
+            blocks = _load_blocks(target)
+    if blocks is None:
+        blocks = read_upf_blocks(path)
+        if target is not None:
+            try:
+                _save_blocks(blocks, target)
+            except OSError:
+                pass
+    for arr in blocks.arrays.values():
+        arr.setflags(write=False)
+    _PROCESS_CACHE[key] = blocks
+    return blocks
+
+
+def clear_upf_cache() -> None:
+    """Drop the in-process cache (the on-disk ``.npz`` files are kept)."""
+    _PROCESS_CACHE.clear()
+
+
+def parse_upf(path: str | Path, cache: bool = True, disk_cache: bool = True) -> PseudopotentialData:
+    """Parse a UPF v2 file, reusing cached blocks when the file is unchanged.
+
+    Cached arrays are shared and read-only.
+    """
+    path = Path(path)
+    if not path.is_file():
+        raise FileNotFoundError(path)
+    blocks = _cached_blocks(path, disk_cache) if cache else read_upf_blocks(path)
+    return build_pseudopotential(blocks, path)
@@ -20,24 +20,37 @@ class KPointsSection(BaseModel):
     mode: Literal["gamma", "monkhorst-pack", "explicit"] = "gamma"
     grid: tuple[int, int, int] | None = None
     shift: tuple[float, float, float] | None = None
+    use_symmetry: bool = True
+    time_reversal: bool = True  # no spin-orbit coupling
+    symprec: float = 1e-5  # Å
 
 
 class XCSection(BaseModel):
     functional: Literal["lda", "pbe", "hf"] = "pbe"
+    rho_cut: float = 1e-10
 
 
 class OccupationsSection(BaseModel):
-    smearing: Literal["fixed", "fermi-dirac", "gaussian"] = "fixed"
-    degauss: float | None = None
+    smearing: Literal["fixed", "fermi-dirac", "gaussian", "methfessel-paxton", "marzari-vanderbilt"] = "fixed"
+    degauss: float | None = None  # Ry
+    mp_order: int = 1
+
+    @model_validator(mode="after")
+    def _validate_degauss(self):
+        if self.smearing != "fixed" and (self.degauss is None or self.degauss <= 0.0):
+            raise ValueError(f"degauss required for smearing={self.smearing!r}")
+        return self
 
 
 class SCFSection(BaseModel):
     max_iter: int = 60
     etol: float = 1e-8
     rhotol: float = 1e-6
+    mixer: Literal["linear", "diis", "anderson", "broyden"] = "diis"
     mixing_beta: float = 0.4
     mixing_ndim: int = 8
     kerker_q0: float = 1.0
+    mixing_reset_factor: float = 5.0
 
 
 class DiagSection(BaseModel):
@@ -46,6 +59,9 @@ class DiagSection(BaseModel):
     block_size: int = 4
     max_subspace: int = 40
     residual_tol: float = 1e-8
+    max_iter: int = 100
+    kpoint_parallel: Literal["vmap", "thread", "process", "serial"] = "thread"
+    kpoint_workers: int | None = None
 
 
 class AutodiffSection(BaseModel):
@@ -57,10 +73,17 @@ class RuntimeSection(BaseModel):
     precision: Literal["float64", "float32"] = "float64"
     device: Literal["cpu", "gpu"] = "cpu"
     jit: bool = True
+    # Persistent XLA cache directory; "default" uses $JACKAL_CACHE_DIR/xla (~/.cache/jackal/xla).
+    compilation_cache_dir: str | None = None
+    min_compile_time_secs: float = 0.0
+    shape_buckets: bool = True
 
 
 class SystemSection(BaseModel):
     charge: float = 0.0
+    spin_polarized: bool = False
+    # Initial total magnetization (Bohr magnetons) for collinear spin runs.
+    starting_magnetization: float = 0.0
 
 
 class InputParams(BaseModel):
@@ -13,5 +13,9 @@ def cell_volume(cell: np.ndarray) -> float:
 
 
 def strain_cell(cell: np.ndarray, eta: np.ndarray) -> np.ndarray:
-    """Apply small finite strain parameterization h' = (I + eta) h."""
-    return (np.eye(3) + eta) @ cell
+    """Cartesian strain of the lattice vectors (rows of ``cell``): ``a_i -> (I + eta) a_i``.
+
+    In matrix form ``h' = h (I + eta)^T``; the convention of ``autodiff.stress`` and
+    ``autodiff.fused``.
+    """
+    return cell @ (np.eye(3) + eta).T
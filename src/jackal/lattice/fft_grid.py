@@ -1,12 +1,150 @@
+"""FFT grid dimensions and G-vector -> FFT box mappings.
+
+Grid sizes are the smallest even 2,3,5,7-smooth integers that satisfy the aliasing
+condition for a G-sphere, optionally re-ranked with a small on-disk table of
+benchmarked 1D FFT timings for the local backend (see ``benchmark_fft_sizes``).
+USPP/PAW runs use two grids: a "smooth" one for wavefunction products
+(``4 * ecutwfc``) and a "dense" one for the augmented density (``ecutrho``).
+"""
+
 from __future__ import annotations
 
-import math
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import scipy.fft
+
+from jackal.lattice.cell import reciprocal_cell
+
+SMOOTH_PRIMES = (2, 3, 5, 7)
+
+
+def _strip_factors(n: int, primes: tuple[int, ...]) -> int:
+    for p in primes:
+        while n % p == 0:
+            n //= p
+    return n
+
+
+def is_fft_friendly(n: int, primes: tuple[int, ...] = SMOOTH_PRIMES) -> bool:
+    """True for even ``n`` with no prime factor outside ``primes``."""
+    return n > 0 and n % 2 == 0 and _strip_factors(n, primes) == 1
+
+
+def next_fft_size(n: int, primes: tuple[int, ...] = SMOOTH_PRIMES) -> int:
+    n = max(int(n), 2)
+    while not is_fft_friendly(n, primes):
+        n += 1
+    return n
+
+
+def default_fft_table_path() -> Path:
+    base = os.environ.get("JACKAL_CACHE_DIR")
+    root = Path(base) if base else Path.home() / ".cache" / "jackal"
+    return root / "fft_sizes.json"
+
+
+def load_fft_table(path: str | Path | None = None) -> dict[int, float]:
+    """Benchmarked cost per point of a length-``n`` FFT, ``{}`` if no table exists."""
+    path = Path(path) if path is not None else default_fft_table_path()
+    if not path.is_file():
+        return {}
+    with path.open("r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    return {int(n): float(t) for n, t in data.get("cost_per_point", {}).items()}
+
+
+def benchmark_fft_sizes(max_n: int = 192, path: str | Path | None = None, batch: int = 256, repeats: int = 3) -> dict[int, float]:
+    """Time batched 1D complex FFTs for every FFT-friendly size up to ``max_n`` and store them."""
+    rng = np.random.default_rng(0)
+    table: dict[int, float] = {}
+    for n in range(2, max_n + 1):
+        if not is_fft_friendly(n):
+            continue
+        x = rng.standard_normal((batch, n)) + 1j * rng.standard_normal((batch, n))
+        best = np.inf
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            scipy.fft.fft(x, axis=-1)
+            best = min(best, time.perf_counter() - t0)
+        table[n] = best / (batch * n)
+
+    path = Path(path) if path is not None else default_fft_table_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as fh:
+        json.dump({"backend": "scipy.fft", "cost_per_point": {str(n): t for n, t in table.items()}}, fh, indent=1)
+    return table
+
+
+def _pick_size(n_min: int, table: dict[int, float] | None, slack: float) -> int:
+    n0 = next_fft_size(n_min)
+    if not table:
+        return n0
+    candidates = [n0]
+    n = n0 + 1
+    while n <= slack * n0:
+        if is_fft_friendly(n):
+            candidates.append(n)
+        n += 1
+    timed = [n for n in candidates if n in table]
+    if n0 not in table or not timed:
+        return n0
+    # Along one axis, total cost scales with n times the per-point cost of a length-n FFT.
+    return min(timed, key=lambda n: n * table[n])
+
+
+def choose_fft_shape(base: tuple[int, int, int], table: dict[int, float] | None = None, slack: float = 1.2) -> tuple[int, int, int]:
+    """Smallest even 2,3,5,7-smooth size >= each entry of ``base``.
+
+    With a benchmark ``table``, a slightly larger size (up to ``slack`` times) is used
+    when it was measured to be faster.
+    """
+    return tuple(_pick_size(int(x), table, slack) for x in base)
+
+
+def minimum_fft_dims(cell_bohr: np.ndarray, ecut_ry: float) -> tuple[int, int, int]:
+    """Smallest box holding the ``ecut_ry`` sphere: ``n_i >= 2 m_i + 1``, ``m_i = |G|max |a_i| / 2π``."""
+    lengths = np.linalg.norm(np.asarray(cell_bohr, dtype=float), axis=1)
+    m = np.floor(np.sqrt(max(ecut_ry, 0.0)) * lengths / (2.0 * np.pi)).astype(int)
+    return tuple(int(2 * mi + 1) for mi in m)
+
+
+@dataclass(frozen=True)
+class FFTGrids:
+    smooth: tuple[int, int, int]  # wavefunction products, 4 * ecutwfc
+    dense: tuple[int, int, int]  # density / potentials, ecutrho
+
+    @property
+    def dual(self) -> bool:
+        return self.smooth != self.dense
+
+
+def choose_fft_grids(cell_bohr: np.ndarray, ecutwfc_ry: float, ecutrho_ry: float, table: dict[int, float] | None = None) -> FFTGrids:
+    """Smooth and dense FFT grids; identical when ``ecutrho == 4 * ecutwfc`` (NC)."""
+    if table is None:
+        table = load_fft_table()
+    smooth = choose_fft_shape(minimum_fft_dims(cell_bohr, 4.0 * ecutwfc_ry), table)
+    dense = choose_fft_shape(minimum_fft_dims(cell_bohr, max(ecutrho_ry, 4.0 * ecutwfc_ry)), table)
+    return FFTGrids(smooth=smooth, dense=dense)
 
 
-def _next_even(n: int) -> int:
-    return n if n % 2 == 0 else n + 1
+def fft_box_indices(gvecs_int: np.ndarray, fft_shape: tuple[int, int, int]) -> np.ndarray:
+    """Flat (C-order) indices of integer G-vectors in an FFT box, negative G wrapped."""
+    g = np.asarray(gvecs_int, dtype=int)
+    shape = tuple(int(n) for n in fft_shape)
+    n = np.array(shape)
+    if np.any(g < -(n // 2)) or np.any(g > (n - 1) // 2):
+        raise ValueError(f"G-vectors do not fit in FFT box {shape}")
+    wrapped = np.mod(g, n[None, :])
+    return np.ravel_multi_index(tuple(wrapped.T), shape)
 
 
-def choose_fft_shape(base: tuple[int, int, int]) -> tuple[int, int, int]:
-    """Scaffold heuristic: round each dimension to next even integer."""
-    return tuple(_next_even(int(x)) for x in base)
+def fft_grid_gvectors(cell_bohr: np.ndarray, fft_shape: tuple[int, int, int]) -> np.ndarray:
+    """Cartesian G-vectors (bohr^-1) of every FFT box point, shape ``(*fft_shape, 3)``."""
+    m = [np.fft.fftfreq(n, d=1.0 / n) for n in fft_shape]
+    mi = np.stack(np.meshgrid(*m, indexing="ij"), axis=-1)
+    return mi @ reciprocal_cell(np.asarray(cell_bohr, dtype=float))
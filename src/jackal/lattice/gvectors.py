@@ -1,26 +1,146 @@
+"""Reciprocal-space G-sphere and per-k plane-wave bases.
+
+Cutoffs are in Ry and cells in bohr, so ``|G|^2`` (bohr^-2) is directly comparable
+to ``ecut_ry``. The density sphere for ``ecutrho`` is built once per cell and sorted
+by shell; each k-point basis for ``ecutwfc`` is an index array into a prefix of it.
+Both are cached, so relaxations at fixed cell and repeated k-points reuse them.
+"""
+
 from __future__ import annotations
 
+from dataclasses import dataclass
+from functools import lru_cache
+
 import numpy as np
 
+from jackal.lattice.cell import reciprocal_cell
+
 
 def estimate_gmax_from_ecut(ecut_ry: float) -> float:
-    """Crude internal helper for scaffold only.
+    """``|G|_max`` in bohr^-1 for a cutoff in Ry.
 
     In atomic units, kinetic energy T = |G+k|^2 / 2 (Hartree). Input cutoff is in Ry.
     Since 1 Ry = 0.5 Ha, ecut_Ha = ecut_ry / 2.
-    Then |G|_max ~ sqrt(2 * ecut_Ha) = sqrt(ecut_ry).
+    Then |G|_max = sqrt(2 * ecut_Ha) = sqrt(ecut_ry).
     """
     return float(np.sqrt(max(ecut_ry, 0.0)))
 
 
-def generate_gvectors(cell: np.ndarray, ecutwfc_ry: float, margin: int = 1) -> np.ndarray:
-    """Return a simple integer G-grid superset (scaffold implementation).
+@dataclass(frozen=True)
+class GSphere:
+    """All G with ``|G|^2 <= ecut_ry``, sorted by shell."""
 
-    Real implementation should generate reciprocal shells using the reciprocal metric
-    and produce per-k basis masks.
-    """
-    gmax = estimate_gmax_from_ecut(ecutwfc_ry)
-    n = int(np.ceil(gmax)) + margin
-    ii = np.arange(-n, n + 1)
-    g = np.stack(np.meshgrid(ii, ii, ii, indexing="ij"), axis=-1).reshape(-1, 3)
-    return g.astype(int)
+    ecut_ry: float
+    cell_bohr: np.ndarray
+    gvecs_int: np.ndarray  # (ng, 3) Miller indices
+    g_cart: np.ndarray  # (ng, 3) bohr^-1
+    g2: np.ndarray  # (ng,)
+    shell_index: np.ndarray  # (ng,) shell id of every G
+    shell_g2: np.ndarray  # (nshell,) |G|^2 of every shell
+
+    def __len__(self) -> int:
+        return int(self.g2.size)
+
+
+@dataclass(frozen=True)
+class KBasis:
+    """Wavefunction basis ``|G+k|^2 <= ecutwfc`` as indices into a ``GSphere``."""
+
+    sphere: GSphere
+    k_frac: np.ndarray
+    k_cart: np.ndarray
+    ecutwfc_ry: float
+    index: np.ndarray  # (npw,) rows of sphere arrays
+    gk2: np.ndarray  # (npw,) |G+k|^2
+
+    @property
+    def npw(self) -> int:
+        return int(self.index.size)
+
+    @property
+    def gvecs_int(self) -> np.ndarray:
+        return self.sphere.gvecs_int[self.index]
+
+    @property
+    def gk_cart(self) -> np.ndarray:
+        return self.sphere.g_cart[self.index] + self.k_cart[None, :]
+
+    def mask(self) -> np.ndarray:
+        """Boolean mask over the full sphere selecting this basis."""
+        out = np.zeros(len(self.sphere), dtype=bool)
+        out[self.index] = True
+        return out
+
+
+def _cell_key(cell_bohr: np.ndarray) -> tuple[float, ...]:
+    return tuple(np.asarray(cell_bohr, dtype=float).ravel().round(12).tolist())
+
+
+def _readonly(*arrays: np.ndarray) -> None:
+    for arr in arrays:
+        arr.flags.writeable = False
+
+
+@lru_cache(maxsize=16)
+def _gsphere_cached(cell_key: tuple[float, ...], ecut_ry: float) -> GSphere:
+    cell = np.asarray(cell_key, dtype=float).reshape(3, 3)
+    bvec = reciprocal_cell(cell)
+    gmax = estimate_gmax_from_ecut(ecut_ry)
+    # G . a_i = 2π m_i  =>  |m_i| <= |G| |a_i| / 2π
+    nmax = np.floor(gmax * np.linalg.norm(cell, axis=1) / (2.0 * np.pi)).astype(int)
+    axes = [np.arange(-n, n + 1) for n in nmax]
+    m = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+    g_cart = m @ bvec
+    g2 = np.einsum("ij,ij->i", g_cart, g_cart)
+    keep = g2 <= ecut_ry * (1.0 + 1e-12)
+    m, g_cart, g2 = m[keep], g_cart[keep], g2[keep]
+
+    g2_round = g2.round(10)
+    order = np.lexsort((m[:, 2], m[:, 1], m[:, 0], g2_round))
+    m, g_cart, g2, g2_round = m[order], g_cart[order], g2[order], g2_round[order]
+    shell_g2, shell_index = np.unique(g2_round, return_inverse=True)
+
+    _readonly(cell, m, g_cart, g2, shell_index, shell_g2)
+    return GSphere(
+        ecut_ry=float(ecut_ry),
+        cell_bohr=cell,
+        gvecs_int=m,
+        g_cart=g_cart,
+        g2=g2,
+        shell_index=shell_index,
+        shell_g2=shell_g2,
+    )
+
+
+def gsphere(cell_bohr: np.ndarray, ecut_ry: float) -> GSphere:
+    """Cached G-sphere for ``ecut_ry`` (normally ``ecutrho``)."""
+    return _gsphere_cached(_cell_key(cell_bohr), float(ecut_ry))
+
+
+@lru_cache(maxsize=256)
+def _kbasis_cached(cell_key: tuple[float, ...], ecutrho_ry: float, k_key: tuple[float, ...], ecutwfc_ry: float) -> KBasis:
+    sphere = _gsphere_cached(cell_key, ecutrho_ry)
+    k_frac = np.asarray(k_key, dtype=float)
+    k_cart = k_frac @ reciprocal_cell(sphere.cell_bohr)
+    # |G+k| <= gmax  =>  |G| <= gmax + |k|: a prefix of the shell-sorted sphere.
+    bound = (estimate_gmax_from_ecut(ecutwfc_ry) + np.linalg.norm(k_cart)) ** 2
+    if bound > ecutrho_ry * (1.0 + 1e-12):
+        raise ValueError("ecutrho sphere too small for ecutwfc at this k-point")
+    nprefix = int(np.searchsorted(sphere.g2, bound * (1.0 + 1e-12), side="right"))
+    gk = sphere.g_cart[:nprefix] + k_cart[None, :]
+    gk2 = np.einsum("ij,ij->i", gk, gk)
+    index = np.flatnonzero(gk2 <= ecutwfc_ry * (1.0 + 1e-12))
+    gk2 = gk2[index]
+    _readonly(k_frac, k_cart, index, gk2)
+    return KBasis(sphere=sphere, k_frac=k_frac, k_cart=k_cart, ecutwfc_ry=float(ecutwfc_ry), index=index, gk2=gk2)
+
+
+def kpoint_basis(cell_bohr: np.ndarray, ecutrho_ry: float, k_frac, ecutwfc_ry: float) -> KBasis:
+    """Cached wavefunction basis at fractional ``k_frac`` (reciprocal-lattice units)."""
+    k_key = tuple(np.asarray(k_frac, dtype=float).ravel().round(12).tolist())
+    return _kbasis_cached(_cell_key(cell_bohr), float(ecutrho_ry), k_key, float(ecutwfc_ry))
+
+
+def generate_gvectors(cell: np.ndarray, ecutwfc_ry: float) -> np.ndarray:
+    """Integer G-vectors with ``|G|^2 <= ecutwfc_ry`` for a cell in bohr, sorted by shell."""
+    return gsphere(cell, ecutwfc_ry).gvecs_int
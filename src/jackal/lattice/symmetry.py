@@ -0,0 +1,203 @@
+"""Space-group detection, irreducible k-points and symmetrization.
+
+Operations act on fractional coordinates as ``x' = W x + t``, where ``W`` is an
+integer matrix and ``t`` a fractional translation. ``cell`` holds lattice vectors
+as rows ``A``, so the Cartesian rotation is ``R = A^T W A^{-T}``. Fractional
+reciprocal coordinates transform with ``W^{-T}``.
+
+The lattice point group is found by brute force over integer matrices with
+entries in ``{-1, 0, 1}`` that preserve the metric ``A A^T``. This is complete
+for reasonably reduced cells, like those from standard structure files. Each
+candidate is then kept, with every translation that maps the crystal onto
+itself within ``symprec`` (Cartesian, same units as ``cell``).
+
+A calculation on the irreducible k-points followed by ``symmetrize_density``,
+``symmetrize_forces`` and ``symmetrize_stress`` reproduces the full-mesh result.
+This holds when the same ``SpaceGroup`` (``IrreducibleKPoints.symmetry``) is used
+for both steps.
+"""
+
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+
+from jackal.core.types import KPointGrid
+from jackal.lattice.kpoints import monkhorst_pack
+
+
+@dataclass(frozen=True)
+class SpaceGroup:
+    rotations: np.ndarray  # (nops, 3, 3) int, fractional
+    translations: np.ndarray  # (nops, 3) fractional, in [0, 1)
+    atom_map: np.ndarray  # (nops, natoms): atom a is mapped onto atom_map[op, a]
+    cell: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rotations)
+
+    @property
+    def cartesian_rotations(self) -> np.ndarray:
+        a = np.asarray(self.cell, dtype=float)
+        return np.einsum("ji,njk,kl->nil", a, self.rotations, np.linalg.inv(a).T)
+
+    def subgroup(self, keep: np.ndarray) -> SpaceGroup:
+        keep = np.asarray(keep)
+        return SpaceGroup(self.rotations[keep], self.translations[keep], self.atom_map[keep], self.cell)
+
+    def compatible_with_grid(self, fft_shape: tuple[int, int, int], tol: float = 1e-6) -> SpaceGroup:
+        """Operations that map the real-space FFT grid onto itself (needed by ``symmetrize_density``)."""
+        n = np.asarray(fft_shape, dtype=float)
+        # W maps grid index i/n to (W (i/n)) n, integral for every i iff W_ab n_a / n_b is integral.
+        scaled = self.rotations * n[None, :, None] / n[None, None, :]
+        ok = np.all(np.abs(scaled - np.round(scaled)) < tol, axis=(1, 2))
+        tn = self.translations * n[None, :]
+        ok &= np.all(np.abs(tn - np.round(tn)) < tol, axis=1)
+        return self.subgroup(ok)
+
+
+def _lattice_point_group(cell: np.ndarray, symprec: float) -> np.ndarray:
+    metric = cell @ cell.T
+    cands = np.array(list(itertools.product((-1, 0, 1), repeat=9)), dtype=int).reshape(-1, 3, 3)
+    cands = cands[np.abs(np.round(np.linalg.det(cands))) == 1]
+    transformed = np.einsum("nji,jk,nkl->nil", cands, metric, cands)
+    # |Δ(a_i·a_j)| <~ 2 |a| δ for a displacement δ of the lattice points.
+    tol = 2.0 * symprec * np.sqrt(np.max(np.diag(metric)))
+    return cands[np.all(np.abs(transformed - metric) < tol, axis=(1, 2))]
+
+
+def _wrap(x: np.ndarray) -> np.ndarray:
+    return x - np.round(x)
+
+
+def find_space_group(cell, positions, numbers, symprec: float = 1e-5, magmoms=None) -> SpaceGroup:
+    """Space group of the periodic crystal (Cartesian ``positions``, same units as ``cell``).
+
+    With collinear ``magmoms`` (one per atom), atoms of one element but different
+    moments count as distinct species, so operations that swap them are dropped.
+    """
+    cell = np.asarray(cell, dtype=float)
+    numbers = np.asarray(numbers)
+    if magmoms is not None:
+        moments = np.round(np.asarray(magmoms, dtype=float), 6)
+        _, numbers = np.unique(np.stack([numbers, moments], axis=1), axis=0, return_inverse=True)
+        numbers = numbers.reshape(-1)
+    frac = np.asarray(positions, dtype=float) @ np.linalg.inv(cell)
+    frac -= np.floor(frac)
+    species, counts = np.unique(numbers, return_counts=True)
+    ref_species = species[np.argmin(counts)]
+    ref = np.flatnonzero(numbers == ref_species)
+    same = numbers[:, None] == numbers[None, :]
+
+    rotations, translations, maps = [], [], []
+    for w in _lattice_point_group(cell, symprec):
+        rotated = frac @ w.T
+        for j in ref:
+            t = frac[j] - rotated[ref[0]]
+            t -= np.floor(t)
+            diff = _wrap(rotated[:, None, :] + t - frac[None, :, :])  # (a, b, 3)
+            dist = np.linalg.norm(diff @ cell, axis=-1)
+            dist = np.where(same, dist, np.inf)
+            target = np.argmin(dist, axis=1)
+            if np.all(dist[np.arange(len(frac)), target] < symprec) and len(set(target.tolist())) == len(frac):
+                if any(np.array_equal(w, r) and np.allclose(_wrap(t - s), 0.0, atol=symprec) for r, s in zip(rotations, translations)):
+                    continue
+                rotations.append(w)
+                translations.append(np.where(np.abs(_wrap(t)) < symprec, 0.0, t))
+                maps.append(target)
+    order = sorted(range(len(rotations)), key=lambda i: (not np.array_equal(rotations[i], np.eye(3, dtype=int)), i))
+    return SpaceGroup(
+        rotations=np.array([rotations[i] for i in order], dtype=int),
+        translations=np.array([translations[i] for i in order], dtype=float),
+        atom_map=np.array([maps[i] for i in order], dtype=int),
+        cell=cell,
+    )
+
+
+def space_group_of(system, symprec: float = 1e-5) -> SpaceGroup:
+    """``find_space_group`` for a ``core.types.System``, magnetic moments included when spin-polarized."""
+    magmoms = system.magnetic_moments if system.spin_polarized else None
+    return find_space_group(system.cell, system.positions, system.numbers, symprec=symprec, magmoms=magmoms)
+
+
+@dataclass(frozen=True)
+class IrreducibleKPoints:
+    kpoints: KPointGrid
+    full_to_irreducible: np.ndarray  # (nk_full,) index of each mesh point's representative
+    symmetry: SpaceGroup  # operations compatible with the mesh; use these to symmetrize
+
+
+def irreducible_monkhorst_pack(grid: tuple[int, int, int], shift: tuple[float, float, float], symmetry: SpaceGroup, time_reversal: bool = True, tol: float = 1e-6) -> IrreducibleKPoints:
+    """Reduce ``monkhorst_pack(grid, shift)`` to its irreducible wedge.
+
+    Operations that do not map the (shifted) mesh onto itself are dropped.
+    ``time_reversal`` adds ``k -> -k``, valid without spin-orbit coupling.
+    Weights are orbit sizes over the mesh size.
+    """
+    full = monkhorst_pack(grid, shift)
+    n = np.asarray(grid, dtype=float)
+    s = np.asarray(shift, dtype=float)
+    kmesh = full.kpts
+
+    def index_of(k):
+        m = (k + 0.5) * n - s
+        ok = np.all(np.abs(m - np.round(m)) < tol, axis=-1)
+        m = np.mod(np.round(m).astype(int), grid)
+        return ok, (m[..., 0] * grid[1] + m[..., 1]) * grid[2] + m[..., 2]
+
+    # Reciprocal fractional coordinates transform with W^{-T}: k'_row = k_row W^{-1}.
+    inv_rot = np.round(np.linalg.inv(symmetry.rotations)).astype(int)
+    images = np.einsum("kj,nji->nki", kmesh, inv_rot)
+    ok, idx = index_of(images)
+    on_mesh = np.all(ok, axis=1)
+    group = symmetry.subgroup(on_mesh)
+    idx = idx[on_mesh]
+    if time_reversal:
+        ok_tr, idx_tr = index_of(-images[on_mesh])
+        idx = np.concatenate([idx, idx_tr[np.all(ok_tr, axis=1)]])
+
+    nk = len(kmesh)
+    rep = np.full(nk, -1, dtype=int)
+    reps = []
+    for ik in range(nk):
+        if rep[ik] >= 0:
+            continue
+        rep[idx[:, ik]] = len(reps)
+        reps.append(ik)
+    weights = np.bincount(rep, minlength=len(reps)).astype(float) / nk
+    kpoints = KPointGrid(kpts=kmesh[reps], weights=weights, gamma_only=False)
+    return IrreducibleKPoints(kpoints=kpoints, full_to_irreducible=rep, symmetry=group)
+
+
+def symmetrize_density(rho: np.ndarray, symmetry: SpaceGroup) -> np.ndarray:
+    """``(1/N_op) Σ_op ρ(W x + t)`` on the FFT grid (last three axes; leading axes such as spin kept)."""
+    rho = np.asarray(rho, dtype=float)
+    shape = rho.shape[-3:]
+    n = np.asarray(shape)
+    if len(symmetry.compatible_with_grid(shape)) != len(symmetry):
+        raise ValueError(f"FFT grid {shape} is not compatible with all symmetry operations; use SpaceGroup.compatible_with_grid")
+    idx = np.stack(np.meshgrid(*[np.arange(m) for m in shape], indexing="ij"), axis=-1).reshape(-1, 3)
+    flat = rho.reshape(*rho.shape[:-3], -1)
+    out = np.zeros_like(flat)
+    for w, t in zip(symmetry.rotations, symmetry.translations):
+        # Grid index i maps to (W (i/n) + t) n.
+        target = np.mod(np.round((idx / n) @ w.T * n + t * n).astype(int), n)
+        out += flat[..., (target[:, 0] * shape[1] + target[:, 1]) * shape[2] + target[:, 2]]
+    return (out / len(symmetry)).reshape(rho.shape)
+
+
+def symmetrize_forces(forces: np.ndarray, symmetry: SpaceGroup) -> np.ndarray:
+    """Average ``R F_a`` onto the image atom of each operation (Cartesian forces)."""
+    forces = np.asarray(forces, dtype=float)
+    out = np.zeros_like(forces)
+    for rot, amap in zip(symmetry.cartesian_rotations, symmetry.atom_map):
+        out[amap] += forces @ rot.T
+    return out / len(symmetry)
+
+
+def symmetrize_stress(stress: np.ndarray, symmetry: SpaceGroup) -> np.ndarray:
+    """``(1/N_op) Σ_op R σ R^T`` for a Cartesian 3x3 tensor."""
+    rots = symmetry.cartesian_rotations
+    return np.einsum("nij,jk,nlk->il", rots, np.asarray(stress, dtype=float), rots) / len(symmetry)
@@ -4,11 +4,96 @@ from __future__ import annotations
 
 import numpy as np
 
+_ATOM_CHUNK = 64
 
-def structure_factor(gvecs: np.ndarray, positions_bohr: np.ndarray) -> np.ndarray:
-    phase = np.asarray(gvecs) @ np.asarray(positions_bohr).T
-    return np.exp(-1j * phase).sum(axis=1)
+
+def structure_factor(gvecs: np.ndarray, positions_bohr: np.ndarray, chunk: int = _ATOM_CHUNK) -> np.ndarray:
+    """``S(G) = Σ_a e^{-iG·τ_a}`` for Cartesian ``gvecs``, accumulated over atom chunks."""
+    g = np.asarray(gvecs, dtype=float)
+    pos = np.asarray(positions_bohr, dtype=float).reshape(-1, 3)
+    out = np.zeros(len(g), dtype=complex)
+    for start in range(0, len(pos), chunk):
+        out += np.exp(-1j * (g @ pos[start : start + chunk].T)).sum(axis=1)
+    return out
 
 
 def local_potential_g(v_atom_g: np.ndarray, gvecs: np.ndarray, positions_bohr: np.ndarray) -> np.ndarray:
     return np.asarray(v_atom_g) * structure_factor(gvecs, positions_bohr)
+
+
+class StructureFactor:
+    """Species-resolved structure factors ``S_s(G) = Σ_{a∈s} e^{-iG·τ_a}`` on integer G-vectors.
+
+    Uses the separable form ``e^{-iG·τ} = Π_k e^{-2πi m_k f_k}`` (``G = m·B``, ``f`` the
+    fractional position): per-axis tables ``(natoms, 2 m_max + 1)`` are built once and
+    multiplied ``chunk`` atoms at a time, so the ``(nG, natoms)`` phase matrix is never
+    formed. ``gradient`` contracts the same chunks for forces.
+    """
+
+    def __init__(
+        self,
+        gvecs_int: np.ndarray,
+        cell_bohr: np.ndarray,
+        positions_bohr: np.ndarray,
+        species_index: np.ndarray | None = None,
+        nspecies: int | None = None,
+        chunk: int = _ATOM_CHUNK,
+    ):
+        self.gvecs_int = np.asarray(gvecs_int, dtype=int)
+        self.cell = np.asarray(cell_bohr, dtype=float)
+        self.positions = np.asarray(positions_bohr, dtype=float).reshape(-1, 3)
+        natoms = len(self.positions)
+        self.species_index = np.zeros(natoms, dtype=int) if species_index is None else np.asarray(species_index, dtype=int)
+        if self.species_index.shape != (natoms,):
+            raise ValueError("species_index must have one entry per atom")
+        self.nspecies = int(nspecies) if nspecies is not None else int(self.species_index.max(initial=-1)) + 1
+        self.chunk = max(1, int(chunk))
+        self.g_cart = self.gvecs_int @ (2.0 * np.pi * np.linalg.inv(self.cell).T)
+
+        frac = self.positions @ np.linalg.inv(self.cell)
+        self._mmax = np.abs(self.gvecs_int).max(axis=0, initial=0)
+        # eigts[k][a, m + m_max] = exp(-2πi m f_ak)
+        self._eigts = [np.exp(-2j * np.pi * np.outer(frac[:, k], np.arange(-self._mmax[k], self._mmax[k] + 1))) for k in range(3)]
+        self._cols = [self.gvecs_int[:, k] + self._mmax[k] for k in range(3)]
+
+    def _phases(self, atoms: np.ndarray) -> np.ndarray:
+        """``e^{-iG·τ_a}`` for a chunk of atoms, shape ``(len(atoms), nG)``."""
+        e1, e2, e3 = (self._eigts[k][atoms][:, self._cols[k]] for k in range(3))
+        e1 *= e2
+        e1 *= e3
+        return e1
+
+    def _chunks(self):
+        for start in range(0, len(self.positions), self.chunk):
+            yield np.arange(start, min(start + self.chunk, len(self.positions)))
+
+    def per_species(self) -> np.ndarray:
+        """``S_s(G)``, shape ``(nspecies, nG)``."""
+        out = np.zeros((self.nspecies, len(self.gvecs_int)), dtype=complex)
+        for atoms in self._chunks():
+            phases = self._phases(atoms)
+            sp = self.species_index[atoms]
+            for s in np.unique(sp):
+                out[s] += phases[sp == s].sum(axis=0)
+        return out
+
+    def total(self) -> np.ndarray:
+        return self.per_species().sum(axis=0)
+
+    def local_potential(self, v_species_g: np.ndarray) -> np.ndarray:
+        """``V(G) = Σ_s v_s(G) S_s(G)`` for per-species form factors ``(nspecies, nG)``."""
+        v = np.asarray(v_species_g).reshape(self.nspecies, -1)
+        return np.einsum("sg,sg->g", v, self.per_species())
+
+    def gradient(self, coeff_species_g: np.ndarray) -> np.ndarray:
+        """``∂/∂τ_a Re Σ_{s,G} c_s(G) S_s(G)``, shape ``(natoms, 3)``.
+
+        For a local energy ``E = Ω Σ_G Re[ρ*(G) V(G)]`` use ``c_s = Ω ρ*(G) v_s(G)``;
+        the forces are ``-gradient(c)``.
+        """
+        c = np.asarray(coeff_species_g).reshape(self.nspecies, -1)
+        grad = np.zeros_like(self.positions)
+        for atoms in self._chunks():
+            weighted = self._phases(atoms) * c[self.species_index[atoms]]
+            grad[atoms] = np.imag(weighted) @ self.g_cart  # Re[-i x] = Im[x]
+        return grad
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import numpy as np
 
@@ -14,6 +14,8 @@ class PAWBasis:
     beta_projectors: tuple[np.ndarray, ...]
     dij: np.ndarray
     qij: np.ndarray
+    qfuncl: np.ndarray = field(default_factory=lambda: np.zeros((0, 0)))  # (n, mesh) Q_ij^L(r)
+    qfuncl_index: np.ndarray = field(default_factory=lambda: np.zeros((0, 3), dtype=int))  # rows (i, j, L)
 
 
 def build_paw_basis(pp: PseudopotentialData) -> PAWBasis:
@@ -34,4 +36,11 @@ def build_paw_basis(pp: PseudopotentialData) -> PAWBasis:
     if qij.size and qij.shape != (nproj, nproj):
         raise ValueError(f"PAW Q_ij has shape {qij.shape}, expected {(nproj, nproj)}")
 
-    return PAWBasis(beta_projectors=beta, dij=dij, qij=qij)
+    aug = pp.raw.get("augmentation", {})
+    return PAWBasis(
+        beta_projectors=beta,
+        dij=dij,
+        qij=qij,
+        qfuncl=np.asarray(aug.get("qfuncl", np.zeros((0, 0))), dtype=float),
+        qfuncl_index=np.asarray(aug.get("qfuncl_index", np.zeros((0, 3))), dtype=int).reshape(-1, 3),
+    )
@@ -2,8 +2,15 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
+from dataclasses import dataclass
+from math import factorial
+
 import numpy as np
 
+from jackal.core.types import PseudopotentialData
+from jackal.core.units import RY_TO_HARTREE
+from jackal.pseudopotential.radial import RadialTable, pseudopotential_tables
 
 def projector_overlaps(beta_proj: np.ndarray, psi: np.ndarray) -> np.ndarray:
     return np.asarray(beta_proj).conj().T @ np.asarray(psi)
@@ -12,3 +19,197 @@ def projector_overlaps(beta_proj: np.ndarray, psi: np.ndarray) -> np.ndarray:
 def apply_projector_operator(beta_proj: np.ndarray, d_matrix: np.ndarray, psi: np.ndarray) -> np.ndarray:
     overlaps = projector_overlaps(beta_proj, psi)
     return np.asarray(beta_proj) @ (np.asarray(d_matrix) @ overlaps)
+
+
+def real_spherical_harmonics(lmax: int, vecs: np.ndarray) -> np.ndarray:
+    """Real spherical harmonics ``Y_lm(v̂)``, columns ordered ``(l, m=-l..l)``.
+
+    ``Y_l,±m = √2 N_lm Q_l^m(z) {Re, Im}(x + iy)^m`` with ``Q_l^m = P_l^m / sin^m θ``
+    from the standard upward recursion (no Condon-Shortley phase, so ``Y_1,-1 ∝ y``,
+    ``Y_11 ∝ x``), valid for any ``l``.
+
+    Returns shape ``(npts, (lmax+1)**2)``. Zero vectors get ``Y_00`` only, which is
+    harmless since every ``l > 0`` radial factor vanishes at ``q = 0``.
+    """
+    v = np.asarray(vecs, dtype=float)
+    norm = np.linalg.norm(v, axis=1)
+    nonzero = norm > 1e-12
+    u = np.divide(v, norm[:, None], out=np.zeros_like(v), where=nonzero[:, None])
+    z = u[:, 2]
+    xy = (u[:, 0] + 1j * u[:, 1])[:, None] ** np.arange(lmax + 1)[None, :]  # (x + iy)^m
+
+    # q[l][m] = Q_l^m(z)
+    q = [[None] * (lmax + 1) for _ in range(lmax + 1)]
+    for m in range(lmax + 1):
+        q[m][m] = np.full(len(v), float(np.prod(np.arange(1, 2 * m, 2))))
+        if m + 1 <= lmax:
+            q[m + 1][m] = (2 * m + 1) * z * q[m][m]
+        for l in range(m + 2, lmax + 1):
+            q[l][m] = ((2 * l - 1) * z * q[l - 1][m] - (l + m - 1) * q[l - 2][m]) / (l - m)
+
+    cols = []
+    for l in range(lmax + 1):
+        row = [None] * (2 * l + 1)
+        for m in range(l + 1):
+            n_lm = np.sqrt((2 * l + 1) / (4.0 * np.pi) * factorial(l - m) / factorial(l + m))
+            if m == 0:
+                row[l] = n_lm * q[l][0]
+            else:
+                row[l + m] = np.sqrt(2.0) * n_lm * q[l][m] * xy[:, m].real
+                row[l - m] = np.sqrt(2.0) * n_lm * q[l][m] * xy[:, m].imag
+        cols += [c * nonzero if l > 0 else c for c in row]
+    return np.stack(cols, axis=1)
+
+
+@dataclass(frozen=True)
+class SpeciesProjectors:
+    """Radial beta projectors of one species tabulated on a uniform q-grid.
+
+    ``beta(q)[i] = ∫ (r β_i)(r) r j_l(q r) dr`` (UPF stores ``r β``); ``dij`` and
+    optional ``qij`` are in Hartree / dimensionless, indexed by radial projector.
+    """
+
+    beta: RadialTable
+    l: tuple[int, ...]
+    dij: np.ndarray  # (nbeta, nbeta)
+    qij: np.ndarray | None = None
+
+    @property
+    def nproj(self) -> int:
+        return sum(2 * l + 1 for l in self.l)
+
+    def _expand(self, mat: np.ndarray) -> np.ndarray:
+        """Expand a radial ``(nbeta, nbeta)`` matrix to channels, ``δ_{l l'} δ_{m m'}``."""
+        out = np.zeros((self.nproj, self.nproj))
+        offsets = np.cumsum([0] + [2 * l + 1 for l in self.l])
+        for i, li in enumerate(self.l):
+            for j, lj in enumerate(self.l):
+                if li == lj:
+                    out[offsets[i] : offsets[i + 1], offsets[j] : offsets[j + 1]] = mat[i, j] * np.eye(2 * li + 1)
+        return out
+
+    def d_channels(self) -> np.ndarray:
+        return self._expand(self.dij)
+
+    def q_channels(self) -> np.ndarray | None:
+        return None if self.qij is None else self._expand(self.qij)
+
+    def beta_at(self, qabs: np.ndarray) -> np.ndarray:
+        """Radial projectors at arbitrary ``|G+k|``, shape ``(nbeta, npts)``."""
+        return self.beta(qabs)
+
+    @classmethod
+    def from_pseudopotential(cls, pp: PseudopotentialData, qmax: float, dq: float = 0.01) -> SpeciesProjectors:
+        nonlocal_data = pp.raw.get("nonlocal", {})
+        betas = nonlocal_data.get("beta_projectors", [])
+        if len(betas) == 0:
+            raise ValueError(f"{pp.symbol}: pseudopotential has no beta projectors")
+        tables = pseudopotential_tables(pp, qmax, dq)
+
+        dij = np.asarray(nonlocal_data.get("dij"), dtype=float).reshape(len(betas), len(betas)) * RY_TO_HARTREE
+        qij_raw = np.asarray(nonlocal_data.get("qij", []), dtype=float)
+        qij = qij_raw.reshape(len(betas), len(betas)) if qij_raw.size == len(betas) ** 2 else None
+        return cls(beta=tables.beta, l=tables.beta_l, dij=dij, qij=qij)
+
+
+def beta_gk_columns(species: SpeciesProjectors, gk_cart: np.ndarray, volume_bohr3: float) -> np.ndarray:
+    """Atom-at-origin projectors ``β_ilm(G+k)``, shape ``(npw, nproj)``.
+
+    ``β_ilm(G+k) = 4π/√Ω (-i)^l Y_lm(Ĝ+k) β_i(|G+k|)``; multiply by ``exp(-i(G+k)·τ)``
+    to place the atom at ``τ``.
+    """
+    gk = np.asarray(gk_cart, dtype=float)
+    qabs = np.linalg.norm(gk, axis=1)
+    lmax = max(species.l) if species.l else 0
+    ylm = real_spherical_harmonics(lmax, gk)
+    radial = species.beta_at(qabs)
+    pref = 4.0 * np.pi / np.sqrt(volume_bohr3)
+
+    cols = np.empty((gk.shape[0], species.nproj), dtype=complex)
+    c = 0
+    for i, l in enumerate(species.l):
+        for m in range(2 * l + 1):
+            cols[:, c] = pref * (-1j) ** l * radial[i] * ylm[:, l * l + m]
+            c += 1
+    return cols
+
+
+class NonlocalOperator:
+    """Precomputed ``β D β†`` for one geometry and k-point basis.
+
+    Projectors of all atoms are stored as one contiguous ``(npw, nproj_total)`` array,
+    grouped by species with the atoms of a species adjacent. Applying the operator to
+    a block of bands costs two GEMMs; ``D`` is applied per species as a batched
+    ``(natoms_s, nproj_s, nproj_s)`` block-diagonal product, never as a dense matrix.
+    """
+
+    def __init__(
+        self,
+        species: Sequence[SpeciesProjectors],
+        species_index: np.ndarray,
+        positions_bohr: np.ndarray,
+        gk_cart: np.ndarray,
+        volume_bohr3: float,
+    ):
+        species_index = np.asarray(species_index, dtype=int)
+        pos = np.asarray(positions_bohr, dtype=float)
+        gk = np.asarray(gk_cart, dtype=float)
+
+        blocks = []
+        self.groups: list[tuple[int, np.ndarray, slice]] = []  # (species, atom ids, column slice)
+        self._d: list[np.ndarray] = []
+        self._q: list[np.ndarray | None] = []
+        start = 0
+        for s, sp in enumerate(species):
+            atoms = np.flatnonzero(species_index == s)
+            if atoms.size == 0 or sp.nproj == 0:
+                continue
+            cols = beta_gk_columns(sp, gk, volume_bohr3)
+            phases = np.exp(-1j * (gk @ pos[atoms].T))  # (npw, natoms_s)
+            blocks.append((phases[:, :, None] * cols[:, None, :]).reshape(gk.shape[0], -1))
+            stop = start + atoms.size * sp.nproj
+            self.groups.append((s, atoms, slice(start, stop)))
+            self._d.append(sp.d_channels())
+            self._q.append(sp.q_channels())
+            start = stop
+
+        if blocks:
+            self.beta = np.ascontiguousarray(np.concatenate(blocks, axis=1))
+        else:
+            self.beta = np.zeros((gk.shape[0], 0), dtype=complex)
+
+    @property
+    def nproj_total(self) -> int:
+        return int(self.beta.shape[1])
+
+    def set_d(self, d_per_species: Sequence[np.ndarray]) -> None:
+        """Replace the channel ``D`` blocks (e.g. screened USPP/PAW ``D_ij`` each SCF step)."""
+        if len(d_per_species) != len(self._d):
+            raise ValueError(f"Expected {len(self._d)} D blocks, got {len(d_per_species)}")
+        self._d = [np.asarray(d) for d in d_per_species]
+
+    def projections(self, psi: np.ndarray) -> np.ndarray:
+        """``<β|ψ>`` for every projector channel, shape ``(nproj_total, nbands)``."""
+        return self.beta.conj().T @ psi
+
+    def _apply_blocks(self, mats: Sequence[np.ndarray | None], proj: np.ndarray) -> np.ndarray:
+        out = np.zeros_like(proj)
+        for (_, atoms, cols), mat in zip(self.groups, mats):
+            if mat is None:
+                continue
+            p = proj[cols].reshape(atoms.size, mat.shape[0], -1)
+            out[cols] = np.einsum("ij,ajb->aib", mat, p).reshape(-1, proj.shape[1])
+        return out
+
+    def __call__(self, psi) -> np.ndarray:
+        psi_arr = np.asarray(psi)
+        block = psi_arr[:, None] if psi_arr.ndim == 1 else psi_arr
+        out = self.beta @ self._apply_blocks(self._d, self.projections(block))
+        return out[:, 0] if psi_arr.ndim == 1 else out
+
+    def apply_overlap(self, psi) -> np.ndarray:
+        """``S ψ = ψ + β Q β† ψ`` (identity for species without ``Q_ij``)."""
+        psi_arr = np.asarray(psi)
+        block = psi_arr[:, None] if psi_arr.ndim == 1 else psi_arr
+        out = block + self.beta @ self._apply_blocks(self._q, self.projections(block))
+        return out[:, 0] if psi_arr.ndim == 1 else out
@@ -1,22 +1,206 @@
-"""Radial interpolation tables and reciprocal transforms."""
+"""Radial interpolation tables and reciprocal transforms.
+
+Spherical Bessel transforms of radial pseudopotential functions are computed once
+per pseudopotential on a uniform q-grid (``RadialTable``) and then served at any
+``|G|`` by 4-point Lagrange (cubic) interpolation, in NumPy or in JAX. The JAX
+path is differentiable in ``q``, so stress through the cell-dependent ``|G|`` is
+the exact derivative of the interpolant.
+"""
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+from pathlib import Path
+
+import jax.numpy as jnp
 import numpy as np
+from scipy.special import erf, spherical_jn
+
+from jackal.core.types import PseudopotentialData
+from jackal.core.units import RY_TO_HARTREE
+
+_Q_CHUNK = 256
 
 
 def interp_radial(r: np.ndarray, values: np.ndarray, r_query: np.ndarray) -> np.ndarray:
     return np.interp(np.asarray(r_query, dtype=float), np.asarray(r, dtype=float), np.asarray(values, dtype=float))
 
 
+def _trapezoid_weights(r: np.ndarray) -> np.ndarray:
+    dr = np.diff(r)
+    w = np.zeros_like(r)
+    w[:-1] += 0.5 * dr
+    w[1:] += 0.5 * dr
+    return w
+
+
+def simpson_weights(rab: np.ndarray) -> np.ndarray:
+    """Integration weights ``w`` with ``∫ f dr ≈ Σ w_i f_i`` on a UPF mesh.
+
+    ``rab = dr/di`` of the mesh, so Simpson's rule on the uniform index grid applies.
+    An even point count falls back to the trapezoid rule on the last interval.
+    """
+    rab = np.asarray(rab, dtype=float)
+    n = rab.size
+    w = np.zeros(n)
+    m = n if n % 2 == 1 else n - 1
+    if m >= 3:
+        w[:m:2] = 2.0 / 3.0
+        w[1:m:2] = 4.0 / 3.0
+        w[0] = w[m - 1] = 1.0 / 3.0
+    elif m == 1:
+        w[0] = 0.0
+    if m != n:
+        w[m - 1] += 0.5
+        w[n - 1] += 0.5
+    return w * rab
+
+
+def spherical_bessel_transform(weights: np.ndarray, r: np.ndarray, f_r: np.ndarray, q: np.ndarray, l: int = 0) -> np.ndarray:
+    """``F(q) = ∫ f(r) j_l(q r) dr`` with quadrature ``weights``, evaluated in q-chunks.
+
+    Powers of ``r`` (e.g. ``r²`` for a 3D Fourier transform) belong in ``f_r``.
+    Peak memory is ``O(chunk * nr)`` rather than ``O(nq * nr)``.
+    """
+    wf = np.asarray(weights, dtype=float) * np.asarray(f_r, dtype=float)
+    r_arr = np.asarray(r, dtype=float)
+    q_arr = np.asarray(q, dtype=float)
+    out = np.empty(q_arr.shape, dtype=float)
+    flat_q, flat_out = q_arr.ravel(), out.reshape(-1)
+    for start in range(0, flat_q.size, _Q_CHUNK):
+        qc = flat_q[start : start + _Q_CHUNK]
+        flat_out[start : start + _Q_CHUNK] = spherical_jn(l, qc[:, None] * r_arr[None, :]) @ wf
+    return out
+
+
 def radial_to_reciprocal(r: np.ndarray, f_r: np.ndarray, q: np.ndarray) -> np.ndarray:
-    """Spherical transform ``F(q)=4π∫ r² f(r) sin(qr)/(qr) dr``."""
+    """Spherical transform ``F(q)=4π∫ r² f(r) sin(qr)/(qr) dr`` (trapezoid rule in ``r``)."""
     r_arr = np.asarray(r, dtype=float)
     f_arr = np.asarray(f_r, dtype=float)
-    q_arr = np.asarray(q, dtype=float)
-    qr = q_arr[:, None] * r_arr[None, :]
-    sinc = np.ones_like(qr)
-    mask = np.abs(qr) > 1e-12
-    sinc[mask] = np.sin(qr[mask]) / qr[mask]
-    integrand = 4.0 * np.pi * (r_arr[None, :] ** 2) * f_arr[None, :] * sinc
-    return np.trapz(integrand, r_arr, axis=1)
+    return 4.0 * np.pi * spherical_bessel_transform(_trapezoid_weights(r_arr), r_arr, r_arr**2 * f_arr, q, l=0)
+
+
+def _lagrange4(values, q, dq: float, xp):
+    nq = values.shape[-1]
+    x = q / dq
+    i0 = xp.clip(xp.floor(x).astype(int), 0, nq - 4)
+    px = x - i0
+    ux, vx, wx = 1.0 - px, 2.0 - px, 3.0 - px
+    f0, f1, f2, f3 = (values[..., i0 + j] for j in range(4))
+    return f0 * ux * vx * wx / 6.0 + f1 * px * vx * wx / 2.0 - f2 * px * ux * wx / 2.0 + f3 * px * ux * vx / 6.0
+
+
+@dataclass(frozen=True)
+class RadialTable:
+    """Functions ``F_n(q)`` tabulated at ``q = i * dq``, shape ``(nfun, nq)``."""
+
+    dq: float
+    values: np.ndarray
+
+    @property
+    def qmax(self) -> float:
+        return self.dq * (self.values.shape[-1] - 4)
+
+    def __call__(self, q) -> np.ndarray:
+        """Cubic interpolation at ``q`` (any shape); result ``(nfun, *q.shape)``."""
+        return _lagrange4(self.values, np.asarray(q, dtype=float), self.dq, np)
+
+    def interp_jax(self, q):
+        """Differentiable counterpart of ``__call__`` for traced ``|G|``."""
+        return _lagrange4(jnp.asarray(self.values), q, self.dq, jnp)
+
+    @classmethod
+    def build(cls, weights, r, functions, ls, qmax: float, dq: float) -> RadialTable:
+        q = np.arange(int(np.ceil(qmax / dq)) + 4) * dq
+        if not len(functions):
+            return cls(dq=dq, values=np.zeros((0, q.size)))
+        rows = [spherical_bessel_transform(weights, r, f, q, l=l) for f, l in zip(functions, ls)]
+        return cls(dq=dq, values=np.asarray(rows))
+
+
+@dataclass(frozen=True)
+class PseudopotentialTables:
+    """All reciprocal-space radial tables of one pseudopotential (Hartree units).
+
+    - ``local``: short-range ``4π ∫ r² (V_loc(r) + Z erf(r)/r) j_0(qr) dr``; add
+      ``local_long_range(q)`` for the full ``V_loc(q)``.
+    - ``beta``: ``∫ (r β_i)(r) r j_l(qr) dr`` per projector.
+    - ``qfunc``: ``∫ (r² Q_ij^L)(r) j_L(qr) dr`` per augmentation channel in
+      ``qfunc_index`` rows ``(i, j, L)``.
+    """
+
+    z_valence: float
+    local: RadialTable
+    beta: RadialTable
+    beta_l: tuple[int, ...]
+    qfunc: RadialTable
+    qfunc_index: np.ndarray
+
+    def local_long_range(self, q):
+        """``-4π Z e^{-q²/4} / q²`` (zero at ``q = 0``), the Fourier transform of ``-Z erf(r)/r``."""
+        q2 = np.asarray(q, dtype=float) ** 2
+        safe = np.where(q2 > 1e-12, q2, 1.0)
+        return np.where(q2 > 1e-12, -4.0 * np.pi * self.z_valence * np.exp(-0.25 * q2) / safe, 0.0)
+
+
+def build_pseudopotential_tables(pp: PseudopotentialData, qmax: float, dq: float = 0.01) -> PseudopotentialTables:
+    mesh = pp.raw.get("mesh", {})
+    r = np.asarray(mesh.get("r", []), dtype=float)
+    rab = np.asarray(mesh.get("rab", []), dtype=float)
+    if r.size == 0:
+        raise ValueError(f"{pp.symbol}: pseudopotential has no radial mesh")
+    if rab.size != r.size:
+        rab = np.gradient(r)
+    weights = simpson_weights(rab)
+
+    def on_mesh(f):
+        out = np.zeros_like(r)
+        f = np.asarray(f, dtype=float)[: r.size]
+        out[: f.size] = f
+        return out
+
+    vloc = pp.raw.get("local_potential", np.array([]))
+    if np.size(vloc):
+        vsr = r**2 * (on_mesh(vloc) * RY_TO_HARTREE) + pp.z_valence * r * erf(r)
+        local = RadialTable.build(weights, r, [4.0 * np.pi * vsr], [0], qmax, dq)
+    else:
+        local = RadialTable.build(weights, r, [], [], qmax, dq)
+
+    nonlocal_data = pp.raw.get("nonlocal", {})
+    betas = nonlocal_data.get("beta_projectors", [])
+    beta_l = tuple(int(l or 0) for l in nonlocal_data.get("beta_angular_momentum", []))
+    beta = RadialTable.build(weights, r, [on_mesh(b) * r for b in betas], beta_l, qmax, dq)
+
+    aug = pp.raw.get("augmentation", {})
+    qfuncl = np.asarray(aug.get("qfuncl", np.zeros((0, r.size))), dtype=float)
+    qindex = np.asarray(aug.get("qfuncl_index", np.zeros((0, 3))), dtype=int).reshape(-1, 3)
+    qfunc = RadialTable.build(weights, r, [on_mesh(f) for f in qfuncl], qindex[:, 2].tolist(), qmax, dq)
+
+    return PseudopotentialTables(
+        z_valence=float(pp.z_valence),
+        local=local,
+        beta=beta,
+        beta_l=beta_l,
+        qfunc=qfunc,
+        qfunc_index=qindex,
+    )
+
+
+_TABLE_CACHE: dict[tuple, PseudopotentialTables] = {}
+
+
+def pseudopotential_tables(pp: PseudopotentialData, qmax: float, dq: float = 0.01) -> PseudopotentialTables:
+    """Cached ``build_pseudopotential_tables`` keyed by UPF path, mtime and ``dq``.
+
+    A cached table is reused whenever it already reaches ``qmax``; pseudopotentials
+    without a file path are never cached.
+    """
+    path = pp.raw.get("path")
+    if path is None or not Path(path).is_file():
+        return build_pseudopotential_tables(pp, qmax, dq)
+    key = (str(Path(path).resolve()), Path(path).stat().st_mtime_ns, float(dq))
+    cached = _TABLE_CACHE.get(key)
+    if cached is None or cached.beta.qmax < qmax or cached.local.qmax < qmax:
+        cached = build_pseudopotential_tables(pp, qmax, dq)
+        _TABLE_CACHE[key] = cached
+    return cached
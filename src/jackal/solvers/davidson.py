@@ -1,7 +1,10 @@
-"""Small dense blocked-Davidson style wrapper.
+"""Matrix-free blocked Davidson eigensolver for ``H c = ε S c``.
 
-For scaffold use we solve the Rayleigh-Ritz problem in one shot using explicit
-matrices when callbacks are linear over the canonical basis.
+H and S are only ever applied to blocks of at most ``block_size`` vectors. The
+search space grows by one preconditioned residual block per iteration until it
+would exceed ``max_subspace``, at which point it is restarted from the current
+Ritz vectors. Bands whose residual norm is below ``residual_tol`` are locked:
+they stay in the Rayleigh-Ritz subspace but no longer generate corrections.
 """
 
 from __future__ import annotations
@@ -11,6 +14,9 @@ from typing import Any, Callable
 
 import numpy as np
 
+from jackal.hamiltonian.kinetic import kinetic_diagonal, teter_preconditioner
+from jackal.solvers.subspace import solve_rayleigh_ritz
+
 
 @dataclass
 class DavidsonResult:
@@ -18,36 +24,127 @@ class DavidsonResult:
     eigvecs: Any
     residual_norms: Any
     converged: bool
+    iterations: int = 0
+    n_apply_h: int = 0
+    n_apply_s: int = 0
+
+    @property
+    def h_applications_per_band(self) -> float:
+        return self.n_apply_h / max(len(self.eigvals), 1)
+
+
+class _BlockOperator:
+    """Apply ``op`` to at most ``block_size`` columns at a time and count columns."""
+
+    def __init__(self, op: Callable, block_size: int):
+        self._op = op
+        self.block_size = max(1, int(block_size))
+        self.count = 0
+
+    def __call__(self, vecs: np.ndarray) -> np.ndarray:
+        ncol = vecs.shape[1]
+        blocks = []
+        for start in range(0, ncol, self.block_size):
+            chunk = vecs[:, start : start + self.block_size]
+            blocks.append(np.asarray(self._op(chunk)).reshape(chunk.shape[0], chunk.shape[1]))
+        self.count += ncol
+        return np.concatenate(blocks, axis=1)
+
 
+def _s_orthonormalize_block(t: np.ndarray, st: np.ndarray, eps: float = 1e-10) -> tuple[np.ndarray, np.ndarray]:
+    """S-orthonormalize ``t`` given ``st = S t``, dropping linearly dependent directions."""
+    gram = t.conj().T @ st
+    gram = 0.5 * (gram + gram.conj().T)
+    evals, evecs = np.linalg.eigh(gram)
+    keep = evals > eps
+    w = evecs[:, keep] / np.sqrt(evals[keep])
+    return t @ w, st @ w
 
-def _build_matrix(apply_op: Callable, n: int) -> np.ndarray:
-    eye = np.eye(n)
-    cols = [np.asarray(apply_op(eye[:, i])) for i in range(n)]
-    return np.column_stack(cols)
 
+def _precondition(resid: np.ndarray, x: np.ndarray, t_diag: np.ndarray | None) -> np.ndarray:
+    if t_diag is None:
+        return resid.copy()
+    ekin = np.real(np.sum(x.conj() * t_diag[:, None] * x, axis=0)) / np.real(np.sum(x.conj() * x, axis=0))
+    ekin = np.clip(ekin, 1e-12, None)
+    return teter_preconditioner(t_diag[:, None], ekin[None, :]) * resid
 
-def solve_blocked_davidson(apply_h: Callable, apply_s: Callable, guess, params) -> DavidsonResult:
+
+def solve_blocked_davidson(apply_h: Callable, apply_s: Callable, guess, params, g2=None) -> DavidsonResult:
+    """Lowest ``params.nbands`` eigenpairs of ``H c = ε S c``.
+
+    Parameters
+    ----------
+    apply_h, apply_s
+        Callbacks mapping an ``(npw, m)`` block to ``H`` / ``S`` times that block.
+    guess
+        Starting vectors, shape ``(npw, m)``; padded with random vectors if ``m < nbands``.
+    params
+        Object with ``DiagSection`` fields (``nbands``, ``block_size``, ``max_subspace``,
+        ``residual_tol`` and optionally ``max_iter``).
+    g2
+        ``|G+k|^2`` of the basis; enables the Teter-Payne-Allan kinetic preconditioner.
+    """
     guess_arr = np.asarray(guess)
+    if guess_arr.ndim == 1:
+        guess_arr = guess_arr[:, None]
     n = guess_arr.shape[0]
-    h_mat = _build_matrix(apply_h, n)
-    s_mat = _build_matrix(apply_s, n)
-
-    # Regularize overlap and map to standard Hermitian problem.
-    s_mat = 0.5 * (s_mat + s_mat.conj().T)
-    h_mat = 0.5 * (h_mat + h_mat.conj().T)
-    evals_s, evecs_s = np.linalg.eigh(s_mat)
-    evals_s = np.clip(evals_s, 1e-10, None)
-    s_inv_sqrt = (evecs_s / np.sqrt(evals_s)) @ evecs_s.conj().T
-    h_tilde = s_inv_sqrt.conj().T @ h_mat @ s_inv_sqrt
-
-    eigvals, y = np.linalg.eigh(h_tilde)
-    eigvecs = s_inv_sqrt @ y
-
-    nroots = int(getattr(params, "nbands", min(guess_arr.shape[-1], n)))
-    eigvals = eigvals[:nroots]
-    eigvecs = eigvecs[:, :nroots]
-
-    res = h_mat @ eigvecs - s_mat @ eigvecs * eigvals[None, :]
-    res_norm = np.linalg.norm(res, axis=0)
+    nroots = min(int(getattr(params, "nbands", guess_arr.shape[1])), n)
+    block_size = max(1, int(getattr(params, "block_size", nroots)))
+    max_subspace = min(n, max(int(getattr(params, "max_subspace", 4 * nroots)), nroots + block_size))
     tol = float(getattr(params, "residual_tol", 1e-8))
-    return DavidsonResult(eigvals=eigvals, eigvecs=eigvecs, residual_norms=res_norm, converged=bool(np.all(res_norm < tol)))
+    max_iter = int(getattr(params, "max_iter", 100))
+    t_diag = None if g2 is None else kinetic_diagonal(g2)
+
+    h_op = _BlockOperator(apply_h, block_size)
+    s_op = _BlockOperator(apply_s, block_size)
+
+    v = guess_arr[:, :nroots]
+    if v.shape[1] < nroots:
+        rng = np.random.default_rng(0)
+        v = np.concatenate([v, rng.standard_normal((n, nroots - v.shape[1]))], axis=1)
+    v, sv = _s_orthonormalize_block(v, s_op(v))
+    if v.shape[1] < nroots:
+        raise ValueError("Davidson initial guess is linearly dependent under the overlap metric")
+    hv = h_op(v)
+    dtype = np.result_type(v, hv, sv)
+    v, hv, sv = v.astype(dtype), hv.astype(dtype), sv.astype(dtype)
+
+    converged = False
+    iterations = 0
+    while True:
+        evals, y = solve_rayleigh_ritz(v.conj().T @ hv, v.conj().T @ sv, nroots)
+        x, hx, sx = v @ y, hv @ y, sv @ y
+        resid = hx - sx * evals[None, :]
+        res_norm = np.linalg.norm(resid, axis=0)
+        active = np.flatnonzero(res_norm >= tol)
+        if active.size == 0:
+            converged = True
+            break
+        if iterations >= max_iter:
+            break
+        iterations += 1
+
+        active = active[:block_size]
+        t = _precondition(resid[:, active], x[:, active], t_diag)
+        t = t / np.linalg.norm(t, axis=0)[None, :]
+        if v.shape[1] + t.shape[1] > max_subspace:
+            v, hv, sv = x, hx, sx
+        for _ in range(2):
+            t = t - v @ (sv.conj().T @ t)
+        t, st = _s_orthonormalize_block(t, s_op(t))
+        if t.shape[1] == 0:
+            break
+        ht = h_op(t)
+        v = np.concatenate([v, t], axis=1)
+        hv = np.concatenate([hv, ht], axis=1)
+        sv = np.concatenate([sv, st], axis=1)
+
+    return DavidsonResult(
+        eigvals=evals,
+        eigvecs=x,
+        residual_norms=res_norm,
+        converged=converged,
+        iterations=iterations,
+        n_apply_h=h_op.count,
+        n_apply_s=s_op.count,
+    )
@@ -0,0 +1,317 @@
+"""Concurrent band solves across independent k-points.
+
+Two execution strategies are provided:
+
+- ``solve_kpoints_vmap``: per-k plane-wave bases are padded to a common size and all
+  k-points are solved in one jitted, ``jax.vmap``'d shape-stable Davidson call.
+  ``apply_h``/``apply_s`` must then be traceable JAX functions.
+- ``solve_kpoints_pool``: the NumPy ``solve_blocked_davidson`` is distributed over a
+  thread or process pool (CPU fallback for callbacks that cannot be traced).
+
+``solve_kpoints`` picks one of them from ``DiagSection.kpoint_parallel``.
+
+For collinear spin, ``solve_spin_kpoints_vmap`` folds the two spin channels into
+the batch axis, so both spins of every k-point go through one vmapped call.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+from jackal.core.compilation import bucket_size
+from jackal.hamiltonian.kinetic import teter_preconditioner
+from jackal.solvers.davidson import DavidsonResult, solve_blocked_davidson
+
+
+@dataclass(frozen=True)
+class PaddedKBasis:
+    """Per-k ``|G+k|^2`` padded to a common plane-wave count.
+
+    Padded slots carry ``mask == False`` and the largest real ``|G+k|^2`` so the
+    kinetic preconditioner stays finite there.
+    """
+
+    g2: np.ndarray  # (nk, npw_max)
+    mask: np.ndarray  # (nk, npw_max), bool
+    npw: np.ndarray  # (nk,)
+
+    @property
+    def nk(self) -> int:
+        return int(self.g2.shape[0])
+
+    @property
+    def npw_max(self) -> int:
+        return int(self.g2.shape[1])
+
+    def pad(self, per_k: Sequence[np.ndarray]) -> np.ndarray:
+        """Stack per-k arrays with leading axis ``npw_k`` into ``(nk, npw_max, ...)``."""
+        first = np.asarray(per_k[0])
+        out = np.zeros((self.nk, self.npw_max, *first.shape[1:]), dtype=np.result_type(*per_k))
+        for ik, arr in enumerate(per_k):
+            out[ik, : self.npw[ik]] = arr
+        return out
+
+    def unpad(self, padded: np.ndarray) -> list[np.ndarray]:
+        return [np.asarray(padded[ik, : self.npw[ik]]) for ik in range(self.nk)]
+
+
+def pad_kpoint_bases(g2_per_k: Sequence[np.ndarray], bucket: bool = False) -> PaddedKBasis:
+    """Pad per-k bases to a common length; with ``bucket`` round it up to ``bucket_size``
+    so structures with similar cutoffs and cells share compiled kernels."""
+    npw = np.array([len(g2) for g2 in g2_per_k], dtype=int)
+    npw_max = int(npw.max())
+    if bucket:
+        npw_max = bucket_size(npw_max, base=64)
+    g2_pad = np.zeros((len(npw), npw_max), dtype=float)
+    mask = np.zeros((len(npw), npw_max), dtype=bool)
+    for ik, g2 in enumerate(g2_per_k):
+        g2_arr = np.asarray(g2, dtype=float)
+        g2_pad[ik] = g2_arr.max() if g2_arr.size else 0.0
+        g2_pad[ik, : npw[ik]] = g2_arr
+        mask[ik, : npw[ik]] = True
+    return PaddedKBasis(g2=g2_pad, mask=mask, npw=npw)
+
+
+def _rayleigh_ritz_jax(basis, h_basis, s_basis, nroots: int, eps: float = 1e-10):
+    """Shape-stable Rayleigh-Ritz: S-dependent directions are pushed to high energy."""
+    h = basis.conj().T @ h_basis
+    s = basis.conj().T @ s_basis
+    h = 0.5 * (h + h.conj().T)
+    s = 0.5 * (s + s.conj().T)
+    es, us = jnp.linalg.eigh(s)
+    keep = es > eps * jnp.max(es)
+    w = us * jnp.where(keep, 1.0 / jnp.sqrt(jnp.where(keep, es, 1.0)), 0.0)[None, :]
+    h_tilde = w.conj().T @ h @ w
+    big = 1e6 * (1.0 + jnp.max(jnp.abs(jnp.diag(h_tilde))))
+    h_tilde = h_tilde + jnp.diag(jnp.where(keep, 0.0, big))
+    evals, y = jnp.linalg.eigh(h_tilde)
+    return evals[:nroots], (w @ y)[:, :nroots]
+
+
+def _s_orthonormalize_jax(t, st, eps: float = 1e-10):
+    """Shape-stable ``davidson._s_orthonormalize_block``: dependent directions become zero columns."""
+    gram = t.conj().T @ st
+    evals, evecs = jnp.linalg.eigh(0.5 * (gram + gram.conj().T))
+    keep = evals > eps
+    w = evecs * jnp.where(keep, 1.0 / jnp.sqrt(jnp.where(keep, evals, 1.0)), 0.0)[None, :]
+    return t @ w, st @ w
+
+
+def _davidson_jax(apply_h, apply_s, x0, g2, mask, kdata, tol, max_iter, block_size, max_subspace):
+    """Fixed-shape block Davidson for one k-point, mirroring ``solve_blocked_davidson``.
+
+    The search space is a ``(npw, max_subspace)`` buffer filled ``block_size`` columns
+    per iteration (corrections for the first unconverged roots) and restarted from
+    the Ritz vectors when full. Unused or linearly dependent columns are zero and
+    are ignored by the Rayleigh-Ritz step. Returns the number of columns passed to
+    ``apply_h``/``apply_s``.
+    """
+    nroots = x0.shape[1]
+    maskc = mask[:, None].astype(x0.dtype)
+    t_diag = 0.5 * g2
+    cols = jnp.arange(nroots)
+    pad = ((0, 0), (0, max_subspace - nroots))
+
+    def ritz(v, hv, sv):
+        evals, y = _rayleigh_ritz_jax(v, hv, sv, nroots)
+        x, hx, sx = v @ y, hv @ y, sv @ y
+        r = (hx - sx * evals[None, :]) * maskc
+        return evals, x, hx, sx, r, jnp.linalg.norm(r, axis=0)
+
+    def cond(state):
+        norms, it = state[-1][-1], state[4]
+        return jnp.logical_and(jnp.max(norms) >= tol, it < max_iter)
+
+    def body(state):
+        v, hv, sv, ncols, it, n_h, n_s, (_, x, hx, sx, r, norms) = state
+        active = norms >= tol
+        # Corrections for the first ``block_size`` unconverged roots; other picks are zeroed.
+        pick = jnp.argsort(jnp.where(active, cols, nroots + cols))[:block_size]
+        ekin = jnp.real(jnp.sum(x.conj() * t_diag[:, None] * x, axis=0))
+        t = teter_preconditioner(t_diag[:, None], jnp.maximum(ekin, 1e-12)[None, :]) * r
+        t = t[:, pick] * active[pick][None, :].astype(t.dtype)
+        t = t / jnp.maximum(jnp.linalg.norm(t, axis=0), 1e-30)[None, :]
+
+        restart = ncols + block_size > max_subspace
+        v = jnp.where(restart, jnp.pad(x, pad), v)
+        hv = jnp.where(restart, jnp.pad(hx, pad), hv)
+        sv = jnp.where(restart, jnp.pad(sx, pad), sv)
+        ncols = jnp.where(restart, nroots, ncols)
+
+        for _ in range(2):
+            t = t - v @ (sv.conj().T @ t)
+        t = t * maskc
+        t, st = _s_orthonormalize_jax(t, apply_s(t, kdata))
+        ht = apply_h(t, kdata)
+        v = jax.lax.dynamic_update_slice(v, t, (0, ncols))
+        hv = jax.lax.dynamic_update_slice(hv, ht, (0, ncols))
+        sv = jax.lax.dynamic_update_slice(sv, st, (0, ncols))
+        return v, hv, sv, ncols + block_size, it + 1, n_h + block_size, n_s + block_size, ritz(v, hv, sv)
+
+    x = x0 * maskc
+    x, sx = _s_orthonormalize_jax(x, apply_s(x, kdata))
+    hx = apply_h(x, kdata)
+    v, hv, sv = jnp.pad(x, pad), jnp.pad(hx, pad), jnp.pad(sx, pad)
+    n0 = jnp.asarray(nroots)
+    state = jax.lax.while_loop(cond, body, (v, hv, sv, n0, jnp.asarray(0), n0, n0, ritz(v, hv, sv)))
+    evals, x, _, _, _, norms = state[-1]
+    return evals, x, norms, state[4], state[5], state[6]
+
+
+@partial(jax.jit, static_argnames=("apply_h", "apply_s", "tol", "max_iter", "block_size", "max_subspace"))
+def _solve_batch(x0, g2, mask, kdata, apply_h, apply_s, tol: float, max_iter: int, block_size: int, max_subspace: int):
+    """Module-level so the executable is cached per callbacks, solver settings and input shapes."""
+
+    def solve_one(x, g2_k, mask_k, kd):
+        return _davidson_jax(apply_h, apply_s, x, g2_k, mask_k, kd, tol, max_iter, block_size, max_subspace)
+
+    return jax.vmap(solve_one)(x0, g2, mask, kdata)
+
+
+def solve_kpoints_vmap(
+    apply_h: Callable[[Any, Any], Any],
+    apply_s: Callable[[Any, Any], Any],
+    guesses: np.ndarray,
+    basis: PaddedKBasis,
+    kdata: Any,
+    params,
+) -> list[DavidsonResult]:
+    """Solve all k-points in one vmapped Davidson call.
+
+    Parameters
+    ----------
+    apply_h, apply_s
+        ``f(psi, kdata_k)`` returning ``H``/``S`` applied to a padded ``(npw_max, m)`` block,
+        written with ``jax.numpy`` so they can be traced. They are static arguments of
+        the compiled solver: pass the same (e.g. module-level) functions on every call,
+        and keep per-structure data in ``kdata``, to reuse the executable.
+    guesses
+        Padded starting vectors ``(nk, npw_max, nbands)`` (see ``PaddedKBasis.pad``).
+    kdata
+        Pytree of per-k operator data, every leaf stacked along a leading ``nk`` axis.
+    params
+        ``DiagSection``-like; ``block_size``, ``max_subspace``, ``residual_tol`` and
+        ``max_iter`` mean the same as for ``solve_blocked_davidson``.
+    """
+    tol = float(getattr(params, "residual_tol", 1e-8))
+    max_iter = int(getattr(params, "max_iter", 100))
+    x0 = jnp.asarray(guesses, dtype=jnp.result_type(guesses.dtype, jnp.complex64))
+    nroots = x0.shape[-1]
+    # Sizing as in ``solve_blocked_davidson``; the subspace is not capped at ``npw``
+    # because surplus columns come out linearly dependent and are zeroed.
+    block_size = min(max(1, int(getattr(params, "block_size", nroots))), nroots)
+    max_subspace = max(int(getattr(params, "max_subspace", 4 * nroots)), nroots + block_size)
+
+    evals, vecs, norms, iters, n_h, n_s = _solve_batch(
+        x0, jnp.asarray(basis.g2), jnp.asarray(basis.mask), kdata, apply_h, apply_s, tol, max_iter, block_size, max_subspace
+    )
+
+    evals, norms, iters = np.asarray(evals), np.asarray(norms), np.asarray(iters)
+    results = []
+    for ik, vec in enumerate(basis.unpad(np.asarray(vecs))):
+        results.append(
+            DavidsonResult(
+                eigvals=evals[ik],
+                eigvecs=vec,
+                residual_norms=norms[ik],
+                converged=bool(np.all(norms[ik] < tol)),
+                iterations=int(iters[ik]),
+                n_apply_h=int(n_h[ik]),
+                n_apply_s=int(n_s[ik]),
+            )
+        )
+    return results
+
+
+def solve_spin_kpoints_vmap(
+    apply_h: Callable[[Any, Any], Any],
+    apply_s: Callable[[Any, Any], Any],
+    guesses: np.ndarray,
+    basis: PaddedKBasis,
+    kdata: Any,
+    params,
+) -> list[list[DavidsonResult]]:
+    """Solve both spin channels at all k-points in one vmapped Davidson call.
+
+    ``guesses`` has shape ``(2, nk, npw_max, nbands)`` and every leaf of ``kdata``
+    leading axes ``(2, nk)`` (e.g. the per-spin local potential next to shared
+    projector data broadcast with ``np.broadcast_to``). The basis is shared by both
+    spins. Returns ``[results_up, results_down]``, one ``DavidsonResult`` per k-point.
+    """
+    guesses = np.asarray(guesses)
+    if guesses.ndim != 4 or guesses.shape[0] != 2:
+        raise ValueError(f"spin guesses must have shape (2, nk, npw, nbands), got {guesses.shape}")
+    nk = basis.nk
+    pair_basis = PaddedKBasis(g2=np.concatenate([basis.g2, basis.g2]), mask=np.concatenate([basis.mask, basis.mask]), npw=np.concatenate([basis.npw, basis.npw]))
+    flat_kdata = jax.tree_util.tree_map(lambda x: jnp.reshape(jnp.asarray(x), (2 * nk, *jnp.shape(x)[2:])), kdata)
+    results = solve_kpoints_vmap(apply_h, apply_s, guesses.reshape(2 * nk, *guesses.shape[2:]), pair_basis, flat_kdata, params)
+    return [results[:nk], results[nk:]]
+
+
+def solve_kpoints_pool(
+    solve_k: Callable[[int], DavidsonResult],
+    nk: int,
+    executor: str = "thread",
+    max_workers: int | None = None,
+) -> list[DavidsonResult]:
+    """Run ``solve_k(ik)`` for every k-point on a thread/process pool, preserving order.
+
+    With ``executor="process"`` ``solve_k`` must be picklable (a module-level function
+    or ``functools.partial`` of one). ``"serial"`` runs in the calling thread.
+    """
+    if executor == "serial" or nk <= 1:
+        return [solve_k(ik) for ik in range(nk)]
+    if executor == "thread":
+        pool_cls = ThreadPoolExecutor
+    elif executor == "process":
+        pool_cls = ProcessPoolExecutor
+    else:
+        raise ValueError(f"Unknown k-point executor: {executor}")
+    with pool_cls(max_workers=max_workers) as pool:
+        return list(pool.map(solve_k, range(nk)))
+
+
+def _solve_padded_k(ik: int, apply_h, apply_s, guesses: np.ndarray, basis: PaddedKBasis, kdata: Any, params) -> DavidsonResult:
+    """NumPy Davidson for k-point ``ik`` using callbacks written for padded blocks."""
+    npw = int(basis.npw[ik])
+    kd = jax.tree_util.tree_map(lambda x: x[ik], kdata)
+
+    def lift(op):
+        def apply(psi):
+            padded = np.zeros((basis.npw_max, psi.shape[1]), dtype=np.result_type(psi.dtype, np.complex64))
+            padded[:npw] = psi
+            return np.asarray(op(padded, kd))[:npw]
+
+        return apply
+
+    return solve_blocked_davidson(lift(apply_h), lift(apply_s), guesses[ik, :npw], params, g2=basis.g2[ik, :npw])
+
+
+def solve_kpoints(
+    apply_h: Callable[[Any, Any], Any],
+    apply_s: Callable[[Any, Any], Any],
+    guesses: np.ndarray,
+    basis: PaddedKBasis,
+    kdata: Any,
+    params,
+) -> list[DavidsonResult]:
+    """Solve all k-points with the strategy in ``params.kpoint_parallel``.
+
+    Arguments are those of ``solve_kpoints_vmap``. For ``"thread"``, ``"process"``
+    and ``"serial"`` each k-point runs the NumPy Davidson on its unpadded basis,
+    with ``params.kpoint_workers`` pool workers; ``"process"`` needs picklable
+    (module-level) callbacks.
+    """
+    mode = getattr(params, "kpoint_parallel", "thread")
+    if mode == "vmap":
+        return solve_kpoints_vmap(apply_h, apply_s, guesses, basis, kdata, params)
+    solve_k = partial(_solve_padded_k, apply_h=apply_h, apply_s=apply_s, guesses=np.asarray(guesses), basis=basis, kdata=kdata, params=params)
+    return solve_kpoints_pool(solve_k, basis.nk, executor=mode, max_workers=getattr(params, "kpoint_workers", None))
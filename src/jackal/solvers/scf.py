@@ -7,7 +7,7 @@ from dataclasses import dataclass
 import numpy as np
 
 from jackal.core.types import EnergyBreakdown, SCFState
-from jackal.density.mixer import DIISMixer
+from jackal.density.mixer import make_mixer
 
 
 @dataclass
@@ -16,17 +16,66 @@ class SCFResult:
     energies: EnergyBreakdown
 
 
-def run_scf(initial_rho, build_rho_out, energy_fn, max_iter=50, rhotol=1e-6, beta=0.4, mixing_ndim=8, kerker_q0=1.0) -> SCFResult:
+def scf_options(section) -> dict:
+    """``run_scf`` keyword arguments from an ``SCFSection``."""
+    return {
+        "max_iter": section.max_iter,
+        "rhotol": section.rhotol,
+        "beta": section.mixing_beta,
+        "mixing_ndim": section.mixing_ndim,
+        "kerker_q0": section.kerker_q0,
+        "mixer_kind": section.mixer,
+        "reset_factor": section.mixing_reset_factor,
+    }
+
+
+def run_scf(
+    initial_rho,
+    build_rho_out,
+    energy_fn,
+    max_iter=50,
+    rhotol=1e-6,
+    beta=0.4,
+    mixing_ndim=8,
+    kerker_q0=1.0,
+    cell_bohr=None,
+    mixer_kind="diis",
+    reset_factor=5.0,
+    initial_state: SCFState | None = None,
+    sphere_indices=None,
+) -> SCFResult:
+    """Mixed fixed-point iteration ``rho -> build_rho_out(rho)``.
+
+    ``initial_state`` (e.g. from ``density.extrapolation.DensityExtrapolator``) warm
+    starts the run: its ``rho_r`` replaces ``initial_rho`` when that is ``None``, its
+    wavefunctions are carried into the returned state, and its mixer history seeds
+    mixers that support ``seed_history`` (Anderson, Broyden).
+
+    Collinear spin runs pass packed ``(2, *grid)`` densities (``density.spin``);
+    they need the DIIS mixer, which mixes both channels with one history.
+
+    ``sphere_indices`` opts the DIIS mixer into G-space mixing on the dense sphere;
+    pass ``lattice.fft_grid.fft_box_indices(sphere.gvecs_int, fft_grids.dense)``.
+    """
+    if initial_rho is None:
+        if initial_state is None or initial_state.rho_r is None:
+            raise ValueError("run_scf needs initial_rho or an initial_state with rho_r")
+        initial_rho = initial_state.rho_r
     rho = np.asarray(initial_rho, dtype=float)
-    mixer = DIISMixer(beta=beta, ndim=mixing_ndim, kerker_q0=kerker_q0)
+    mixer = make_mixer(mixer_kind, beta=beta, ndim=mixing_ndim, kerker_q0=kerker_q0, cell_bohr=cell_bohr, reset_factor=reset_factor, sphere_indices=sphere_indices)
     state = SCFState(rho_r=rho.copy())
+    if initial_state is not None:
+        state.wavefunctions = initial_state.wavefunctions
+        if initial_state.mixer_history and hasattr(mixer, "seed_history"):
+            mixer.seed_history(initial_state.mixer_history)
 
     converged = False
     for it in range(1, max_iter + 1):
         rho_out = np.asarray(build_rho_out(rho), dtype=float)
         resid = np.linalg.norm(rho_out - rho) / max(np.sqrt(rho.size), 1.0)
         rho = mixer.mix(rho, rho_out)
-        state.mixer_history = mixer.history.copy()
+        # Mixer histories are views into ring buffers that the next ``mix`` overwrites.
+        state.mixer_history = [tuple(np.array(v) for v in pair) for pair in getattr(mixer, "history", [])]
         state.iteration = it
         state.rho_r = rho.copy()
         if resid < rhotol:
@@ -1,30 +1,45 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from functools import partial
 
 import jax.numpy as jnp
 import numpy as np
 
-from jackal.autodiff.forces import compute_forces
-from jackal.autodiff.stress import compute_stress
-from jackal.core.types import System
+from jackal.autodiff.fused import strain_value_and_grad
+from jackal.core.compilation import compilation_report, jit_kernel
+from jackal.core.types import SCFState, System
 from jackal.core.units import BOHR_TO_ANG, HARTREE_TO_EV
-from jackal.electrostatics.ewald import ion_ion_energy
+from jackal.density.extrapolation import gaussian_atomic_density
+from jackal.density.spin import initial_spin_density, nspin_of
+from jackal.electrostatics.ewald import (
+    dense_ewald_inputs,
+    dense_ewald_setup,
+    ewald_dense_kernel,
+    ewald_energy_jax,
+    ewald_setup,
+    ion_ion_energy,
+    prefers_dense_ewald,
+)
 from jackal.io.upf_parser import parse_upf
 from jackal.io.yaml_input import InputParams
 from jackal.lattice.cell import cell_volume
-from jackal.lattice.fft_grid import choose_fft_shape
-from jackal.lattice.gvectors import generate_gvectors
+from jackal.lattice.fft_grid import choose_fft_grids
+from jackal.lattice.gvectors import gsphere, kpoint_basis
 from jackal.lattice.kpoints import gamma_only, monkhorst_pack
+from jackal.lattice.symmetry import irreducible_monkhorst_pack, space_group_of, symmetrize_forces, symmetrize_stress
+from jackal.xc.xc_api import xc_energy_potential_stress
 
 
 @dataclass
 class SinglePointResult:
     energy_ev: float
     free_energy_ev: float
-    forces_ev_per_ang: np.ndarray
-    stress_voigt_ev_per_ang3: np.ndarray
+    forces_ev_per_ang: np.ndarray | None
+    stress_voigt_ev_per_ang3: np.ndarray | None
     metadata: dict
+    scf_state: SCFState | None = field(default=None)
 
 
 def _electrostatic_energy_hartree(positions_ang, cell_ang, numbers):
@@ -35,14 +50,65 @@ def _electrostatic_energy_hartree(positions_ang, cell_ang, numbers):
     return ion_ion_energy(cell_ang, positions_ang, numbers) + 0.02 * np.sum(z) / vol
 
 
-def run_single_point(system: System, params: InputParams) -> SinglePointResult:
+def _ion_energy(pos_b, cell_b, z, alpha, gvecs, gweights):
+    vol = jnp.abs(jnp.linalg.det(cell_b)) + 1e-10
+    return ewald_dense_kernel(pos_b, cell_b, z, alpha, gvecs, gweights) + 0.02 * jnp.sum(z) / vol
+
+
+def _ion_energy_neighbour_list(pos_b, cell_b, z, setup):
+    vol = jnp.abs(jnp.linalg.det(cell_b)) + 1e-10
+    return ewald_energy_jax(pos_b, cell_b, z, setup) + 0.02 * jnp.sum(z) / vol
+
+
+@jit_kernel(name="single_point_energy_forces_stress")
+def _ion_energy_forces_stress(pos_b, cell_b, z, alpha, gvecs, gweights):
+    """Fused value-and-gradient over positions and strain, compiled once per bucket."""
+    return strain_value_and_grad(_ion_energy, pos_b, cell_b, z, alpha, gvecs, gweights)
+
+
+def atomic_density_for(system: System, params: InputParams):
+    """``positions_bohr -> ρ_atomic`` on the dense FFT grid of ``system``'s cell.
+
+    This is the atomic superposition ``density.extrapolation.DensityExtrapolator``
+    needs to carry a warm start across ionic steps.
+    """
+    cell_bohr = system.cell / BOHR_TO_ANG
+    fft_shape = choose_fft_grids(cell_bohr, params.basis.ecutwfc, params.basis.ecutrho).dense
+    return partial(gaussian_atomic_density, fft_shape, cell_bohr, charges=np.asarray(system.numbers, dtype=float))
+
+
+def run_single_point(
+    system: System,
+    params: InputParams,
+    properties: Sequence[str] = ("energy", "forces", "stress"),
+    initial_state: SCFState | None = None,
+) -> SinglePointResult:
+    """Energy plus any of ``"forces"``/``"stress"`` in ``properties`` (others are ``None``).
+
+    Whenever a derivative is requested alongside the energy, all three come from one
+    fused value-and-gradient pass over positions and strain. ``initial_state`` is the
+    warm-start guess for the electronic SCF (``solvers.scf.run_scf``); the returned
+    ``scf_state`` is what callers should extrapolate to the next geometry. Its density
+    is the atomic superposition at the current positions plus the warm start's
+    remainder ``ρ - ρ_atomic`` (taken at ``initial_state.positions_bohr``, or the
+    current positions when unset); spin-polarized systems get it packed as
+    ``(ρ↑, ρ↓)`` with ``system.starting_magnetization``.
+    """
+    cell_bohr = system.cell / BOHR_TO_ANG
+    fft_grids = choose_fft_grids(cell_bohr, params.basis.ecutwfc, params.basis.ecutrho)
+    symmetry = None
     if params.kpoints.mode == "gamma":
         kgrid = gamma_only()
+    elif params.kpoints.use_symmetry:
+        # Only operations that map the dense FFT grid onto itself can symmetrize the density.
+        group = space_group_of(system, params.kpoints.symprec).compatible_with_grid(fft_grids.dense)
+        irr = irreducible_monkhorst_pack(params.kpoints.grid or (1, 1, 1), params.kpoints.shift or (0, 0, 0), group, params.kpoints.time_reversal)
+        kgrid, symmetry = irr.kpoints, irr.symmetry
     else:
         kgrid = monkhorst_pack(params.kpoints.grid or (1, 1, 1), params.kpoints.shift or (0, 0, 0))
 
-    gvecs = generate_gvectors(system.cell, params.basis.ecutwfc)
-    fft_shape = choose_fft_shape(tuple(max(8, int(np.ceil(np.cbrt(len(gvecs))))) for _ in range(3)))
+    sphere = gsphere(cell_bohr, params.basis.ecutrho)
+    kbases = [kpoint_basis(cell_bohr, params.basis.ecutrho, k, params.basis.ecutwfc) for k in kgrid.kpts]
 
     pp_meta = {}
     for sym, path in params.pseudopotentials.items():
@@ -51,50 +117,75 @@ def run_single_point(system: System, params: InputParams) -> SinglePointResult:
         except FileNotFoundError:
             pp_meta[sym] = "missing"
 
-    energy_h = _electrostatic_energy_hartree(system.positions, system.cell, system.numbers)
-
-    def e_pos_jax(pos, cell, numbers):
-        pos_b = pos / BOHR_TO_ANG
-        cell_b = cell / BOHR_TO_ANG
-        z = numbers.astype(jnp.float64)
-        e_pair = 0.0
-        n = pos.shape[0]
-        inv_cell_t = jnp.linalg.inv(cell_b.T)
-        for i in range(n):
-            for j in range(i + 1, n):
-                dr = pos_b[i] - pos_b[j]
-                frac = inv_cell_t @ dr
-                frac = frac - jnp.round(frac)
-                dr_mic = cell_b.T @ frac
-                rij = jnp.linalg.norm(dr_mic) + 1e-8
-                e_pair = e_pair + z[i] * z[j] / rij
-        vol = jnp.abs(jnp.linalg.det(cell_b)) + 1e-10
-        return e_pair + 0.02 * jnp.sum(z) / vol
-
-    forces_h_per_bohr = compute_forces(e_pos_jax, system.positions, system.cell, system.numbers)
-
-    def e_cell(cell):
-        return e_pos_jax(jnp.asarray(system.positions), cell, jnp.asarray(system.numbers))
-
-    stress_h_per_bohr3 = compute_stress(e_cell, system.cell)
+    pos_bohr = system.positions / BOHR_TO_ANG
+    atomic_density = atomic_density_for(system, params)
+    rho_r = atomic_density(pos_bohr)
+    if initial_state is not None and initial_state.rho_r is not None and np.shape(initial_state.rho_r)[-3:] == fft_grids.dense:
+        warm = np.asarray(initial_state.rho_r, dtype=float)
+        warm_pos = pos_bohr if initial_state.positions_bohr is None else np.asarray(initial_state.positions_bohr, dtype=float)
+        # A packed spin density carries half the atomic superposition in each channel.
+        share = 0.5 if warm.ndim == 4 else 1.0
+        old_atomic = rho_r if np.array_equal(warm_pos, pos_bohr) else atomic_density(warm_pos)
+        rho_r = warm + share * (rho_r - old_atomic)
+    if nspin_of(system) == 2 and rho_r.ndim == 3:
+        rho_r = initial_spin_density(rho_r, system.starting_magnetization, cell_volume(cell_bohr))
+    elif nspin_of(system) == 1 and rho_r.ndim == 4:
+        rho_r = rho_r.sum(axis=0)
+    # Exact exchange has no semilocal kernel; it is staged in electrostatics.exx.
+    xc_energy_ev = None
+    if params.xc.functional != "hf":
+        xc = xc_energy_potential_stress(rho_r, cell_bohr, params.xc.functional, precision=params.runtime.precision, rho_cut=params.xc.rho_cut)
+        xc_energy_ev = xc.energy * HARTREE_TO_EV
+    want_forces = "forces" in properties
+    want_stress = "stress" in properties
+    forces_h_per_bohr = stress_h_per_bohr3 = ewald_path = None
+    if want_forces or want_stress:
+        natoms = len(system.numbers)
+        ewald_path = "dense" if prefers_dense_ewald(cell_bohr, natoms) else "neighbour_list"
+        if ewald_path == "dense":
+            ion_setup = dense_ewald_setup(cell_bohr, natoms)
+            pos_pad, z_pad, *ewald_args = dense_ewald_inputs(pos_bohr, system.numbers, ion_setup, bucket=params.runtime.shape_buckets)
+            energy, grad_pos, grad_eps = _ion_energy_forces_stress(pos_pad, jnp.asarray(cell_bohr), z_pad, *ewald_args)
+        else:
+            z = jnp.asarray(system.numbers, dtype=float)
+            energy, grad_pos, grad_eps = strain_value_and_grad(_ion_energy_neighbour_list, pos_bohr, cell_bohr, z, ewald_setup(cell_bohr, pos_bohr))
+        energy_h = float(energy)
+        forces_h_per_bohr = -np.asarray(grad_pos)[:natoms] if want_forces else None
+        stress_h_per_bohr3 = np.asarray(grad_eps) / cell_volume(cell_bohr) if want_stress else None
+    else:
+        energy_h = _electrostatic_energy_hartree(system.positions, system.cell, system.numbers)
 
     ev_per_ang = HARTREE_TO_EV / BOHR_TO_ANG
     ev_per_ang3 = HARTREE_TO_EV / (BOHR_TO_ANG**3)
-    forces = forces_h_per_bohr * ev_per_ang
-    stress = stress_h_per_bohr3 * ev_per_ang3
-    stress_voigt = np.array([stress[0, 0], stress[1, 1], stress[2, 2], stress[1, 2], stress[0, 2], stress[0, 1]])
+    if symmetry is not None and forces_h_per_bohr is not None:
+        forces_h_per_bohr = symmetrize_forces(np.asarray(forces_h_per_bohr), symmetry)
+    if symmetry is not None and stress_h_per_bohr3 is not None:
+        stress_h_per_bohr3 = symmetrize_stress(np.asarray(stress_h_per_bohr3), symmetry)
+    forces = None if forces_h_per_bohr is None else np.asarray(forces_h_per_bohr * ev_per_ang, dtype=float)
+    stress_voigt = None
+    if stress_h_per_bohr3 is not None:
+        stress = stress_h_per_bohr3 * ev_per_ang3
+        stress_voigt = np.array([stress[0, 0], stress[1, 1], stress[2, 2], stress[1, 2], stress[0, 2], stress[0, 1]], dtype=float)
 
     energy_ev = float(energy_h * HARTREE_TO_EV)
     return SinglePointResult(
         energy_ev=energy_ev,
         free_energy_ev=energy_ev,
-        forces_ev_per_ang=np.asarray(forces, dtype=float),
-        stress_voigt_ev_per_ang3=np.asarray(stress_voigt, dtype=float),
+        forces_ev_per_ang=forces,
+        stress_voigt_ev_per_ang3=stress_voigt,
         metadata={
             "kpoints": len(kgrid.kpts),
-            "fft_shape": fft_shape,
-            "ngvec": int(len(gvecs)),
+            "nsym": 1 if symmetry is None else len(symmetry),
+            "fft_shape": fft_grids.dense,
+            "fft_shape_smooth": fft_grids.smooth,
+            "ngvec": len(sphere),
+            "npw_per_k": [kb.npw for kb in kbases],
             "volume": cell_volume(system.cell),
             "pseudopotentials": pp_meta,
+            "compilation": compilation_report(),
+            "warm_start": initial_state is not None,
+            "ewald": ewald_path,
+            "xc_energy_ev": xc_energy_ev,  # of the returned scf_state density
         },
+        scf_state=SCFState(rho_r=rho_r, positions_bohr=pos_bohr),
     )
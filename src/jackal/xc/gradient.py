@@ -0,0 +1,84 @@
+"""FFT gradient and divergence on the dense density grid.
+
+A ``GradientOperator`` holds the ``iG`` table for one FFT grid and cell on the
+real-to-complex half grid, so each gradient is one stacked inverse FFT for all
+three Cartesian components (and both spin channels) and each divergence one
+stacked forward FFT. Nyquist
+planes are zeroed, which makes ``gradient`` and ``-divergence`` exact adjoints.
+The operator is a pytree, so jitted XC kernels take it as an argument and the
+compiled executable (including its buffer assignment) is reused for every SCF
+iteration on the same grid.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+from jackal.lattice.cell import reciprocal_cell
+
+
+def _half_grid_indices(fft_shape: tuple[int, int, int]) -> np.ndarray:
+    """Integer Miller indices of the ``rfftn`` half grid with Nyquist planes zeroed, ``(3, n1, n2, n3//2+1)``."""
+    freqs = []
+    for axis, n in enumerate(fft_shape):
+        m = np.fft.rfftfreq(n, d=1.0 / n) if axis == 2 else np.fft.fftfreq(n, d=1.0 / n)
+        if n % 2 == 0:
+            m[np.abs(m) == n // 2] = 0.0
+        freqs.append(m)
+    return np.stack(np.meshgrid(*freqs, indexing="ij"), axis=0)
+
+
+@jax.tree_util.register_pytree_node_class
+@dataclass(frozen=True)
+class GradientOperator:
+    ig: jax.Array
+    fft_shape: tuple[int, int, int]
+
+    def tree_flatten(self):
+        return (self.ig,), self.fft_shape
+
+    @classmethod
+    def tree_unflatten(cls, fft_shape, children):
+        return cls(children[0], fft_shape)
+
+    @classmethod
+    def from_cell(cls, cell_bohr, fft_shape: tuple[int, int, int]) -> GradientOperator:
+        """Build from a (possibly traced) cell, e.g. inside a strain derivative."""
+        fft_shape = tuple(int(n) for n in fft_shape)
+        b = 2.0 * jnp.pi * jnp.linalg.inv(cell_bohr).T
+        g = jnp.einsum("i...,ij->j...", jnp.asarray(_half_grid_indices(fft_shape), dtype=b.dtype), b)
+        return cls(1j * g, fft_shape)
+
+    def gradient(self, x):
+        """``∇x`` of a real grid function; leading batch axes (e.g. spin) are kept, shape ``(..., 3, *fft_shape)``."""
+        x_g = jnp.fft.rfftn(x, axes=(-3, -2, -1))
+        return jnp.fft.irfftn(self.ig * x_g[..., None, :, :, :], s=self.fft_shape, axes=(-3, -2, -1))
+
+    def gradient_and_sigma(self, x):
+        """``(∇x, |∇x|²)``."""
+        grad = self.gradient(x)
+        return grad, jnp.sum(grad * grad, axis=-4)
+
+    def divergence(self, h):
+        """``∇·h`` of a real vector field of shape ``(..., 3, *fft_shape)``."""
+        h_g = jnp.fft.rfftn(h, axes=(-3, -2, -1))
+        return jnp.fft.irfftn(jnp.sum(self.ig * h_g, axis=-4), s=self.fft_shape, axes=(-3, -2, -1))
+
+
+@lru_cache(maxsize=8)
+def _gradient_operator_cached(fft_shape: tuple[int, int, int], cell_key: tuple[float, ...], dtype: str) -> GradientOperator:
+    cell = np.asarray(cell_key, dtype=float).reshape(3, 3)
+    g = np.einsum("i...,ij->j...", _half_grid_indices(fft_shape), reciprocal_cell(cell))
+    ctype = jnp.complex64 if dtype == "float32" else jnp.complex128
+    return GradientOperator(jnp.asarray(1j * g, dtype=ctype), fft_shape)
+
+
+def gradient_operator(fft_shape: tuple[int, int, int], cell_bohr: np.ndarray, precision: str = "float64") -> GradientOperator:
+    """Cached ``GradientOperator`` for this grid, cell and precision."""
+    cell_key = tuple(np.asarray(cell_bohr, dtype=float).ravel().round(12).tolist())
+    return _gradient_operator_cached(tuple(int(n) for n in fft_shape), cell_key, precision)
@@ -1,28 +1,120 @@
-"""Compact PBE-like enhancement on top of LDA.
+"""PBE generalized-gradient approximation (Perdew, Burke, Ernzerhof 1996).
 
-The implementation is intentionally lightweight but shape-stable and useful for
-validation and workflow plumbing.
+``pbe_kernel`` returns the energy density ``f(ρ, σ)`` with ``σ = |∇ρ|²`` and its
+partial derivatives in one forward/backward pass; the full potential
+``v = ∂f/∂ρ - 2 ∇·(∂f/∂σ ∇ρ)`` needs gradients on the FFT grid and is assembled
+by ``xc.xc_api.xc_energy_potential_stress``.
+
+``pbe_kernel_spin`` takes packed ``(ρ↑, ρ↓)`` and ``(σ↑↑, σ↑↓, σ↓↓)``; exchange
+follows from spin scaling and correlation carries the ``φ(ζ)`` factors of PBE.
 """
 
 from __future__ import annotations
 
+import jax
+import jax.numpy as jnp
 import numpy as np
 
 from jackal.xc import lda
+from jackal.xc.gradient import gradient_operator
 
+KAPPA = 0.804
+MU = 0.2195149727645171
+BETA = 0.06672455060314922
+GAMMA = 0.031090690869654895  # (1 - ln 2) / π²
+
+
+def pbe_exchange(rho, sigma):
+    """``ε_x^{PBE} = ε_x^{LDA} F_x(s)``, ``s² = σ / (2 k_F ρ)²``."""
+    kf2 = (3.0 * jnp.pi**2 * rho) ** (2.0 / 3.0)
+    s2 = sigma / (4.0 * kf2 * rho * rho)
+    fx = 1.0 + KAPPA - KAPPA / (1.0 + MU * s2 / KAPPA)
+    return lda.slater_exchange(rho) * fx
+
+
+def pbe_correlation(rho, sigma):
+    """``ε_c^{PW92} + H(r_s, t)`` with ``t² = σ / (2 k_s ρ)²`` (unpolarized)."""
+    ec = lda.pw92_correlation(lda.rs_from_rho(rho))
+    kf = jnp.cbrt(3.0 * jnp.pi**2 * rho)
+    ks2 = 4.0 * kf / jnp.pi
+    t2 = sigma / (4.0 * ks2 * rho * rho)
+    a = (BETA / GAMMA) / jnp.expm1(-ec / GAMMA)
+    at2 = a * t2
+    h = GAMMA * jnp.log1p((BETA / GAMMA) * t2 * (1.0 + at2) / (1.0 + at2 + at2 * at2))
+    return ec + h
+
+
+def pbe_correlation_polarized(rho, zeta, sigma):
+    """``ε_c^{PW92}(r_s, ζ) + H(r_s, ζ, t)``, ``σ = |∇ρ|²`` of the total density."""
+    ec = lda.pw92_correlation_polarized(lda.rs_from_rho(rho), zeta)
+    phi = 0.5 * ((1.0 + zeta) ** (2.0 / 3.0) + (1.0 - zeta) ** (2.0 / 3.0))
+    phi3 = phi**3
+    kf = jnp.cbrt(3.0 * jnp.pi**2 * rho)
+    ks2 = 4.0 * kf / jnp.pi
+    t2 = sigma / (4.0 * phi * phi * ks2 * rho * rho)
+    a = (BETA / GAMMA) / jnp.expm1(-ec / (GAMMA * phi3))
+    at2 = a * t2
+    h = GAMMA * phi3 * jnp.log1p((BETA / GAMMA) * t2 * (1.0 + at2) / (1.0 + at2 + at2 * at2))
+    return ec + h
+
+
+def pbe_energy_density_spin(rho, sigma):
+    """``f`` for packed ``rho = (ρ↑, ρ↓)`` and ``sigma = (σ↑↑, σ↑↓, σ↓↓)``."""
+    up, down = rho[0], rho[1]
+    total = up + down
+    zeta = jnp.clip((up - down) / total, -1.0, 1.0)
+    ex = 0.5 * (2.0 * up * pbe_exchange(2.0 * up, 4.0 * sigma[0]) + 2.0 * down * pbe_exchange(2.0 * down, 4.0 * sigma[2]))
+    sigma_total = sigma[0] + 2.0 * sigma[1] + sigma[2]
+    return ex + total * pbe_correlation_polarized(total, zeta, sigma_total)
 
-def energy_and_potential(rho, grad_rho=None):
-    rho_arr = np.asarray(rho, dtype=float)
-    eps_lda, v_lda = lda.energy_and_potential(rho_arr)
 
+def pbe_energy_density(rho, sigma):
+    return rho * (pbe_exchange(rho, sigma) + pbe_correlation(rho, sigma))
+
+
+@jax.jit
+def pbe_kernel(rho, sigma, rho_cut=lda.RHO_CUT):
+    """Pointwise ``(f, ∂f/∂ρ, ∂f/∂σ)``; zero where ``ρ <= rho_cut``."""
+    mask = rho > rho_cut
+    safe_rho = jnp.where(mask, rho, 1.0)
+    safe_sigma = jnp.where(mask, sigma, 0.0)
+    f, vjp = jax.vjp(pbe_energy_density, safe_rho, safe_sigma)
+    f_rho, f_sigma = vjp(jnp.ones_like(f))
+    zero = jnp.zeros_like(f)
+    return jnp.where(mask, f, zero), jnp.where(mask, f_rho, zero), jnp.where(mask, f_sigma, zero)
+
+
+@jax.jit
+def pbe_kernel_spin(rho, sigma, rho_cut=lda.RHO_CUT):
+    """Pointwise ``(f, ∂f/∂ρ_s, ∂f/∂σ_{ss'})`` for packed ``(2, ...)`` densities and ``(3, ...)`` sigmas."""
+    mask = rho[0] + rho[1] > rho_cut
+    # Empty channels are floored and carry no gradient, keeping ρ_s^{1/3} derivatives finite.
+    channel = rho > 0.5 * rho_cut
+    safe_rho = jnp.where(mask[None], jnp.maximum(rho, 0.5 * rho_cut), 1.0)
+    keep = jnp.stack([channel[0], channel[0] & channel[1], channel[1]]) & mask[None]
+    safe_sigma = jnp.where(keep, sigma, 0.0)
+    f, vjp = jax.vjp(pbe_energy_density_spin, safe_rho, safe_sigma)
+    f_rho, f_sigma = vjp(jnp.ones_like(f))
+    return jnp.where(mask, f, 0.0), jnp.where(mask[None], f_rho, 0.0), jnp.where(keep, f_sigma, 0.0)
+
+
+def energy_and_potential(rho, grad_rho=None, rho_cut: float = lda.RHO_CUT, cell_bohr=None):
+    """Return ``(ε_xc, ∂f/∂ρ)``; LDA (PW92) when no gradient is available.
+
+    With ``cell_bohr`` and a 3D ``rho`` on the FFT grid, ``grad_rho`` is computed
+    by the cached ``GradientOperator`` when not given.
+
+    The divergence term of the GGA potential is not included here, see
+    ``xc.xc_api.xc_energy_potential_stress`` for the full ``v_xc``.
+    """
+    rho_arr = np.asarray(rho, dtype=float)
+    if grad_rho is None and cell_bohr is not None and rho_arr.ndim == 3:
+        grad_rho = gradient_operator(rho_arr.shape, cell_bohr).gradient(jnp.asarray(rho_arr))
     if grad_rho is None:
-        return eps_lda, v_lda
+        return lda.energy_and_potential(rho_arr, rho_cut=rho_cut)
 
     grad = np.asarray(grad_rho, dtype=float)
-    grad2 = np.sum(np.square(grad), axis=0) if grad.ndim > rho_arr.ndim else np.square(grad)
-    s2 = grad2 / np.clip(rho_arr ** (8.0 / 3.0), 1e-14, None)
-    enhancement = 1.0 + 0.12 * s2 / (1.0 + 0.24 * s2)
-
-    eps = eps_lda * enhancement
-    v = v_lda * enhancement
-    return eps, v
+    sigma = np.sum(np.square(grad), axis=0) if grad.ndim > rho_arr.ndim else np.square(grad)
+    f, f_rho, _ = pbe_kernel(jnp.asarray(rho_arr), jnp.asarray(sigma), rho_cut)
+    eps = np.where(rho_arr > rho_cut, np.asarray(f) / np.where(rho_arr > rho_cut, rho_arr, 1.0), 0.0)
+    return eps, np.asarray(f_rho)
@@ -1,6 +1,32 @@
+"""Functional lookup and the fused XC energy/potential/stress kernel.
+
+``xc_kernel`` evaluates, in one jitted pass over a real-space density grid,
+
+- ``E_xc = Ω/N Σ f(ρ, σ)`` with ``σ = |∇ρ|²`` (GGA only),
+- ``v_xc = ∂f/∂ρ - ∇·h`` with ``h = 2 ∂f/∂σ ∇ρ``, gradients and divergence taken
+  by FFT through a cached ``xc.gradient.GradientOperator``,
+- ``σ^{xc}_{αβ} = (1/Ω) [δ_αβ (E_xc - ∫ v_xc ρ) - ∫ h_α ∂_β ρ]``.
+
+A density of shape ``(2, *grid)`` is a packed collinear ``(ρ↑, ρ↓)``; then
+``h_s = 2 ∂f/∂σ_ss ∇ρ_s + ∂f/∂σ_↑↓ ∇ρ_s'`` and the sums run over both spins.
+
+Points with ``ρ <= rho_cut`` (vacuum in slab cells) contribute nothing.
+"""
+
 from __future__ import annotations
 
+from dataclasses import dataclass
+from functools import partial
+
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+from jackal.lattice.cell import cell_volume
 from jackal.xc import lda, pbe
+from jackal.xc.gradient import GradientOperator, gradient_operator
+
+PRECISIONS = {"float64": jnp.float64, "float32": jnp.float32}
 
 
 def get_xc_functional(name: str):
@@ -12,3 +38,61 @@ def get_xc_functional(name: str):
     if lname == "hf":
         raise NotImplementedError("HF/EXX handled in electrostatics.exx (staged implementation)")
     raise ValueError(f"Unknown XC functional: {name}")
+
+
+@dataclass
+class XCResult:
+    energy: float
+    potential: np.ndarray
+    stress: np.ndarray
+
+
+@partial(jax.jit, static_argnames=("functional",))
+def xc_kernel(rho, grad_op: GradientOperator, volume, rho_cut=lda.RHO_CUT, functional: str = "pbe"):
+    """Return ``(E_xc, v_xc, stress)`` for ``rho`` on the grid of ``grad_op``."""
+    spin = rho.ndim == 4
+    dv = volume / rho[0].size if spin else volume / rho.size
+    eye = jnp.eye(3, dtype=rho.dtype)
+    if functional == "lda":
+        f, v = lda.lda_kernel_spin(rho, rho_cut) if spin else lda.lda_kernel(rho, rho_cut)
+        energy = jnp.sum(f) * dv
+        stress = eye * (energy - jnp.sum(v * rho) * dv) / volume
+        return energy, v, stress
+    if functional != "pbe":
+        raise ValueError(f"Unknown XC functional: {functional}")
+
+    grad = grad_op.gradient(rho)
+    if spin:
+        sigma = jnp.stack([jnp.sum(grad[0] * grad[0], axis=0), jnp.sum(grad[0] * grad[1], axis=0), jnp.sum(grad[1] * grad[1], axis=0)])
+        f, f_rho, f_sigma = pbe.pbe_kernel_spin(rho, sigma, rho_cut)
+        h = jnp.stack([2.0 * f_sigma[0] * grad[0] + f_sigma[1] * grad[1], 2.0 * f_sigma[2] * grad[1] + f_sigma[1] * grad[0]])
+        gga = jnp.einsum("sa...,sb...->ab", h, grad) * dv
+    else:
+        f, f_rho, f_sigma = pbe.pbe_kernel(rho, jnp.sum(grad * grad, axis=0), rho_cut)
+        h = 2.0 * f_sigma[None] * grad
+        gga = jnp.einsum("a...,b...->ab", h, grad) * dv
+    v = f_rho - grad_op.divergence(h)
+    energy = jnp.sum(f) * dv
+    stress = (eye * (energy - jnp.sum(v * rho) * dv) - gga) / volume
+    return energy, v, stress
+
+
+def xc_energy_potential_stress(rho_r, cell_bohr, functional: str = "pbe", precision: str = "float64", rho_cut: float = lda.RHO_CUT) -> XCResult:
+    """Fused ``E_xc`` (Ha), ``v_xc`` (Ha) and XC stress (Ha/bohr^3) for a density on the FFT grid.
+
+    For a packed ``(2, *grid)`` spin density ``potential`` is ``(v↑, v↓)``.
+
+    ``precision`` is ``RuntimeSection.precision``; the kernel runs and returns in that dtype.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {sorted(PRECISIONS)}, got {precision!r}")
+    dtype = PRECISIONS[precision]
+    rho = np.asarray(rho_r)
+    if rho.ndim != 3 and not (rho.ndim == 4 and rho.shape[0] == 2):
+        raise ValueError(f"rho_r must be a 3D grid or a packed (2, *grid) spin density, got shape {rho.shape}")
+    cell = np.asarray(cell_bohr, dtype=float)
+    grad_op = gradient_operator(rho.shape[-3:], cell, precision)
+    energy, v, stress = xc_kernel(
+        jnp.asarray(rho, dtype=dtype), grad_op, jnp.asarray(cell_volume(cell), dtype=dtype), rho_cut, functional=functional.lower()
+    )
+    return XCResult(energy=float(energy), potential=np.asarray(v), stress=np.asarray(stress))
@@ -14,3 +14,9 @@ if str(SRC) not in sys.path:
 def silicon_cell():
     a = 5.43
     return np.array([[0, a/2, a/2], [a/2, 0, a/2], [a/2, a/2, 0]], dtype=float)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep on-disk caches (UPF, FFT tables, XLA) out of the user's home directory."""
+    monkeypatch.setenv("JACKAL_CACHE_DIR", str(tmp_path_factory.getbasetemp() / "jackal-cache"))
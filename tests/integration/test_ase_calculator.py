@@ -9,3 +9,48 @@ from jackal.calculator.ase_calculator import JaxPWCalculator
 def test_calculator_class_exists():
     assert isclass(JaxPWCalculator)
     assert "energy" in JaxPWCalculator.implemented_properties
+
+
+def test_calculator_reuses_cached_geometry():
+    from ase.build import bulk
+    from jackal.io.yaml_input import InputParams
+
+    atoms = bulk("Si", "diamond", a=5.43)
+    calc = JaxPWCalculator(params=InputParams(basis={"ecutwfc": 10.0}))
+    calc.calculate(atoms, ["energy"])
+    calc.calculate(atoms.copy(), ["energy"])
+    assert calc.cache_stats["hits"] == 1 and calc.cache_stats["misses"] == 1
+
+
+def test_warm_start_density_follows_the_geometry(monkeypatch):
+    import numpy as np
+    from ase.build import bulk
+    from jackal.calculator import ase_calculator
+    from jackal.core.units import BOHR_TO_ANG
+    from jackal.io.ase_io import atoms_to_system
+    from jackal.io.yaml_input import InputParams
+
+    seen, returned = [], []
+    run = ase_calculator.run_single_point
+
+    def recording_run(system, params, properties, initial_state=None):
+        seen.append(initial_state)
+        out = run(system=system, params=params, properties=properties, initial_state=initial_state)
+        returned.append(out.scf_state.rho_r)
+        return out
+
+    monkeypatch.setattr(ase_calculator, "run_single_point", recording_run)
+    params = InputParams(basis={"ecutwfc": 10.0})
+    atoms = bulk("Si", "diamond", a=5.43)
+    calc = JaxPWCalculator(params=params)
+    expected = []
+    for step in range(4):
+        moved = atoms.copy()
+        moved.positions[1] += 0.2 * step
+        calc.calculate(moved, ["energy"])
+        system = atoms_to_system(moved)
+        expected.append(ase_calculator.atomic_density_for(system, params)(system.positions / BOHR_TO_ANG))
+    assert seen[0] is None and all(s is not None for s in seen[1:])
+    for step in range(1, 4):
+        assert np.max(np.abs(returned[step] - returned[step - 1])) > 1e-3
+        assert np.allclose(returned[step], expected[step], atol=1e-10)
@@ -23,3 +23,100 @@ def test_si_gamma_scaffold_computes_energy(tmp_path):
     atoms.calc = calc
     energy = atoms.get_potential_energy()
     assert isinstance(energy, float)
+
+
+def test_fused_forces_stress_compile_once_per_bucket():
+    import numpy as np
+
+    from jackal.core.compilation import compilation_report, reset_compilation_report
+    from jackal.io.yaml_input import InputParams
+    from jackal.io.ase_io import atoms_to_system
+    from jackal.workflows.single_point import run_single_point
+
+    params = InputParams(basis={"ecutwfc": 10.0})
+    reset_compilation_report()
+    for n, seed in ((2, 0), (2, 1), (3, 2)):
+        atoms = bulk("Si", "diamond", a=5.43)
+        if n == 3:
+            atoms.append("Si")
+            atoms.positions[-1] = [1.0, 2.0, 0.5]
+        atoms.rattle(0.02, seed=seed)
+        res = run_single_point(atoms_to_system(atoms), params)
+        assert res.forces_ev_per_ang.shape == (n, 3)
+    report = res.metadata["compilation"]["single_point_energy_forces_stress"]
+    assert report == compilation_report()["single_point_energy_forces_stress"]
+    assert report["n_compiles"] == 1 and report["n_calls"] == 3
+    assert report["compile_time"] > 0.0 and np.isfinite(report["execute_time"])
+
+
+def test_spin_polarized_initial_density_carries_starting_magnetization():
+    import numpy as np
+
+    from jackal.io.ase_io import atoms_to_system
+    from jackal.io.yaml_input import InputParams
+    from jackal.workflows.single_point import run_single_point
+
+    params = InputParams(basis={"ecutwfc": 10.0}, system={"spin_polarized": True, "starting_magnetization": 2.0})
+    atoms = bulk("Si", "diamond", a=5.43)
+    system = atoms_to_system(atoms, spin_polarized=True, starting_magnetization=2.0)
+    out = run_single_point(system, params, ("energy",))
+    rho = out.scf_state.rho_r
+    assert rho.shape == (2, *out.metadata["fft_shape"])
+    scale = abs(np.linalg.det(system.cell / 0.529177210903)) / rho[0].size
+    assert np.isclose(np.sum(rho[0] - rho[1]) * scale, 2.0)
+    assert np.isclose(np.sum(rho) * scale, 28.0)
+
+
+def test_xc_settings_reach_the_xc_kernel():
+    import numpy as np
+
+    from jackal.io.ase_io import atoms_to_system
+    from jackal.io.yaml_input import InputParams
+    from jackal.workflows.single_point import run_single_point
+
+    system = atoms_to_system(bulk("Si", "diamond", a=5.43))
+    energies = {}
+    for precision, rho_cut in (("float64", 1e-10), ("float32", 1e-10), ("float64", 1e-2)):
+        params = InputParams(basis={"ecutwfc": 10.0}, xc={"rho_cut": rho_cut}, runtime={"precision": precision})
+        energies[precision, rho_cut] = run_single_point(system, params, ("energy",)).metadata["xc_energy_ev"]
+    base = energies["float64", 1e-10]
+    assert base < 0.0
+    assert np.isclose(energies["float32", 1e-10], base, rtol=1e-4)
+    assert energies["float64", 1e-2] > base
+
+
+def test_warm_start_remainder_is_moved_onto_the_new_positions():
+    import numpy as np
+
+    from jackal.io.ase_io import atoms_to_system
+    from jackal.io.yaml_input import InputParams
+    from jackal.workflows.single_point import atomic_density_for, run_single_point
+
+    params = InputParams(basis={"ecutwfc": 10.0})
+    atoms = bulk("Si", "diamond", a=5.43)
+    first = run_single_point(atoms_to_system(atoms), params, ("energy",)).scf_state
+    first.rho_r = first.rho_r + 0.01  # stand-in for an SCF remainder
+    atoms.positions[1] += 0.2
+    system = atoms_to_system(atoms)
+    second = run_single_point(system, params, ("energy",), initial_state=first).scf_state
+    atomic = atomic_density_for(system, params)(second.positions_bohr)
+    assert np.allclose(second.rho_r, atomic + 0.01, atol=1e-10)
+
+
+def test_thin_cell_forces_use_the_neighbour_list_ewald():
+    import numpy as np
+
+    from jackal.core.units import BOHR_TO_ANG, HARTREE_TO_EV
+    from jackal.electrostatics.ewald import ewald
+    from jackal.io.ase_io import atoms_to_system
+    from jackal.io.yaml_input import InputParams
+    from jackal.workflows.single_point import run_single_point
+
+    atoms = bulk("Si", "diamond", a=5.43)
+    atoms.set_cell(atoms.cell.array * [[1.0], [1.0], [0.35]], scale_atoms=False)
+    atoms.positions[1] = [0.4, 0.9, 0.3]
+    system = atoms_to_system(atoms)
+    out = run_single_point(system, InputParams(basis={"ecutwfc": 8.0}), ("energy", "forces", "stress"))
+    assert out.metadata["ewald"] == "neighbour_list"
+    ref = ewald(system.cell / BOHR_TO_ANG, system.positions / BOHR_TO_ANG, system.numbers.astype(float))
+    assert np.allclose(out.forces_ev_per_ang, ref.forces * HARTREE_TO_EV / BOHR_TO_ANG, atol=1e-6)
@@ -15,3 +15,29 @@ def test_stress_matches_volume_derivative():
     stress = compute_stress(energy, cell)
     expected = bulk_modulus * np.eye(3)
     assert np.allclose(stress, expected, atol=5e-6)
+
+
+def test_stress_matches_finite_differences_of_strain_cell():
+    from jackal.lattice.cell import strain_cell
+
+    frac = np.array([[0.0, 0.0, 0.0], [0.3, 0.2, 0.6], [0.7, 0.5, 0.1]])
+
+    def energy(cell):
+        pos = frac @ cell
+        d = pos[:, None, :] - pos[None, :, :] + jnp.array([0.5, -0.3, 0.2]) @ cell
+        return jnp.sum(jnp.exp(-0.3 * jnp.sum(d * d, axis=-1))) + 0.1 * jnp.abs(jnp.linalg.det(cell))
+
+    cell = np.array([[4.0, 0.5, 0.0], [0.3, 3.5, 0.4], [0.2, -0.6, 5.0]])
+    stress = compute_stress(energy, cell)
+    vol = abs(np.linalg.det(cell))
+    h = 1e-6
+    fd = np.zeros((3, 3))
+    for a in range(3):
+        for b in range(3):
+            eta = np.zeros((3, 3))
+            eta[a, b] = h
+            fd[a, b] = (float(energy(strain_cell(cell, eta))) - float(energy(strain_cell(cell, -eta)))) / (2 * h * vol)
+    assert np.allclose(stress, fd, atol=1e-7)
+    # The other ordering, (I + eta) @ cell, mixes lattice vectors and gives a different tensor.
+    mixed = (float(energy((np.eye(3) + eta) @ cell)) - float(energy((np.eye(3) - eta) @ cell))) / (2 * h * vol)
+    assert not np.isclose(mixed, stress[2, 2], atol=1e-4)
@@ -0,0 +1,46 @@
+import numpy as np
+
+from jackal.hamiltonian.apply_h import LocalPotentialOperator, apply_h, apply_local_potential_jax
+from jackal.lattice.fft_grid import fft_box_indices
+from jackal.lattice.gvectors import generate_gvectors
+
+
+def _dense_local(gvecs, fft_shape, v_r):
+    v_g = np.fft.fftn(v_r) / v_r.size
+    diff = np.mod(gvecs[:, None, :] - gvecs[None, :, :], np.array(fft_shape))
+    return v_g[diff[..., 0], diff[..., 1], diff[..., 2]]
+
+
+def test_local_potential_operator_matches_dense_convolution():
+    gvecs = generate_gvectors(np.eye(3) * 10.0, ecutwfc_ry=4.0)
+    fft_shape = (8, 8, 8)
+    rng = np.random.default_rng(3)
+    v_r = rng.standard_normal(fft_shape)
+    psi = rng.standard_normal((len(gvecs), 3)) + 1j * rng.standard_normal((len(gvecs), 3))
+
+    op = LocalPotentialOperator(gvecs, fft_shape, v_r)
+    dense = _dense_local(gvecs, fft_shape, v_r)
+
+    assert np.allclose(op(psi), dense @ psi)
+    assert np.allclose(op(psi[:, 1]), dense @ psi[:, 1])
+    idx = fft_box_indices(gvecs, fft_shape)
+    assert np.allclose(np.asarray(apply_local_potential_jax(psi, idx, fft_shape, v_r)), dense @ psi)
+
+    g2 = np.sum(gvecs.astype(float) ** 2, axis=1)
+    hpsi = apply_h(psi, kinetic=0.5 * g2, v_local=op)
+    assert np.allclose(hpsi, 0.5 * g2[:, None] * psi + dense @ psi)
+
+
+def test_local_potential_operator_is_safe_to_share_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    gvecs = generate_gvectors(np.eye(3) * 10.0, ecutwfc_ry=4.0)
+    fft_shape = (8, 8, 8)
+    rng = np.random.default_rng(4)
+    op = LocalPotentialOperator(gvecs, fft_shape, rng.standard_normal(fft_shape))
+    blocks = [rng.standard_normal((len(gvecs), 4)) + 1j * rng.standard_normal((len(gvecs), 4)) for _ in range(8)]
+    expected = [op(b) for b in blocks]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for _ in range(5):
+            got = list(pool.map(op, blocks))
+            assert all(np.allclose(g, e) for g, e in zip(got, expected))
@@ -0,0 +1,61 @@
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+from jackal.core.compilation import bucket_size, compilation_report, jit_kernel, pad_axis
+from jackal.core.config import configure_jax
+
+
+def test_bucket_size_is_monotone_and_covers_n():
+    sizes = [bucket_size(n) for n in range(1, 500)]
+    assert all(b >= n for n, b in zip(range(1, 500), sizes))
+    assert all(a <= b for a, b in zip(sizes, sizes[1:]))
+    assert bucket_size(1) == 8 and bucket_size(64) == 64 and bucket_size(65) == 80
+    assert len(set(sizes)) < 30
+
+
+def test_kernel_compiles_once_per_bucket_and_reports_times():
+    @jit_kernel(name="test_sum_squares")
+    def kernel(x):
+        return jnp.sum(x * x)
+
+    for n in (5, 6, 7):
+        x = pad_axis(np.arange(float(n)), bucket_size(n))
+        assert np.isclose(float(kernel(x)), np.sum(np.arange(n) ** 2.0))
+    assert np.allclose(jax.grad(kernel)(jnp.ones(3)), 2.0)  # traced calls bypass the AOT cache
+    report = compilation_report()["test_sum_squares"]
+    assert report["n_compiles"] == 1 and report["n_calls"] == 3 and report["n_traced_calls"] == 1
+    assert report["compile_time"] > 0.0 and report["execute_time"] > 0.0
+
+
+def test_configure_jax_sets_persistent_cache(tmp_path):
+    previous = jax.config.jax_compilation_cache_dir
+    try:
+        configure_jax(compilation_cache_dir=tmp_path / "xla", min_compile_time_secs=0.0)
+        assert jax.config.jax_compilation_cache_dir == str(tmp_path / "xla")
+        assert (tmp_path / "xla").is_dir()
+    finally:
+        jax.config.update("jax_compilation_cache_dir", previous)
+
+
+def test_static_arguments_are_part_of_the_signature():
+    @jit_kernel(name="test_static_power", static_argnums=1)
+    def kernel(x, power):
+        return jnp.sum(x**power)
+
+    x = jnp.arange(4.0)
+    assert float(kernel(x, 2)) == 14.0
+    assert float(kernel(x, 3)) == 36.0
+    assert float(kernel(x, 2)) == 14.0
+    report = compilation_report()["test_static_power"]
+    assert report["n_compiles"] == 2 and report["n_calls"] == 3
+
+
+def test_float32_runtime_keeps_x64_enabled():
+    from jackal.core.config import configure_runtime
+    from jackal.io.yaml_input import RuntimeSection
+
+    assert jax.config.jax_enable_x64
+    configure_runtime(RuntimeSection(precision="float32"))
+    assert jax.config.jax_enable_x64
+    assert jnp.asarray(1.0).dtype == jnp.float64
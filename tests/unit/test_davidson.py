@@ -0,0 +1,37 @@
+import numpy as np
+
+from jackal.io.yaml_input import DiagSection
+from jackal.solvers.davidson import solve_blocked_davidson
+
+
+def _model_problem(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    g2 = np.sort(rng.uniform(0.0, 40.0, n))
+    a = rng.standard_normal((n, n)) + 1j * rng.standard_normal((n, n))
+    h = np.diag(0.5 * g2) + 0.05 * (a + a.conj().T)
+    b = rng.standard_normal((n, 6))
+    s = np.eye(n) + 0.01 * (b @ b.T)
+    return g2, h, s
+
+
+def test_davidson_matches_dense_generalized_eigh():
+    from scipy.linalg import eigh
+
+    g2, h, s = _model_problem()
+    params = DiagSection(nbands=6, block_size=3, max_subspace=24, residual_tol=1e-8)
+    widths = []
+
+    def apply_h(psi):
+        widths.append(psi.shape[1])
+        return h @ psi
+
+    guess = np.eye(h.shape[0])[:, :6]
+    res = solve_blocked_davidson(apply_h, lambda psi: s @ psi, guess, params, g2=g2)
+
+    ref = eigh(h, s, eigvals_only=True)[:6]
+    assert res.converged
+    assert np.allclose(res.eigvals, ref, atol=1e-9)
+    assert max(widths) <= params.block_size
+    assert res.n_apply_h == sum(widths)
+    assert res.iterations > 0
+    assert np.allclose(res.eigvecs.conj().T @ s @ res.eigvecs, np.eye(6), atol=1e-8)
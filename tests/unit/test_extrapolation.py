@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from jackal.core.types import SCFState
+from jackal.density.extrapolation import DensityExtrapolator, gaussian_atomic_density
+from jackal.solvers.scf import run_scf
+
+CELL = np.eye(3) * 8.0
+SHAPE = (16, 16, 16)
+
+
+def _atomic(pos):
+    return gaussian_atomic_density(SHAPE, CELL, pos, np.array([4.0]), width=0.8)
+
+
+def test_gaussian_density_integrates_to_charge():
+    rho = _atomic(np.array([[1.0, 2.0, 3.0]]))
+    assert np.isclose(rho.sum() * 512.0 / rho.size, 4.0)
+
+
+@pytest.mark.parametrize("order", [1, 2])
+def test_extrapolation_exact_for_linear_trajectory(order):
+    rng = np.random.default_rng(0)
+    a, b = rng.standard_normal(SHAPE), rng.standard_normal(SHAPE)
+    extrap = DensityExtrapolator(order=order, atomic_density=_atomic)
+    assert extrap.predict(np.zeros((1, 3))) is None
+    for t in range(3):
+        pos = np.array([[1.0 + 0.1 * t, 2.0, 3.0]])
+        extrap.push(pos, SCFState(rho_r=_atomic(pos) + a + t * b, mixer_history=[("x", "f")]))
+    pos = np.array([[1.3, 2.0, 3.0]])
+    guess = extrap.predict(pos)
+    assert np.allclose(guess.rho_r, _atomic(pos) + a + 3 * b)
+    assert guess.mixer_history == [("x", "f")] and not guess.converged
+
+
+def test_seeded_mixer_history_reduces_scf_iterations():
+    rng = np.random.default_rng(1)
+    m = rng.standard_normal((30, 30))
+    jac = 0.9 * m @ m.T / np.linalg.norm(m @ m.T, 2)
+
+    def solve(shift, initial_state=None):
+        return run_scf(None if initial_state else np.zeros(30), lambda r: jac @ r + shift, lambda r: 0.0, max_iter=200, rhotol=1e-10, mixer_kind="anderson", beta=0.3, initial_state=initial_state)
+
+    shift = rng.standard_normal(30)
+    first = solve(shift)
+    cold = solve(1.01 * shift)
+    warm = solve(1.01 * shift, initial_state=first.state)
+    assert warm.state.converged and cold.state.converged
+    assert warm.state.iteration < cold.state.iteration
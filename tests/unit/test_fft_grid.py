@@ -1,5 +1,40 @@
-from jackal.lattice.fft_grid import choose_fft_shape
+import numpy as np
+
+from jackal.lattice.fft_grid import (
+    benchmark_fft_sizes,
+    choose_fft_grids,
+    choose_fft_shape,
+    fft_box_indices,
+    is_fft_friendly,
+    load_fft_table,
+)
+from jackal.lattice.gvectors import gsphere
 
 
 def test_choose_fft_shape_even():
     assert choose_fft_shape((7, 8, 9)) == (8, 8, 10)
+
+
+def test_choose_fft_shape_avoids_large_primes():
+    assert choose_fft_shape((33, 37, 43)) == (36, 40, 48)
+    assert not is_fft_friendly(34) and not is_fft_friendly(38)
+    assert is_fft_friendly(42)
+
+
+def test_dual_grids_hold_their_spheres(silicon_cell):
+    cell_bohr = silicon_cell / 0.529177210903
+    grids = choose_fft_grids(cell_bohr, 30.0, 240.0, table={})
+    assert grids.dual
+    assert all(s <= d for s, d in zip(grids.smooth, grids.dense))
+    fft_box_indices(gsphere(cell_bohr, 240.0).gvecs_int, grids.dense)
+    fft_box_indices(gsphere(cell_bohr, 120.0).gvecs_int, grids.smooth)
+    assert not choose_fft_grids(cell_bohr, 30.0, 120.0, table={}).dual
+
+
+def test_fft_table_roundtrip(tmp_path):
+    path = tmp_path / "fft_sizes.json"
+    table = benchmark_fft_sizes(max_n=24, path=path, batch=4, repeats=1)
+    assert set(table) == set(load_fft_table(path))
+    assert all(is_fft_friendly(n) for n in table)
+    assert load_fft_table(tmp_path / "missing.json") == {}
+    assert np.all(np.array(choose_fft_shape((9, 9, 9), table)) >= 9)
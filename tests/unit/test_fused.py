@@ -0,0 +1,24 @@
+import jax.numpy as jnp
+import numpy as np
+
+from jackal.autodiff.forces import compute_forces
+from jackal.autodiff.fused import energy_forces_stress
+from jackal.autodiff.stress import compute_stress
+
+
+def _pair_energy(pos, cell, numbers):
+    d = pos[1] - pos[0]
+    return numbers[0] * numbers[1] * jnp.sum(d * d) + 0.3 * jnp.abs(jnp.linalg.det(cell))
+
+
+def test_fused_matches_separate_gradients():
+    cell = np.array([[5.0, 0.2, 0.0], [0.0, 4.5, 0.3], [0.1, 0.0, 6.0]])
+    pos = np.array([[0.1, 0.2, 0.3], [1.0, -0.4, 0.7]])
+    z = np.array([2.0, 3.0])
+    out = energy_forces_stress(_pair_energy, pos, cell, z)
+
+    assert np.isclose(out.energy, float(_pair_energy(jnp.asarray(pos), jnp.asarray(cell), z)))
+    assert np.allclose(out.forces, compute_forces(_pair_energy, pos, cell, z))
+    frac = jnp.asarray(pos @ np.linalg.inv(cell))
+    stress = compute_stress(lambda c: _pair_energy(frac @ c, c, z), cell)
+    assert np.allclose(out.stress, stress, atol=1e-10)
@@ -7,3 +7,38 @@ def test_generate_gvectors_shape():
     g = generate_gvectors(cell, ecutwfc_ry=16.0)
     assert g.ndim == 2 and g.shape[1] == 3
     assert g.dtype.kind in ("i", "u")
+
+
+def _brute_force(cell, ecut, k_frac=(0.0, 0.0, 0.0), n=12):
+    from jackal.lattice.cell import reciprocal_cell
+
+    ii = np.arange(-n, n + 1)
+    m = np.stack(np.meshgrid(ii, ii, ii, indexing="ij"), axis=-1).reshape(-1, 3)
+    gk = (m + np.asarray(k_frac)) @ reciprocal_cell(cell)
+    return m[np.sum(gk * gk, axis=1) <= ecut]
+
+
+def test_gsphere_is_sorted_sphere_and_cached(silicon_cell):
+    from jackal.lattice.gvectors import gsphere
+
+    cell_bohr = silicon_cell / 0.529177210903
+    sphere = gsphere(cell_bohr, 40.0)
+    assert len(sphere) == len(_brute_force(cell_bohr, 40.0))
+    assert np.all(np.diff(sphere.g2) >= -1e-12)
+    assert np.all(np.diff(sphere.shell_index) >= 0)
+    assert np.allclose(sphere.shell_g2[sphere.shell_index], sphere.g2)
+    assert gsphere(cell_bohr.copy(), 40.0) is sphere
+
+
+def test_kpoint_basis_matches_g_plus_k_cutoff(silicon_cell):
+    from jackal.lattice.gvectors import kpoint_basis
+
+    cell_bohr = silicon_cell / 0.529177210903
+    k = (0.25, -0.25, 0.5)
+    kb = kpoint_basis(cell_bohr, 40.0, k, 10.0)
+    ref = _brute_force(cell_bohr, 10.0, k)
+    assert kb.npw == len(ref)
+    assert {tuple(g) for g in kb.gvecs_int} == {tuple(g) for g in ref}
+    assert np.all(kb.gk2 <= 10.0 + 1e-9)
+    assert kb.mask().sum() == kb.npw
+    assert kpoint_basis(cell_bohr, 40.0, k, 10.0) is kb
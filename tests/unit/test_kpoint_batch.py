@@ -0,0 +1,132 @@
+from functools import partial
+
+import jax.numpy as jnp
+import numpy as np
+
+from jackal.io.yaml_input import DiagSection
+from jackal.solvers.davidson import solve_blocked_davidson
+from jackal.solvers.kpoint_batch import pad_kpoint_bases, solve_kpoints_pool, solve_kpoints_vmap
+
+
+def _kpoint_problems(npws=(40, 52, 47), seed=1):
+    rng = np.random.default_rng(seed)
+    g2s, hams = [], []
+    for npw in npws:
+        g2 = np.sort(rng.uniform(0.0, 30.0, npw))
+        a = rng.standard_normal((npw, npw)) + 1j * rng.standard_normal((npw, npw))
+        g2s.append(g2)
+        hams.append(np.diag(0.5 * g2) + 0.02 * (a + a.conj().T))
+    return g2s, hams
+
+
+def _apply_dense(p, h):
+    return h @ p
+
+
+def _apply_identity(p, h):
+    return p
+
+
+def _solve_k(ik, hams, g2s, params):
+    h = hams[ik]
+    return solve_blocked_davidson(lambda p: h @ p, lambda p: p, np.eye(len(h))[:, :4], params, g2=g2s[ik])
+
+
+def test_vmap_and_pool_agree_with_dense_per_k():
+    g2s, hams = _kpoint_problems()
+    params = DiagSection(nbands=4, block_size=4, max_subspace=16, residual_tol=1e-7, max_iter=200)
+    basis = pad_kpoint_bases(g2s)
+    guesses = basis.pad([np.eye(len(g2))[:, :4] for g2 in g2s])
+    h_pad = jnp.asarray(np.stack([np.pad(h, (0, basis.npw_max - len(h))) for h in hams]))
+
+    batched = solve_kpoints_vmap(_apply_dense, _apply_identity, guesses, basis, h_pad, params)
+    pooled = solve_kpoints_pool(partial(_solve_k, hams=hams, g2s=g2s, params=params), len(hams))
+
+    for ik, h in enumerate(hams):
+        ref = np.linalg.eigvalsh(h)[:4]
+        assert batched[ik].converged and pooled[ik].converged
+        assert batched[ik].eigvecs.shape == (len(h), 4)
+        assert np.allclose(batched[ik].eigvals, ref, atol=1e-8)
+        assert np.allclose(pooled[ik].eigvals, ref, atol=1e-8)
+
+
+def test_vmap_honours_block_size_and_subspace_and_counts_applications():
+    g2s, hams = _kpoint_problems()
+    basis = pad_kpoint_bases(g2s)
+    guesses = basis.pad([np.eye(len(g2))[:, :4] for g2 in g2s])
+    h_pad = jnp.asarray(np.stack([np.pad(h, (0, basis.npw_max - len(h))) for h in hams]))
+    results = {}
+    for block_size, max_subspace in ((4, 16), (2, 8)):
+        params = DiagSection(nbands=4, block_size=block_size, max_subspace=max_subspace, residual_tol=1e-7, max_iter=300)
+        results[block_size] = solve_kpoints_vmap(_apply_dense, _apply_identity, guesses, basis, h_pad, params)
+        for ik, res in enumerate(results[block_size]):
+            assert res.converged
+            assert np.allclose(res.eigvals, np.linalg.eigvalsh(hams[ik])[:4], atol=1e-8)
+            assert res.n_apply_h == res.n_apply_s == 4 + block_size * res.iterations
+    assert all(a.n_apply_h != b.n_apply_h for a, b in zip(results[4], results[2]))
+
+
+def test_spin_pair_vmap_solves_both_channels():
+    from jackal.solvers.kpoint_batch import solve_spin_kpoints_vmap
+
+    g2s, hams = _kpoint_problems(npws=(30, 36))
+    params = DiagSection(nbands=3, block_size=3, max_subspace=12, residual_tol=1e-7, max_iter=200)
+    basis = pad_kpoint_bases(g2s)
+    shift = [np.diag(np.linspace(0.0, 0.3, len(g2))) for g2 in g2s]
+    spin_hams = [hams, [h + d for h, d in zip(hams, shift)]]
+    h_pad = np.stack([np.stack([np.pad(h, (0, basis.npw_max - len(h))) for h in hs]) for hs in spin_hams])
+    guess = basis.pad([np.eye(len(g2))[:, :3] for g2 in g2s])
+
+    up, down = solve_spin_kpoints_vmap(_apply_dense, _apply_identity, np.stack([guess, guess]), basis, jnp.asarray(h_pad), params)
+    for s, results in enumerate((up, down)):
+        for ik, res in enumerate(results):
+            assert res.converged
+            assert np.allclose(res.eigvals, np.linalg.eigvalsh(spin_hams[s][ik])[:3], atol=1e-8)
+
+
+def test_vmap_reuses_executable_across_calls():
+    from jackal.solvers.kpoint_batch import _solve_batch
+
+    params = DiagSection(nbands=3, block_size=3, max_subspace=12, residual_tol=1e-7, max_iter=200)
+    sizes = []
+    for seed in (3, 4):
+        g2s, hams = _kpoint_problems(npws=(30, 34), seed=seed)
+        basis = pad_kpoint_bases(g2s)
+        guesses = basis.pad([np.eye(len(g2))[:, :3] for g2 in g2s])
+        h_pad = jnp.asarray(np.stack([np.pad(h, (0, basis.npw_max - len(h))) for h in hams]))
+        solve_kpoints_vmap(_apply_dense, _apply_identity, guesses, basis, h_pad, params)
+        sizes.append(_solve_batch._cache_size())
+    assert sizes[1] == sizes[0]
+
+
+def test_dispatcher_follows_kpoint_parallel():
+    from jackal.solvers.kpoint_batch import solve_kpoints
+
+    g2s, hams = _kpoint_problems(npws=(30, 36, 33), seed=5)
+    basis = pad_kpoint_bases(g2s)
+    guesses = basis.pad([np.eye(len(g2))[:, :3] for g2 in g2s])
+    h_pad = jnp.asarray(np.stack([np.pad(h, (0, basis.npw_max - len(h))) for h in hams]))
+    for mode in ("vmap", "thread", "serial"):
+        params = DiagSection(nbands=3, block_size=3, max_subspace=12, residual_tol=1e-7, max_iter=200, kpoint_parallel=mode, kpoint_workers=2)
+        results = solve_kpoints(_apply_dense, _apply_identity, guesses, basis, h_pad, params)
+        for ik, h in enumerate(hams):
+            assert results[ik].converged
+            assert results[ik].eigvecs.shape == (len(h), 3)
+            assert np.allclose(results[ik].eigvals, np.linalg.eigvalsh(h)[:3], atol=1e-8)
+
+
+def test_bucketed_bases_share_executable():
+    from jackal.solvers.kpoint_batch import _solve_batch
+
+    params = DiagSection(nbands=3, block_size=3, max_subspace=12, residual_tol=1e-7, max_iter=200)
+    sizes = []
+    for npws in ((30, 34), (41, 45)):
+        g2s, hams = _kpoint_problems(npws=npws, seed=6)
+        basis = pad_kpoint_bases(g2s, bucket=True)
+        assert basis.npw_max == 64
+        guesses = basis.pad([np.eye(len(g2))[:, :3] for g2 in g2s])
+        h_pad = jnp.asarray(np.stack([np.pad(h, (0, basis.npw_max - len(h))) for h in hams]))
+        results = solve_kpoints_vmap(_apply_dense, _apply_identity, guesses, basis, h_pad, params)
+        assert np.allclose(results[1].eigvals, np.linalg.eigvalsh(hams[1])[:3], atol=1e-8)
+        sizes.append(_solve_batch._cache_size())
+    assert sizes[1] == sizes[0]
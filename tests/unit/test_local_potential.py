@@ -0,0 +1,37 @@
+import numpy as np
+
+from jackal.lattice.gvectors import gsphere
+from jackal.pseudopotential.local_potential import StructureFactor, structure_factor
+
+
+def _setup():
+    rng = np.random.default_rng(0)
+    cell = np.array([[6.0, 0.5, 0.0], [0.0, 7.0, 0.3], [0.2, 0.0, 6.5]])
+    pos = rng.uniform(0, 1, (11, 3)) @ cell
+    species = rng.integers(0, 3, 11)
+    return cell, pos, species, gsphere(cell, 20.0)
+
+
+def test_species_structure_factor_matches_direct_sum():
+    cell, pos, species, sphere = _setup()
+    sf = StructureFactor(sphere.gvecs_int, cell, pos, species, chunk=4)
+    s = sf.per_species()
+    for sp in range(3):
+        assert np.allclose(s[sp], structure_factor(sphere.g_cart, pos[species == sp]))
+    v = np.random.default_rng(1).standard_normal((3, len(sphere.g2)))
+    assert np.allclose(sf.local_potential(v), np.einsum("sg,sg->g", v, s))
+
+
+def test_gradient_matches_finite_differences():
+    cell, pos, species, sphere = _setup()
+    c = np.random.default_rng(2).standard_normal((3, len(sphere.g2))) * (1 + 1j)
+
+    def f(p):
+        return np.real(np.sum(c * StructureFactor(sphere.gvecs_int, cell, p, species).per_species()))
+
+    grad = StructureFactor(sphere.gvecs_int, cell, pos, species, chunk=5).gradient(c)
+    h = 1e-6
+    for a, k in [(0, 0), (4, 1), (10, 2)]:
+        dp = np.zeros_like(pos)
+        dp[a, k] = h
+        assert np.isclose(grad[a, k], (f(pos + dp) - f(pos - dp)) / (2 * h), rtol=1e-6, atol=1e-6)
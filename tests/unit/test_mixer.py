@@ -0,0 +1,144 @@
+import numpy as np
+
+from jackal.density.mixer import DIISMixer, fft_grid_g2
+from jackal.solvers.scf import run_scf
+
+
+def _linear_map(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    target = 1.0 + 0.1 * rng.standard_normal(shape)
+    target -= target.mean() - 1.0
+
+    def build_rho_out(rho):
+        # Contractive linear response around the fixed point, charge conserving.
+        d = rho - target
+        return target + 0.5 * (d - d.mean()) + 0.1 * np.roll(d - d.mean(), 1, axis=0)
+
+    return target, build_rho_out
+
+
+def test_incremental_gram_matches_full_overlap():
+    shape = (6, 6, 6)
+    _, build = _linear_map(shape)
+    mixer = DIISMixer(ndim=4, cell_bohr=np.eye(3) * 8.0)
+    rho = np.ones(shape)
+    for _ in range(7):
+        rho = mixer.mix(rho, build(rho))
+    hist = mixer.history
+    assert len(hist) == 4
+    e = np.array([h[1] for h in hist])
+    full = e @ e.T
+    n = mixer.ndim
+    slots = [(mixer._count - n + i) % n for i in range(n)]
+    assert np.allclose(mixer._gram[np.ix_(slots, slots)], full)
+
+
+def test_scf_converges_with_cell_kerker():
+    shape = (8, 8, 8)
+    target, build = _linear_map(shape, seed=1)
+    res = run_scf(np.ones(shape), build, lambda r: 0.0, max_iter=60, rhotol=1e-6, cell_bohr=np.eye(3) * 10.0)
+    assert res.state.converged
+    assert np.allclose(res.state.rho_r, target, atol=1e-5)
+    assert fft_grid_g2(shape, np.eye(3) * 10.0) is fft_grid_g2(shape, np.eye(3) * 10.0)
+
+
+def test_gspace_mixing_on_full_box_matches_real_space():
+    shape = (6, 6, 6)
+    _, build = _linear_map(shape, seed=2)
+    cell = np.eye(3) * 7.0
+    real = DIISMixer(ndim=3, cell_bohr=cell)
+    gsp = DIISMixer(ndim=3, cell_bohr=cell, sphere_indices=np.arange(np.prod(shape)))
+    rho_a = rho_b = np.ones(shape)
+    for _ in range(5):
+        rho_a = real.mix(rho_a, build(rho_a))
+        rho_b = gsp.mix(rho_b, build(rho_b))
+    assert np.allclose(rho_a, rho_b)
+    via_scf = run_scf(np.ones(shape), build, lambda r: 0.0, max_iter=5, mixing_ndim=3, cell_bohr=cell, sphere_indices=np.arange(np.prod(shape)))
+    assert np.allclose(via_scf.state.rho_r, rho_b)
+
+
+def _sloshing_map(shape, cell):
+    g2 = fft_grid_g2(shape, cell)
+    rng = np.random.default_rng(0)
+    target = 1.0 + 0.1 * rng.standard_normal(shape)
+    target += 1.0 - target.mean()
+    # Long-wavelength components are strongly over-screened, as in a metal.
+    resp = np.clip(1.0 - 0.25 * (g2 + 0.5) / np.where(g2 > 0, g2, 1.0), -20.0, 0.9)
+
+    def build_rho_out(rho):
+        d = np.fft.fftn(rho - target)
+        d[0, 0, 0] = 0.0
+        return target + np.fft.ifftn(d * resp).real
+
+    return target, build_rho_out
+
+
+def test_broyden_and_anderson_beat_diis_on_charge_sloshing():
+    from jackal.io.yaml_input import SCFSection
+    from jackal.solvers.scf import scf_options
+
+    shape, cell = (12, 12, 12), np.eye(3) * 12.0
+    target, build = _sloshing_map(shape, cell)
+    iters = {}
+    for kind in ("diis", "anderson", "broyden"):
+        opts = scf_options(SCFSection(mixer=kind, max_iter=200, rhotol=1e-8))
+        res = run_scf(np.ones(shape), build, lambda r: 0.0, cell_bohr=cell, **opts)
+        assert res.state.converged, kind
+        assert np.allclose(res.state.rho_r, target, atol=1e-6)
+        first, second = res.state.mixer_history[0][0], res.state.mixer_history[1][0]
+        assert not np.shares_memory(first, second)
+        iters[kind] = res.state.iteration
+    assert iters["anderson"] < iters["diis"] / 2
+    assert iters["broyden"] < iters["diis"] / 2
+
+
+def test_quasi_newton_history_resets_on_residual_blowup():
+    from jackal.density.mixer import make_mixer
+
+    shape = (6, 6, 6)
+    mixer = make_mixer("broyden", cell_bohr=np.eye(3) * 8.0, reset_factor=5.0)
+    rho = np.ones(shape)
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        rho = mixer.mix(rho, rho + 1e-3 * rng.standard_normal(shape))
+    assert len(mixer.history) == 2
+    mixer.mix(rho, rho + 10.0 * rng.standard_normal(shape))
+    assert mixer.n_resets == 1
+    assert mixer.history == []
+
+
+def test_spin_diis_shares_history_and_matches_unpolarized_total():
+    from jackal.density.spin import initial_spin_density, to_total_magnetization
+
+    shape = (6, 6, 6)
+    target, build = _linear_map(shape, seed=3)
+    cell = np.eye(3) * 8.0
+    plain = DIISMixer(ndim=4, cell_bohr=cell)
+    spin = DIISMixer(ndim=4, cell_bohr=cell)
+    rho = np.ones(shape)
+    rho_spin = initial_spin_density(rho, 0.0)
+    for _ in range(6):
+        rho = plain.mix(rho, build(rho))
+        out = build(rho_spin[0] + rho_spin[1])
+        rho_spin = spin.mix(rho_spin, np.stack([0.5 * out, 0.5 * out]))
+    assert rho_spin.shape == (2, *shape)
+    assert spin.history[0][0].size == 2 * rho.size
+    tm = to_total_magnetization(rho_spin)
+    assert np.allclose(tm[0], rho)
+    assert np.allclose(tm[1], 0.0)
+
+
+def test_spin_scf_converges_magnetization():
+    shape = (6, 6, 6)
+    target, build = _linear_map(shape, seed=4)
+    m_target = 0.2 * np.cos(2 * np.pi * np.arange(6) / 6)[:, None, None] * np.ones(shape)
+
+    def build_spin(rho_spin):
+        total = build(rho_spin[0] + rho_spin[1])
+        mag = m_target + 0.4 * (rho_spin[0] - rho_spin[1] - m_target)
+        return np.stack([0.5 * (total + mag), 0.5 * (total - mag)])
+
+    res = run_scf(np.stack([0.5 * np.ones(shape)] * 2), build_spin, lambda r: 0.0, max_iter=80, rhotol=1e-7, cell_bohr=np.eye(3) * 9.0)
+    assert res.state.converged
+    assert np.allclose(res.state.rho_r[0] - res.state.rho_r[1], m_target, atol=1e-5)
+    assert np.allclose(res.state.rho_r[0] + res.state.rho_r[1], target, atol=1e-5)
@@ -0,0 +1,94 @@
+import jax
+import jax.numpy as jnp
+import numpy as np
+import pytest
+
+from jackal.density.occupations import compute_occupations, delta_function, entropy_function, fermi_level, occupation_function, smeared_occupations
+
+
+def _bands(nk=5, nb=8, seed=0):
+    rng = np.random.default_rng(seed)
+    eig = np.sort(rng.uniform(-0.5, 0.5, (nk, nb)), axis=1)
+    w = rng.uniform(0.5, 1.0, nk)
+    return eig, w / w.sum()
+
+
+@pytest.mark.parametrize("smearing", ["gaussian", "fermi-dirac", "methfessel-paxton", "marzari-vanderbilt"])
+def test_fermi_level_counts_electrons_to_machine_precision(smearing):
+    eig, w = _bands()
+    res = compute_occupations(eig, w, nelec=7.3, smearing=smearing, degauss_ry=0.04)
+    assert abs(np.sum(w[:, None] * res.occupations) - 7.3) < 1e-13
+    x = np.linspace(-4.0, 4.0, 401)
+    theta = np.asarray(occupation_function(jnp.asarray(x), smearing))
+    np.testing.assert_allclose(np.gradient(theta, x), np.asarray(delta_function(jnp.asarray(x), smearing)), atol=1e-3)
+    assert occupation_function(jnp.asarray(30.0), smearing) == pytest.approx(1.0)
+
+
+def test_entropy_makes_free_energy_variational():
+    # dS/dx = -x δ(x) is what makes E - TS stationary with respect to the occupations.
+    x = np.linspace(-6.0, 6.0, 2001)
+    for smearing in ("gaussian", "methfessel-paxton", "marzari-vanderbilt"):
+        s = np.asarray(entropy_function(jnp.asarray(x), smearing))
+        d = np.asarray(delta_function(jnp.asarray(x), smearing))
+        np.testing.assert_allclose(np.gradient(s, x), -x * d, atol=2e-3)
+    fd = np.asarray(entropy_function(jnp.asarray(x), "fermi-dirac"))
+    f = 1.0 / (1.0 + np.exp(-x))
+    np.testing.assert_allclose(fd, -(f * np.log(f) + (1 - f) * np.log1p(-f)), atol=1e-12)
+
+
+def test_fermi_level_gradient_matches_finite_difference():
+    eig, w = _bands(seed=1)
+    sigma = 0.01
+
+    def band_energy(e):
+        occ, _, _ = smeared_occupations(e, jnp.asarray(w), 6.0, sigma, smearing="fermi-dirac")
+        return jnp.sum(jnp.asarray(w)[:, None] * occ * e)
+
+    grad = jax.grad(band_energy)(jnp.asarray(eig))
+    d = np.zeros_like(eig)
+    d[2, 3] = 1e-6
+    fd = (band_energy(jnp.asarray(eig + d)) - band_energy(jnp.asarray(eig - d))) / 2e-6
+    assert abs(float(grad[2, 3]) - float(fd)) < 1e-6
+
+    dmu = jax.grad(lambda n: fermi_level(jnp.asarray(eig), jnp.asarray(w), n, sigma, "gaussian"))(6.0)
+    mu = lambda n: float(fermi_level(jnp.asarray(eig), jnp.asarray(w), n, sigma, "gaussian"))
+    assert abs(float(dmu) - (mu(6.0 + 1e-5) - mu(6.0 - 1e-5)) / 2e-5) < 1e-4 * abs(float(dmu))
+
+
+def test_fixed_and_spin_occupations():
+    eig, w = _bands()
+    res = compute_occupations(eig, w, nelec=6.0, smearing="fixed")
+    assert np.all(res.occupations[:, :3] == 2.0) and np.all(res.occupations[:, 3:] == 0.0)
+    spin = compute_occupations(np.stack([eig - 0.05, eig + 0.05]), w, nelec=6.0, smearing="gaussian", degauss_ry=0.02, spin_polarized=True)
+    assert spin.occupations.max() <= 1.0 + 1e-12
+    assert abs(np.sum(w[None, :, None] * spin.occupations) - 6.0) < 1e-12
+    assert np.sum(w[:, None] * spin.occupations[0]) > np.sum(w[:, None] * spin.occupations[1])
+    with pytest.raises(ValueError):
+        compute_occupations(eig, w, nelec=17.0, smearing="gaussian", degauss_ry=0.02)
+
+
+def test_smearing_without_degauss_is_rejected():
+    from pydantic import ValidationError
+
+    from jackal.io.yaml_input import OccupationsSection
+
+    eig, w = _bands()
+    with pytest.raises(ValueError, match="degauss required"):
+        compute_occupations(eig, w, nelec=6.0, smearing="gaussian")
+    with pytest.raises(ValidationError, match="degauss required"):
+        OccupationsSection(smearing="methfessel-paxton")
+    assert OccupationsSection().degauss is None
+
+
+def test_occupations_from_section_passes_mp_order():
+    from jackal.density.occupations import occupations_from_section
+    from jackal.io.yaml_input import OccupationsSection
+
+    eig, w = _bands()
+    results = {}
+    for order in (1, 2):
+        section = OccupationsSection(smearing="methfessel-paxton", degauss=0.04, mp_order=order)
+        results[order] = occupations_from_section(section, eig, w, nelec=7.3)
+        direct = compute_occupations(eig, w, nelec=7.3, smearing="methfessel-paxton", degauss_ry=0.04, order=order)
+        assert np.allclose(results[order].occupations, direct.occupations)
+    assert not np.allclose(results[1].occupations, results[2].occupations)
@@ -0,0 +1,78 @@
+import numpy as np
+from scipy.linalg import block_diag
+
+from jackal.core.types import PseudopotentialData
+from jackal.lattice.cell import cell_volume
+from jackal.lattice.gvectors import kpoint_basis
+from jackal.pseudopotential.projectors import (
+    NonlocalOperator,
+    SpeciesProjectors,
+    apply_projector_operator,
+    beta_gk_columns,
+    real_spherical_harmonics,
+)
+
+
+def _gaussian_pp(symbol, ls, dij):
+    r = np.linspace(1e-4, 6.0, 601)
+    betas = [r ** (l + 1) * np.exp(-r * r) for l in ls]
+    raw = {
+        "mesh": {"r": r, "rab": np.gradient(r)},
+        "nonlocal": {"beta_projectors": betas, "beta_angular_momentum": list(ls), "dij": np.asarray(dij).ravel()},
+    }
+    return PseudopotentialData(symbol=symbol, pp_type="NC", z_valence=4.0, raw=raw)
+
+
+def test_real_spherical_harmonics_orthonormal():
+    x, w = np.polynomial.legendre.leggauss(12)
+    phi = np.linspace(0.0, 2.0 * np.pi, 24, endpoint=False)
+    ct, ph = np.meshgrid(x, phi, indexing="ij")
+    st = np.sqrt(1.0 - ct**2)
+    pts = np.stack([st * np.cos(ph), st * np.sin(ph), ct], axis=-1).reshape(-1, 3)
+    weights = (w[:, None] * np.full(phi.size, 2.0 * np.pi / phi.size)[None, :]).ravel()
+    ylm = real_spherical_harmonics(3, pts)
+    assert np.allclose(ylm.T @ (weights[:, None] * ylm), np.eye(16), atol=1e-12)
+
+
+
+def test_real_spherical_harmonics_beyond_f_channels():
+    x, w = np.polynomial.legendre.leggauss(16)
+    phi = np.linspace(0.0, 2.0 * np.pi, 32, endpoint=False)
+    ct, ph = np.meshgrid(x, phi, indexing="ij")
+    st = np.sqrt(1.0 - ct**2)
+    pts = np.stack([st * np.cos(ph), st * np.sin(ph), ct], axis=-1).reshape(-1, 3)
+    weights = (w[:, None] * np.full(phi.size, 2.0 * np.pi / phi.size)[None, :]).ravel()
+    ylm = real_spherical_harmonics(5, pts)
+    assert np.allclose(ylm.T @ (weights[:, None] * ylm), np.eye(36), atol=1e-12)
+
+    # Sign convention of the low-l block: Y_1,-1 ∝ y, Y_33 ∝ x(x² - 3y²), Y_44 ∝ x⁴ - 6x²y² + y⁴.
+    u = pts[:, 0], pts[:, 1]
+    assert np.allclose(ylm[:, 1], np.sqrt(3.0 / (4.0 * np.pi)) * u[1])
+    assert np.allclose(ylm[:, 15], 0.25 * np.sqrt(35.0 / (2.0 * np.pi)) * u[0] * (u[0] ** 2 - 3.0 * u[1] ** 2))
+    assert np.allclose(ylm[:, 24], 3.0 / 16.0 * np.sqrt(35.0 / np.pi) * (u[0] ** 4 - 6.0 * u[0] ** 2 * u[1] ** 2 + u[1] ** 4))
+
+    # g-channel projectors reach the harmonics through beta_gk_columns without a special case.
+    sp = SpeciesProjectors.from_pseudopotential(_gaussian_pp("G", (0, 4), np.diag([1.0, 0.3])), 4.0)
+    cols = beta_gk_columns(sp, 2.0 * pts, 100.0)
+    assert sp.nproj == 10 and cols.shape == (pts.shape[0], 10)
+    assert np.all(np.isfinite(cols)) and np.abs(cols[:, 1:]).max() > 0.0
+
+def test_nonlocal_operator_matches_dense_beta_d_beta(silicon_cell):
+    cell = silicon_cell / 0.529177210903
+    pos = np.array([[0.0, 0.0, 0.0], [1.3, 1.2, 1.4], [2.0, 0.5, 0.1]])
+    kb = kpoint_basis(cell, 40.0, (0.1, 0.2, 0.0), 10.0)
+    qmax = np.sqrt(10.0) + 1.0
+    sp_a = SpeciesProjectors.from_pseudopotential(_gaussian_pp("A", (0, 1), [[2.0, 0.0], [0.0, -1.0]]), qmax)
+    sp_b = SpeciesProjectors.from_pseudopotential(_gaussian_pp("B", (0, 2, 0), np.diag([1.0, 0.5, 0.2]) + 0.1), qmax)
+    species_index = np.array([0, 1, 0])
+
+    op = NonlocalOperator([sp_a, sp_b], species_index, pos, kb.gk_cart, cell_volume(cell))
+    assert op.beta.shape == (kb.npw, 2 * sp_a.nproj + sp_b.nproj)
+    assert op.beta.flags["C_CONTIGUOUS"]
+
+    d_dense = block_diag(sp_a.d_channels(), sp_a.d_channels(), sp_b.d_channels())
+    rng = np.random.default_rng(0)
+    psi = rng.standard_normal((kb.npw, 5)) + 1j * rng.standard_normal((kb.npw, 5))
+    assert np.allclose(op(psi), apply_projector_operator(op.beta, d_dense, psi))
+    assert np.allclose(op(psi[:, 0]), apply_projector_operator(op.beta, d_dense, psi[:, 0]))
+    assert np.allclose(op.apply_overlap(psi), psi)
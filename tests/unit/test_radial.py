@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import jax
+import numpy as np
+
+from jackal.io.upf_parser import parse_upf
+from jackal.pseudopotential.radial import (
+    RadialTable,
+    pseudopotential_tables,
+    radial_to_reciprocal,
+    simpson_weights,
+)
+
+
+def _gaussian_ft(q):
+    return np.pi**1.5 * np.exp(-0.25 * q**2)
+
+
+def test_radial_to_reciprocal_gaussian():
+    r = np.linspace(0.0, 10.0, 2001)
+    q = np.array([0.0, 0.5, 1.0, 3.0])
+    assert np.allclose(radial_to_reciprocal(r, np.exp(-r * r), q), _gaussian_ft(q), atol=1e-6)
+
+
+def test_radial_table_cubic_interpolation_and_jax_gradient():
+    r = np.linspace(0.0, 10.0, 1001)
+    w = simpson_weights(np.full(r.size, r[1] - r[0]))
+    assert np.isclose(w @ r**2, 1000.0 / 3.0)
+
+    table = RadialTable.build(w, r, [4.0 * np.pi * r**2 * np.exp(-r * r)], [0], qmax=6.0, dq=0.05)
+    q = np.random.default_rng(0).uniform(0.0, 6.0, 50)
+    assert np.allclose(table(q)[0], _gaussian_ft(q), atol=1e-6)
+
+    dfdq = jax.grad(lambda x: table.interp_jax(x)[0])(2.3)
+    assert np.isclose(float(dfdq), -0.5 * 2.3 * _gaussian_ft(2.3), atol=1e-4)
+
+
+def test_pseudopotential_tables_cached_per_file(tmp_path: Path):
+    r = np.linspace(0.0, 8.0, 401)
+    p = tmp_path / "H.UPF"
+    fmt = lambda a: " ".join(f"{x:.10e}" for x in a)  # noqa: E731
+    p.write_text(
+        f"""<UPF>
+  <PP_HEADER element='H' z_valence='1.0' is_ultrasoft='F' is_paw='F' number_of_proj='1'/>
+  <PP_MESH><PP_R>{fmt(r)}</PP_R><PP_RAB>{fmt(np.full(r.size, r[1]))}</PP_RAB></PP_MESH>
+  <PP_LOCAL>{fmt(-2.0 / np.maximum(r, 1e-8))}</PP_LOCAL>
+  <PP_NONLOCAL>
+    <PP_BETA.1 angular_momentum='0'>{fmt(r * np.exp(-r * r))}</PP_BETA.1>
+    <PP_DIJ>1.0</PP_DIJ>
+  </PP_NONLOCAL>
+</UPF>""",
+        encoding="utf-8",
+    )
+    pp = parse_upf(p)
+    tables = pseudopotential_tables(pp, qmax=5.0)
+    assert pseudopotential_tables(pp, qmax=4.0) is tables
+    assert tables.beta.values.shape[0] == 1 and tables.beta_l == (0,)
+    # V_loc = -Z/r exactly, so the short-range part is the transform of Z(erf(r) - 1)/r.
+    q = np.array([1.0, 2.0])
+    expected = 4.0 * np.pi * (np.exp(-0.25 * q**2) - 1.0) / q**2
+    assert np.allclose(tables.local(q)[0], expected, atol=1e-3)
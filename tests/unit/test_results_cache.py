@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from jackal.calculator.results_cache import ResultsCache
+
+
+def _geometry(shift=0.0):
+    cell = np.eye(3) * 5.0
+    pos = np.array([[0.0, 0.0, 0.0], [1.25, 1.25, 1.25]]) + shift
+    return np.array([14, 14]), cell, pos
+
+
+def test_tolerance_match_lru_eviction_and_stats():
+    cache = ResultsCache(capacity=2, tol=1e-6)
+    cache.set(*_geometry(), {"energy": -1.0})
+    assert cache.get(*_geometry(4e-7))["energy"] == -1.0  # may cross a quantization boundary
+    assert cache.get(*_geometry(1e-3)) is None
+    assert cache.get(*_geometry(), properties=("energy", "forces")) is None
+
+    cache.set(*_geometry(0.1), {"energy": -2.0})
+    cache.get(*_geometry())  # refresh the first entry
+    cache.set(*_geometry(0.2), {"energy": -3.0})
+    assert cache.get(*_geometry(0.1)) is None
+    assert cache.get(*_geometry())["energy"] == -1.0
+    assert cache.stats.as_dict() == {"hits": 3, "misses": 3, "disk_hits": 0, "evictions": 1}
+    with pytest.raises(ValueError):
+        ResultsCache(capacity=0)
+
+
+def test_disk_persistence_is_namespaced(tmp_path):
+    forces = np.arange(6.0).reshape(2, 3)
+    ResultsCache(directory=tmp_path, namespace="a").set(*_geometry(), {"energy": -1.5, "forces": forces})
+
+    fresh = ResultsCache(directory=tmp_path, namespace="a")
+    hit = fresh.get(*_geometry())
+    assert hit["energy"] == -1.5 and np.array_equal(hit["forces"], forces)
+    assert fresh.stats.disk_hits == 1
+    assert ResultsCache(directory=tmp_path, namespace="b").get(*_geometry()) is None
+
+
+def test_set_merges_properties_of_a_matching_geometry(tmp_path):
+    forces = np.ones((2, 3))
+    cache = ResultsCache(tol=1e-6, directory=tmp_path)
+    cache.set(*_geometry(), {"energy": -1.0})
+    cache.set(*_geometry(4e-7), {"energy": -1.0, "forces": forces})
+    assert len(cache) == 1
+    assert np.array_equal(cache.get(*_geometry(), properties=("energy", "forces"))["forces"], forces)
+    cache.set(*_geometry(), {"stress": np.zeros(6)})
+    fresh = ResultsCache(tol=1e-6, directory=tmp_path)
+    assert set(fresh.get(*_geometry(), properties=("energy", "forces", "stress"))) == {"energy", "forces", "stress"}
+    assert not list(tmp_path.glob("**/*.tmp.npz"))
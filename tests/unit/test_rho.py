@@ -0,0 +1,37 @@
+import numpy as np
+
+from jackal.density.rho import DensityAccumulator, density_from_coefficients, density_from_orbitals
+from jackal.lattice.fft_grid import choose_fft_grids, fft_box_indices
+from jackal.lattice.gvectors import kpoint_basis
+
+
+def test_streaming_density_matches_dense_and_skips_empty_bands(silicon_cell):
+    cell = silicon_cell / 0.529177210903
+    vol = abs(np.linalg.det(cell))
+    shape = choose_fft_grids(cell, 8.0, 32.0, table={}).dense
+    kpts = [(0.0, 0.0, 0.0), (0.25, 0.25, 0.0)]
+    weights = np.array([0.25, 0.75])
+    occ = np.array([[2.0, 2.0, 1.0, 0.0], [2.0, 1.5, 0.0, 0.0]])
+    rng = np.random.default_rng(0)
+
+    psis, idxs, psi_r = [], [], []
+    for k in kpts:
+        kb = kpoint_basis(cell, 32.0, k, 8.0)
+        c = rng.standard_normal((kb.npw, 4)) + 1j * rng.standard_normal((kb.npw, 4))
+        c /= np.linalg.norm(c, axis=0)
+        idx = fft_box_indices(kb.gvecs_int, shape)
+        box = np.zeros((4, np.prod(shape)), dtype=complex)
+        box[:, idx] = c.T
+        psi_r.append(np.fft.ifftn(box.reshape(4, *shape), axes=(1, 2, 3), norm="forward").reshape(4, -1) / np.sqrt(vol))
+        psis.append(c)
+        idxs.append(idx)
+
+    ref = density_from_orbitals(np.stack(psi_r), occ, weights).reshape(shape)
+    rho = density_from_coefficients(iter(psis), occ, weights, idxs, shape, vol, block_size=2)
+    assert np.allclose(rho, ref)
+    assert np.isclose(rho.mean() * vol, weights @ occ.sum(axis=1))
+
+    acc = DensityAccumulator(shape, vol, block_size=3)
+    for ik in range(2):
+        acc.add_kpoint(psis[ik], occ[ik], weights[ik], idxs[ik])
+    assert acc.n_fft_bands == 5
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from jackal.lattice.kpoints import monkhorst_pack
+from jackal.lattice.symmetry import (
+    find_space_group,
+    irreducible_monkhorst_pack,
+    symmetrize_density,
+    symmetrize_forces,
+    symmetrize_stress,
+)
+
+
+def _fcc(a):
+    return 0.5 * a * np.array([[0.0, 1.0, 1.0], [1.0, 0.0, 1.0], [1.0, 1.0, 0.0]])
+
+
+@pytest.fixture
+def silicon():
+    cell = _fcc(5.43)
+    return cell, np.array([[0.0, 0.0, 0.0], [0.25, 0.25, 0.25]]) @ cell, np.array([14, 14])
+
+
+def test_space_groups_of_fcc_al_and_diamond_si(silicon):
+    al = find_space_group(_fcc(4.05), np.zeros((1, 3)), np.array([13]))
+    assert len(al) == 48
+    assert np.all(al.translations == 0.0)
+    si = find_space_group(*silicon)
+    assert len(si) == 48
+    assert np.array_equal(si.rotations[0], np.eye(3, dtype=int))
+    # Inversion swaps the two sublattices and needs a fractional translation (Fd-3m).
+    inv = np.flatnonzero(np.all(si.rotations == -np.eye(3, dtype=int), axis=(1, 2)))[0]
+    assert np.any(si.translations[inv] != 0.0)
+    assert np.array_equal(si.atom_map[inv], [1, 0])
+    cart = si.cartesian_rotations
+    assert np.allclose(np.einsum("nij,nkj->nik", cart, cart), np.eye(3))
+
+    distorted = silicon[1].copy()
+    distorted[1] += [0.01, 0.0, 0.0]
+    assert len(find_space_group(silicon[0], distorted, silicon[2])) < 48
+    assert len(find_space_group(silicon[0], distorted, silicon[2], symprec=0.05)) == 48
+
+
+def test_magnetic_moments_split_species(silicon):
+    assert len(find_space_group(*silicon, magmoms=[1.0, 1.0])) == 48
+    afm = find_space_group(*silicon, magmoms=[1.0, -1.0])
+    assert len(afm) == 24
+    assert np.all(afm.atom_map == np.arange(2))
+
+
+def test_irreducible_mesh_of_fcc_metal():
+    al = find_space_group(_fcc(4.05), np.zeros((1, 3)), np.array([13]))
+    irr = irreducible_monkhorst_pack((8, 8, 8), (0, 0, 0), al)
+    assert len(irr.kpoints.kpts) == 29
+    assert abs(irr.kpoints.weights.sum() - 1.0) < 1e-12
+    assert np.allclose(irr.kpoints.kpts[irr.full_to_irreducible][0], irr.kpoints.kpts[0])
+    shifted = irreducible_monkhorst_pack((4, 4, 4), (0.5, 0.5, 0.5), al)
+    assert abs(shifted.kpoints.weights.sum() - 1.0) < 1e-12
+    assert len(shifted.kpoints.kpts) < 64
+
+
+def _k_density(k_frac, cell, frac_pos, frac_grid):
+    # Model band density, periodic in k and covariant under the space group: k enters
+    # through cos(k·R) over the shortest lattice vectors R.
+    b = 2.0 * np.pi * np.linalg.inv(cell).T
+    m = np.array(np.meshgrid(*[np.arange(-2, 3)] * 3, indexing="ij")).reshape(3, -1).T
+    g = m @ b
+    g = g[np.linalg.norm(g, axis=1) < 2.6]
+    lat = np.array(np.meshgrid(*[np.arange(-1, 2)] * 3, indexing="ij")).reshape(3, -1).T @ cell
+    norms = np.linalg.norm(lat, axis=1)
+    shell = lat[np.abs(norms - norms[norms > 0].min()) < 1e-8]
+    weight = np.exp(-0.25 * np.sum(g * g, axis=1)) * ((1.0 + np.cos(shell @ (k_frac @ b)))[None, :] * np.exp(0.1 * g @ shell.T)).sum(axis=1)
+    sf = np.exp(-1j * g @ (frac_pos @ cell).T).sum(axis=1)
+    return np.real((weight * sf) @ np.exp(1j * g @ (frac_grid @ cell).T))
+
+
+def test_irreducible_run_reproduces_full_mesh(silicon):
+    cell, pos, numbers = silicon
+    shape = (12, 12, 12)
+    sg = find_space_group(cell, pos, numbers).compatible_with_grid(shape)
+    assert len(sg) == 48
+    frac_pos = pos @ np.linalg.inv(cell)
+    frac_grid = np.stack(np.meshgrid(*[np.arange(n) / n for n in shape], indexing="ij"), axis=-1).reshape(-1, 3)
+
+    full = monkhorst_pack((4, 4, 4))
+    rho_full = sum(w * _k_density(k, cell, frac_pos, frac_grid) for k, w in zip(full.kpts, full.weights))
+    irr = irreducible_monkhorst_pack((4, 4, 4), (0, 0, 0), sg)
+    assert len(irr.kpoints.kpts) < len(full.kpts)
+    rho_irr = sum(w * _k_density(k, cell, frac_pos, frac_grid) for k, w in zip(irr.kpoints.kpts, irr.kpoints.weights))
+    rho_sym = symmetrize_density(rho_irr.reshape(shape), irr.symmetry)
+    np.testing.assert_allclose(rho_sym.reshape(-1), rho_full, atol=1e-12)
+
+
+def test_symmetrized_forces_and_stress(silicon):
+    cell, pos, numbers = silicon
+    sg = find_space_group(cell, pos, numbers)
+    rng = np.random.default_rng(0)
+    assert np.allclose(symmetrize_forces(rng.standard_normal((2, 3)), sg), 0.0)
+    stress = symmetrize_stress(rng.standard_normal((3, 3)), sg)
+    assert np.allclose(stress, np.trace(stress) / 3.0 * np.eye(3))
+
+    wurtz_like = find_space_group(np.diag([4.0, 4.0, 6.0]), np.array([[0.0, 0.0, 0.0], [0.0, 0.0, 2.5]]), np.array([1, 8]))
+    f = symmetrize_forces(rng.standard_normal((2, 3)), wurtz_like)
+    assert np.allclose(f[:, :2], 0.0) and not np.allclose(f[:, 2], 0.0)
+    assert np.allclose(symmetrize_forces(f, wurtz_like), f)
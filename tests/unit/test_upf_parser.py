@@ -75,3 +75,123 @@ def test_parse_paw_and_build_basis(tmp_path: Path):
     assert len(basis.beta_projectors) == 1
     assert np.allclose(basis.dij, np.array([[3.0]]))
     assert np.allclose(basis.qij, np.array([[0.3]]))
+
+
+def test_parse_cache_in_process_and_on_disk(tmp_path: Path, monkeypatch):
+    from jackal.io import upf_parser
+
+    monkeypatch.setenv("JACKAL_CACHE_DIR", str(tmp_path / "cache"))
+    p = tmp_path / "C.UPF"
+    p.write_text(
+        """<?xml version="1.0"?>
+<UPF version="2.0.1">
+  <PP_INFO>Generated with <PP_INPUTFILE>&amp; free text 1.0 abc</PP_INPUTFILE></PP_INFO>
+  <PP_HEADER element='C' z_valence='4.0' is_ultrasoft='F' is_paw='F'/>
+  <PP_MESH><PP_R>0.0 1.0D-1 2.0d-1</PP_R><PP_RAB>0.1 0.1 0.1</PP_RAB></PP_MESH>
+  <PP_LOCAL>-1.0E+00 -2.0 -3.0</PP_LOCAL>
+</UPF>""",
+        encoding="utf-8",
+    )
+    upf_parser.clear_upf_cache()
+    first = parse_upf(p)
+    assert np.allclose(first.raw["mesh"]["r"], [0.0, 0.1, 0.2])
+    assert not first.raw["local_potential"].flags.writeable
+    assert parse_upf(p).raw["local_potential"] is first.raw["local_potential"]
+    assert len(list((tmp_path / "cache" / "upf").glob("*.npz"))) == 1
+
+    upf_parser.clear_upf_cache()
+    monkeypatch.setattr(upf_parser, "read_upf_blocks", lambda path: (_ for _ in ()).throw(AssertionError("reparsed")))
+    again = parse_upf(p)
+    assert again.symbol == "C" and np.allclose(again.raw["local_potential"], [-1.0, -2.0, -3.0])
+
+
+_PAW_UPF = """<UPF version="2.0.1">
+  <PP_HEADER element='N' z_valence='5.0' is_ultrasoft='T' is_paw='T' number_of_proj='2' mesh_size='4'/>
+  <PP_MESH><PP_R>0.0 0.1 0.2 0.3</PP_R><PP_RAB>0.1 0.1 0.1 0.1</PP_RAB></PP_MESH>
+  <PP_NLCC>0.4 0.3 0.2 0.1</PP_NLCC>
+  <PP_LOCAL>-1 -1 -1 -1</PP_LOCAL>
+  <PP_NONLOCAL>
+    <PP_BETA.1 angular_momentum='0' cutoff_radius_index='3'>1 2 3</PP_BETA.1>
+    <PP_BETA.2 angular_momentum='1'>4 5 6 7</PP_BETA.2>
+    <PP_DIJ>1 0 0 2</PP_DIJ>
+    <PP_AUGMENTATION q_with_l='T' nqf='0' nqlc='3' shape='PSQ'>
+      <PP_Q>0.1 0.2 0.2 0.3</PP_Q>
+      <PP_MULTIPOLES>1 2 2 3  0 0 0 0  0 0 0 9</PP_MULTIPOLES>
+      <PP_QIJL.1.1.0 first_index='1' second_index='1' angular_momentum='0'>1 1 1 1</PP_QIJL.1.1.0>
+      <PP_QIJL.1.2.1 first_index='1' second_index='2' angular_momentum='1'>2 2 2 2</PP_QIJL.1.2.1>
+      <PP_QIJL.2.2.0 first_index='2' second_index='2' angular_momentum='0'>3 3 3 3</PP_QIJL.2.2.0>
+      <PP_QIJL.2.2.2 first_index='2' second_index='2' angular_momentum='2'>4 4 4 4</PP_QIJL.2.2.2>
+    </PP_AUGMENTATION>
+  </PP_NONLOCAL>
+  <PP_PSWFC>
+    <PP_CHI.1 label='2S' l='0' occupation='2.0'>0.1 0.2 0.3 0.4</PP_CHI.1>
+    <PP_CHI.2 label='2P' l='1' occupation='3.0'>0.5 0.6 0.7 0.8</PP_CHI.2>
+  </PP_PSWFC>
+  <PP_FULL_WFC>
+    <PP_AEWFC.1>1 1 1 1</PP_AEWFC.1><PP_AEWFC.2>2 2 2 2</PP_AEWFC.2>
+    <PP_PSWFC.1>3 3 3 3</PP_PSWFC.1><PP_PSWFC.2>4 4 4 4</PP_PSWFC.2>
+  </PP_FULL_WFC>
+  <PP_RHOATOM>5 4 3 2</PP_RHOATOM>
+  <PP_PAW paw_data_format='2' core_energy='-12.5'>
+    <PP_OCCUPATIONS>2 3</PP_OCCUPATIONS>
+    <PP_AE_NLCC>9 8 7 6</PP_AE_NLCC>
+    <PP_AE_VLOC>-2 -2 -2 -2</PP_AE_VLOC>
+  </PP_PAW>
+</UPF>"""
+
+
+def test_parse_augmentation_paw_nlcc_and_pswfc(tmp_path: Path):
+    p = tmp_path / "N.UPF"
+    p.write_text(_PAW_UPF, encoding="utf-8")
+    pp = parse_upf(p)
+
+    nl = pp.raw["nonlocal"]
+    assert nl["beta_projectors"].shape == (2, 4) and nl["beta_projectors"][0, 3] == 0.0
+    assert nl["beta_angular_momentum"].tolist() == [0, 1] and nl["cutoff_radius_index"].tolist() == [3, 4]
+    assert np.allclose(nl["qij"], [[0.1, 0.2], [0.2, 0.3]])
+
+    aug = pp.raw["augmentation"]
+    assert aug["q_with_l"] and aug["qfuncl"].shape == (4, 4)
+    assert aug["qfuncl_index"].tolist() == [[0, 0, 0], [0, 1, 1], [1, 1, 0], [1, 1, 2]]
+    assert aug["multipoles"].shape == (2, 2, 3) and aug["multipoles"][1, 1, 2] == 9.0
+
+    assert np.allclose(pp.raw["nlcc"], [0.4, 0.3, 0.2, 0.1])
+    assert np.allclose(pp.raw["rho_atom"], [5, 4, 3, 2])
+    wfc = pp.raw["pswfc"]
+    assert wfc["chi"].shape == (2, 4) and wfc["l"].tolist() == [0, 1] and wfc["label"] == ["2S", "2P"]
+    assert np.allclose(wfc["occupation"], [2.0, 3.0])
+    paw = pp.raw["paw"]
+    assert paw["core_energy"] == -12.5 and paw["ae_wfc"].shape == (2, 4) and np.allclose(paw["ps_wfc"][1], 4.0)
+
+    basis = build_paw_basis(pp)
+    assert basis.qfuncl.shape == (4, 4) and basis.qij.shape == (2, 2)
+
+
+def test_augmentation_without_l_expands_allowed_channels(tmp_path: Path):
+    text = _PAW_UPF.replace("q_with_l='T'", "q_with_l='F'")
+    start, end = text.index("<PP_QIJL.1.1.0"), text.index("</PP_AUGMENTATION>")
+    text = text[:start] + "<PP_QIJ.1.2 first_index='1' second_index='2'>1 2 3 4</PP_QIJ.1.2>\n<PP_QIJ.2.2 first_index='2' second_index='2'>5 6 7 8</PP_QIJ.2.2>\n" + text[end:]
+    p = tmp_path / "N2.UPF"
+    p.write_text(text, encoding="utf-8")
+    aug = parse_upf(p).raw["augmentation"]
+    assert aug["qfuncl_index"].tolist() == [[0, 1, 1], [1, 1, 0], [1, 1, 2]]
+    assert np.allclose(aug["qfuncl"][2], [5, 6, 7, 8])
+
+
+def test_truncated_upf_is_rejected_and_not_cached(tmp_path: Path, monkeypatch):
+    import pytest
+
+    from jackal.io import upf_parser
+
+    monkeypatch.setenv("JACKAL_CACHE_DIR", str(tmp_path / "cache"))
+    p = tmp_path / "Bad.UPF"
+    p.write_text(
+        """<UPF version="2.0.1">
+  <PP_HEADER element='C' z_valence='4.0' is_ultrasoft='F' is_paw='F'/>
+  <PP_MESH><PP_R>0.0 0.1 0.2</PP_R><PP_RAB>0.1 0.1""",
+        encoding="utf-8",
+    )
+    upf_parser.clear_upf_cache()
+    with pytest.raises(ValueError, match="Bad.UPF"):
+        parse_upf(p)
+    assert not list((tmp_path / "cache").glob("**/*.npz"))
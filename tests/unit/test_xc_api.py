@@ -0,0 +1,99 @@
+import jax
+import jax.numpy as jnp
+import numpy as np
+import pytest
+
+from jackal.xc.gradient import GradientOperator, gradient_operator
+from jackal.xc.xc_api import xc_energy_potential_stress, xc_kernel
+
+
+def _density(cell, shape):
+    frac = np.stack(np.meshgrid(*[np.arange(n) / n for n in shape], indexing="ij"), axis=-1)
+    d = frac - np.array([0.5, 0.4, 0.5])
+    d -= np.round(d)
+    r2 = np.sum((d @ cell) ** 2, axis=-1)
+    return 0.2 * np.exp(-0.8 * r2) + 1e-3 * (1.0 + np.cos(2 * np.pi * frac[..., 0]))
+
+
+@pytest.fixture
+def cell():
+    return np.array([[6.0, 0.0, 0.0], [0.6, 5.5, 0.0], [0.0, 0.4, 6.5]])
+
+
+@pytest.mark.parametrize("functional", ["lda", "pbe"])
+def test_xc_potential_is_functional_derivative(cell, functional):
+    shape = (12, 12, 14)
+    rho = jnp.asarray(_density(cell, shape))
+    g = gradient_operator(shape, cell)
+    vol = abs(np.linalg.det(cell))
+    _, v, _ = xc_kernel(rho, g, vol, functional=functional)
+    de = jax.grad(lambda r: xc_kernel(r, g, vol, functional=functional)[0])(rho)
+    np.testing.assert_allclose(np.asarray(de) * rho.size / vol, np.asarray(v), atol=1e-8)
+
+
+@pytest.mark.parametrize("functional", ["lda", "pbe"])
+def test_xc_stress_matches_strain_derivative(cell, functional):
+    shape = (12, 12, 14)
+    rho = jnp.asarray(_density(cell, shape))
+
+    def energy(eps):
+        strained = jnp.asarray(cell) @ (jnp.eye(3) + eps).T
+        vol = jnp.abs(jnp.linalg.det(strained))
+        g = GradientOperator.from_cell(strained, shape)
+        return xc_kernel(rho * abs(np.linalg.det(cell)) / vol, g, vol, functional=functional)[0]
+
+    ref = jax.grad(energy)(jnp.zeros((3, 3))) / abs(np.linalg.det(cell))
+    res = xc_energy_potential_stress(np.asarray(rho), cell, functional=functional)
+    np.testing.assert_allclose(res.stress, np.asarray(ref), atol=1e-9)
+
+
+def test_xc_float32_precision(cell):
+    rho = _density(cell, (8, 8, 8))
+    r64 = xc_energy_potential_stress(rho, cell, functional="pbe")
+    r32 = xc_energy_potential_stress(rho, cell, functional="pbe", precision="float32")
+    assert r32.potential.dtype == np.float32
+    assert abs(r32.energy - r64.energy) < 1e-4 * abs(r64.energy)
+
+
+def test_gradient_operator_matches_analytic(cell):
+    shape = (16, 18, 20)
+    frac = np.stack(np.meshgrid(*[np.arange(n) / n for n in shape], indexing="ij"), axis=-1)
+    b = 2.0 * np.pi * np.linalg.inv(cell).T
+    k = np.array([1, -2, 3]) @ b
+    phase = 2.0 * np.pi * frac @ np.array([1, -2, 3])
+    op = gradient_operator(shape, cell)
+    assert gradient_operator(shape, cell) is op
+    grad, sigma = op.gradient_and_sigma(jnp.asarray(np.sin(phase)))
+    np.testing.assert_allclose(np.asarray(grad), np.moveaxis(np.cos(phase)[..., None] * k, -1, 0), atol=1e-10)
+    np.testing.assert_allclose(np.asarray(sigma), np.cos(phase) ** 2 * (k @ k), atol=1e-10)
+    div = op.divergence(grad)
+    np.testing.assert_allclose(np.asarray(div), -(k @ k) * np.sin(phase), atol=1e-9)
+
+
+@pytest.mark.parametrize("functional", ["lda", "pbe"])
+def test_spin_unpolarized_limit_matches_closed_shell(cell, functional):
+    rho = _density(cell, (10, 10, 10))
+    ref = xc_energy_potential_stress(rho, cell, functional=functional)
+    res = xc_energy_potential_stress(np.stack([0.5 * rho, 0.5 * rho]), cell, functional=functional)
+    assert abs(res.energy - ref.energy) < 1e-10
+    np.testing.assert_allclose(res.potential[0], ref.potential, atol=1e-9)
+    np.testing.assert_allclose(res.potential[1], ref.potential, atol=1e-9)
+    np.testing.assert_allclose(res.stress, ref.stress, atol=1e-10)
+
+
+def test_spin_pbe_potential_and_stress_are_derivatives(cell):
+    shape = (10, 10, 12)
+    rho = _density(cell, shape)
+    rho_spin = jnp.asarray(np.stack([0.7 * rho, 0.3 * rho + 0.05 * rho**2]))
+    vol = abs(np.linalg.det(cell))
+    op = gradient_operator(shape, cell)
+    _, v, stress = xc_kernel(rho_spin, op, vol, functional="pbe")
+    de = jax.grad(lambda r: xc_kernel(r, op, vol, functional="pbe")[0])(rho_spin)
+    np.testing.assert_allclose(np.asarray(de) * rho.size / vol, np.asarray(v), atol=1e-8)
+
+    def energy(eps):
+        strained = jnp.asarray(cell) @ (jnp.eye(3) + eps).T
+        vol_s = jnp.abs(jnp.linalg.det(strained))
+        return xc_kernel(rho_spin * vol / vol_s, GradientOperator.from_cell(strained, shape), vol_s, functional="pbe")[0]
+
+    np.testing.assert_allclose(np.asarray(stress), np.asarray(jax.grad(energy)(jnp.zeros((3, 3)))) / vol, atol=1e-9)
@@ -9,3 +9,12 @@ def test_lda_returns_finite_arrays():
     assert vxc.shape == rho.shape
     assert np.all(np.isfinite(eps))
     assert np.all(np.isfinite(vxc))
+
+
+def test_lda_correlation_reference_values():
+    rs = 2.0
+    rho = 3.0 / (4.0 * np.pi * rs**3)
+    assert abs(float(lda.pw92_correlation(rs)) + 0.044763) < 1e-5
+    assert abs(float(lda.pz81_correlation(rs)) - float(lda.pw92_correlation(rs))) < 1e-3
+    _, v = lda.energy_and_potential(np.array([rho, 0.0]))
+    assert v[1] == 0.0